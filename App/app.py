@@ -5,281 +5,39 @@
 from shiny import App, render, ui, reactive
 import pandas as pd
 from pathlib import Path
+import asyncio
 import io
-from datetime import datetime
-from shiny import App, render, ui, reactive
-import pandas as pd
-from pathlib import Path
-import io
-from datetime import datetime
+import re
+import shutil
+import time
 
 # Local modules
-from App.helpers import create_modal_with_loading, close_modal
+from App.readers import submit_upload, submit_bundle, load_upload, HEADER_SAMPLE_ROWS
+from App.scheduler import scheduler, QueueFullError
+from App.memory import estimate_footprint, admit, track_job, track_peak
+from App.references import referenced_file_types, reference_signature
 from App.samples import create_sample_file
-from App.validation import validate_file, validation_rules
+from App.fingerprint import HeaderIndex
+from App.history import history
+from App.reports import build_error_report
+from App.polars_engine import UnsupportedRule, use_polars, validate_file_polars
+from App.sql_engine import use_sql, validate_file_sql
+from App.validation import (
+    validate_file,
+    validation_rules,
+    rule_version,
+    precheck_headers,
+    suggest_file_types,
+    export_targets,
+)
 
 # Validation Rules
 # ============================================================================ #
 
-"""
-Validation rules (overview)
-This dictionary maps a logical file type (key) to a rules object that
-describes how uploaded data for that type should be validated, transformed
-and exported. The `validate_file` and `validate_single_file` functions use
-these entries to perform schema/type checks, date parsing and range checks,
-value validations, and optional wide->long transformations before calling
-the configured export function.
-
-Supported top-level keys for each file-type rule object:
-- `columns` (list): For long-format files, the expected column names or
-    the set of id/base columns used when transforming from wide->long.
-- `types` (dict): Mapping of column name -> type. Supported types:
-    `numeric`, `string`, `date`. When a column is `date` the validator
-    will attempt to parse values (optionally using per-column formats).
-- `date_columns` (dict): Optional per-column configuration for date
-    columns. Each key is a column name and the value may include:
-      - `format`: user-friendly pattern (e.g. `yyyy-mm-dd`, `dd/mm/yyyy`,
-          `mmm-yy`, `mm/dd/yy`) — converted internally to strptime.
-      - `range`: dict with `start`, `end` (ISO strings) and optional
-          `freq` (e.g. `W-MON` for weekly Mondays). Used for range checks.
-          The `range` dict may also include separate offsets for the start and
-          end dates to shift the allowed window. Offsets are specified as
-          integer days using the keys `start_offset` and `end_offset`.
-          Example:
-            "range": {
-                "start": "2025-01-06",
-                "end": "2025-01-20",
-                "start_offset": -7,
-                "end_offset": 3,
-                "freq": "W-MON"
-            }
-- `date_range` (dict): Legacy / top-level date range that applies when a
-    single date axis is implied (used for wide-format week columns).
-    This dict also supports `start_offset` and `end_offset` (integers,
-    days) to adjust the inclusive window used for validation.
-- `value_checks` (dict): Rules for values per column. Supported forms:
-      - `'not_null'` — column must not contain nulls
-      - list of allowed values — column values must be one of the list
-- `transform_config` (dict): Controls transformations applied by
-    `validate_file` before export. The key `type` selects behavior:
-      - `none`: no transform
-      - `column`: long-format where a single column contains dates (inferred
-          from `date_columns`) — used by attrition/recruitment/fte
-      - `columns`: wide-format where date labels are column headers. When
-          used provide `column_format` (user format) and optional
-          `require_monday` (bool) to enforce weekly Mondays.
-      - `multi_ids`: special wide-format where a set of ID columns are
-          date fields (e.g., `date_1`, `date_2`, `date_3`) and remaining
-          columns are value dimensions (melted to long). Provide
-          `id_columns` listing those date ID columns.
-- `names_to` / `values_to` (str): Column names to use for the melted
-    variable and value columns when performing wide->long (`melt`). For
-    example `names_to: 'week'` and `values_to: 'fte_count'`.
-- `id_columns` (list): For `multi_ids` transformations, the list of
-    columns that contain date IDs and should be kept as id_vars during melt.
-- `export_path` (str) and `export_func` (str | callable): Where to write
-    the exported CSV and which function (or function-name) to call.
-- `sheets` (dict): For multi-sheet Excel files, `validation_rules` may
-    contain a `sheets` mapping; each sheet has its own sub-rule object.
-
-Notes & examples:
-- `attrition` uses `transform_config: {'type': 'column'}` and a
-   `date_columns` entry for `week` so the validator infers the date axis.
-- `fte_wide` uses `transform_config: {'type': 'columns', 'column_format':
-   'yyyy-mm-dd', 'require_monday': True}` because dates are encoded in
-   the column headers and must be parsed and validated as Mondays.
-- `resource_allocation` uses `transform_config: {'type': 'multi_ids'}`
-   with `id_columns: ['date_1','date_2','date_3']` and per-column
-   `date_columns` formats; remaining columns are treated as city value
-   dimensions and are melted to long on export.
-
-Keep this block updated whenever new rule keys or transform types are
-introduced so validators and UI help text remain accurate.
-"""
-validation_rules = {
-    "attrition": {
-        "skiprows": 1,
-        # Add an extra date column `hire_date` to demonstrate multiple date formats
-        "columns": ["week", "job_type", "attrition_count", "hire_date"],
-        "types": {
-            "week": "date",
-            "job_type": "string",
-            "attrition_count": "numeric",
-            "hire_date": "date",
-        },
-        # per-column date formats and ranges. `week` uses yyyy-mm-dd weekly (W-MON),
-        # `hire_date` uses yyyy/mm/dd and has its own (non-weekly) range.
-        "date_columns": {
-            "week": {
-                "format": "yyyy-mm-dd",
-                "range": {"start": "2025-01-06", "end": "2025-01-20", "freq": "W-MON"},
-            },
-            "hire_date": {
-                "format": "yyyy/mm/dd",
-                "range": {
-                    "start": "2025-01-05",
-                    "end": "2025-01-18",
-                    "start_offset": 0,
-                    "end_offset": -1,
-                    "freq": "W-MON",
-                },
-            },
-        },
-        "value_checks": {
-            "week": "not_null",
-            "job_type": ["A", "B", "C"],
-            "attrition_count": "not_null",
-            "hire_date": "not_null",
-        },
-        "transform_config": {"type": "column"},
-        "export_path": "./exports/attrition.csv",
-        "export_func": "export_attrition",
-    },
-    "recruitment": {
-        "columns": ["week", "job_type", "recruitment_count"],
-        "types": {"week": "date", "job_type": "string", "recruitment_count": "numeric"},
-        "date_columns": {
-            "week": {
-                "format": "yyyy-mm-dd",
-                "range": {"start": "2025-01-06", "end": "2025-01-20", "freq": "W-MON"},
-            }
-        },
-        "value_checks": {
-            "week": "not_null",
-            "job_type": ["A", "B", "C"],
-            "recruitment_count": "not_null",
-        },
-        "transform_config": {"type": "column"},
-        "export_path": "./exports/recruitment.csv",
-        "export_func": "export_recruitment",
-    },
-    "fte": {
-        "columns": ["week", "job_type", "fte_count"],
-        "types": {"week": "date", "job_type": "string", "fte_count": "numeric"},
-        "date_columns": {
-            "week": {
-                "format": "yyyy-mm-dd",
-                "range": {"start": "2025-01-06", "end": "2025-01-20", "freq": "W-MON"},
-            }
-        },
-        "value_checks": {
-            "week": "not_null",
-            "job_type": ["A", "B", "C"],
-            "fte_count": "not_null",
-        },
-        "transform_config": {"type": "column"},
-        "export_path": "./exports/fte.csv",
-        "export_func": "export_fte",
-    },
-    "fte_wide": {
-        "columns": ["job_type"],
-        "types": {"job_type": "string"},
-        # For wide-format files the date columns are column names; specify column_format
-        "date_range": {"start": "2025-01-06", "end": "2025-01-20", "freq": "W-MON"},
-        "value_checks": {"job_type": ["A", "B", "C"]},
-        "transform_config": {
-            "type": "columns",
-            "column_format": "yyyy-mm-dd",
-            "require_monday": True,
-        },
-        "names_to": "week",
-        "values_to": "fte_count",
-        "export_path": "./exports/fte_wide.csv",
-        "export_func": "export_fte_wide",
-    },
-    "patch_mapping": {
-        "columns": ["wmis", "region"],
-        "types": {"wmis": "string", "region": "string"},
-        "value_checks": {
-            "wmis": ["A", "B", "C"],
-            "region": ["North", "South", "East", "West"],
-        },
-        "transform_config": {"type": "none"},
-        "export_path": "./exports/patch_mapping.csv",
-        "export_func": "export_patch_mapping",
-    },
-    "resource_allocation": {
-        # 3 date ID columns with different formats; city columns are dimensions (value columns)
-        "columns": [
-            "date_1", 
-            "date_2", 
-            "date_3", 
-            "skill"
-        ],
-        "types": {
-            "date_1": "date",
-            "date_2": "date",
-            "date_3": "date",
-            "skill": "string",
-        },
-        # per-column date formats for the 3 date ID columns
-        "date_columns": {
-            "date_1": {"format": "dd/mm/yyyy"},
-            "date_2": {"format": "mmm-yy"},
-            "date_3": {"format": "mm/dd/yy"},
-        },
-        "value_checks": {
-            "date_1": "not_null",
-            "date_2": "not_null",
-            "date_3": "not_null",
-            "skill": ["MS", "SS"],
-        },
-        # wide format: multiple date ID columns; other columns are value dimensions
-        "transform_config": {"type": "multi_ids"},
-        "id_columns": [
-            "date_1", 
-            "date_2", 
-            "date_3", 
-            "skill"
-        ],
-        "names_to": "city_name",
-        "values_to": "allocation_value",
-        "export_path": "./exports/resource_allocation.csv",
-        "export_func": "export_resource_allocation",
-    },
-    "demand": {
-        "sheets": {
-            "Volume": {
-                "columns": ["job_type"],
-                "types": {"job_type": "string", "demand_jobs": "numeric"},
-                "transform_config": {
-                    "type": "columns",
-                    "column_format": "yyyy-mm-dd",
-                    "require_monday": True,
-                },
-                "names_to": "week",
-                "values_to": "demand_jobs",
-                "date_range": {
-                    "start": "2025-01-06",
-                    "end": "2025-01-20",
-                    "freq": "W-MON",
-                },
-                "value_checks": {"job_type": ["A", "B", "C"]},
-                "export_path": "./exports/demand_volume.csv",
-                "export_func": "export_demand_volume",
-            },
-            "Mix": {
-                "columns": ["job_type"],
-                "types": {"job_type": "string", "demand_hours": "numeric"},
-                "transform_config": {
-                    "type": "columns",
-                    "column_format": "yyyy-mm-dd",
-                    "require_monday": True,
-                },
-                "names_to": "week",
-                "values_to": "demand_hours",
-                "date_range": {
-                    "start": "2025-01-06",
-                    "end": "2025-01-20",
-                    "freq": "W-MON",
-                },
-                "value_checks": {"job_type": ["A", "B", "C"]},
-                "export_path": "./exports/demand_mix.csv",
-                "export_func": "export_demand_mix",
-            },
-        },
-    },
-}
+# The rules themselves (and their overview) live in App/validation.py; every module shares that one copy.
+
+# Header signatures of every rule, used to pre-select the file type of uploads
+header_index = HeaderIndex(validation_rules)
 
 
 # ============================================================================ #
@@ -287,88 +45,7 @@ validation_rules = {
 # ============================================================================ #
 
 
-# Sample file generators
-# create_sample_file(file_type)
-# - Returns a small example DataFrame used for download templates and testing.
-def create_sample_file(file_type):
-    # Return a small example DataFrame that matches the schema defined in
-    # `validation_rules` for the given `file_type`. These are used by the
-    # download handlers to provide CSV templates for users.
-    if file_type == "attrition":
-        return pd.DataFrame(
-            {
-                "week": ["2025-01-06", "2025-01-13", "2025-01-20"],
-                "job_type": ["A", "B", "C"],
-                "attrition_count": [5.2, 2.1, 4.8],
-                # hire_date uses a different format (yyyy/mm/dd) per new rules
-                "hire_date": ["2025/01/13", "2025/01/13", "2025/01/06"],
-            }
-        )
-    elif file_type == "recruitment":
-        return pd.DataFrame(
-            {
-                "week": ["2025-01-06", "2025-01-13", "2025-01-20"],
-                "job_type": ["A", "B", "C"],
-                "recruitment_count": [15, 8, 12],
-            }
-        )
-    elif file_type == "fte":
-        return pd.DataFrame(
-            {
-                "week": ["2025-01-06", "2025-01-13", "2025-01-20"],
-                "job_type": ["A", "B", "C"],
-                "fte_count": [120.5, 85.2, 95.8],
-            }
-        )
-    elif file_type == "fte_wide":
-        return pd.DataFrame(
-            {
-                "job_type": ["A", "B", "C"],
-                "2025-01-06": [120.5, 85.2, 95.8],
-                "2025-01-13": [121.0, 86.0, 96.5],
-                "2025-01-20": [119.8, 84.5, 94.0],
-            }
-        )
-    elif file_type == "patch_mapping":
-        return pd.DataFrame(
-            {
-                "wmis": ["A", "B", "C"],
-                "region": ["North", "South", "East"],
-            }
-        )
-    elif file_type == "demand":
-        # return a dict of sample sheets so callers can generate Excel templates if needed
-        return {
-            "Volume": pd.DataFrame(
-                {
-                    "job_type": ["A", "B", "C"],
-                    "2025-01-06": [100, 80, 90],
-                    "2025-01-13": [105, 82, 92],
-                    "2025-01-20": [98, 78, 95],
-                }
-            ),
-            "Mix": pd.DataFrame(
-                {
-                    "job_type": ["A", "B", "C"],
-                    "2025-01-06": [8.0, 7.5, 8.2],
-                    "2025-01-13": [8.1, 7.6, 8.3],
-                    "2025-01-20": [7.9, 7.4, 8.0],
-                }
-            ),
-        }
-    elif file_type == "resource_allocation":
-        # 3 date ID columns with different formats; cities as value dimensions
-        return pd.DataFrame(
-            {
-                "date_1": ["15/01/2025", "15/02/2025", "15/03/2025"],
-                "date_2": ["Jan-25", "Feb-25", "Mar-25"],
-                "date_3": ["01/15/25", "02/15/25", "03/15/25"],
-                "skill": ["MS", "SS", "MS"],
-                "New York": [100.5, 105.2, 98.8],
-                "Los Angeles": [85.0, 88.5, 90.2],
-                "Chicago": [75.5, 78.0, 82.3],
-            }
-        )
+# `create_sample_file` (download templates and test data) lives in App/samples.py.
 
 
 # ============================================================================ #
@@ -424,8 +101,8 @@ app_ui = ui.page_sidebar(
         ui.hr(),
         ui.input_file(
             "uploaded_files",
-            "Upload Files (CSV or Excel)",
-            accept=[".csv", ".xlsx", ".xls", ".xlsm"],
+            "Upload Files (CSV, Parquet, Excel or a .zip bundle)",
+            accept=[".csv", ".parquet", ".xlsx", ".xls", ".xlsm", ".zip"],
             multiple=True,
         ),
         ui.br(),
@@ -433,9 +110,27 @@ app_ui = ui.page_sidebar(
     ),
     ui.card(ui.card_header("File Assignment"), ui.output_ui("file_assignment_display")),
     ui.card(
-        ui.card_header("File Validation Results"), ui.output_ui("validation_results")
+        ui.card_header("File Validation Results"),
+        ui.output_ui("validation_results"),
+        ui.output_ui("error_report_ui"),
     ),
     ui.card(ui.card_header("Uploaded Files Preview"), ui.output_ui("file_previews")),
+    ui.card(
+        ui.card_header("Validation History"),
+        ui.div(
+            ui.input_select(
+                "history_file_type",
+                None,
+                choices={"": "All file types", **{ft: ft for ft in validation_rules}},
+                width="220px",
+            ),
+            ui.input_checkbox("history_mine", "Only my runs", value=False),
+            ui.input_action_button("history_prev", "‹ Newer", class_="btn-outline-secondary btn-sm"),
+            ui.input_action_button("history_next", "Older ›", class_="btn-outline-secondary btn-sm"),
+            class_="d-flex gap-2 align-items-center mb-2",
+        ),
+        ui.output_ui("validation_history"),
+    ),
 )
 
 
@@ -444,6 +139,12 @@ app_ui = ui.page_sidebar(
 # ============================================================================ #
 
 
+def _remove_unpacked(future):
+    # Done-callback of a bundle unpacked after its upload was replaced: nothing reads its members
+    if not future.cancelled() and future.result()["dir"]:
+        shutil.rmtree(future.result()["dir"], ignore_errors=True)
+
+
 # Server function
 # - `server` wires up reactives, file reading, download handlers, assignment
 #   UI generation, and triggers validation when the user assigns types.
@@ -451,40 +152,50 @@ def server(input, output, session):
     # Server manages reactive state for uploaded files, user assignments,
     # and validation results. It wires up handlers for file downloads,
     # file reading, assignment UI, and running validations.
+    # Header samples (first HEADER_SAMPLE_ROWS rows) per uploaded filename; the
+    # full file is only parsed at submit time, after its header passes.
     uploaded_files_data = reactive.value({})
+    uploaded_file_infos = {}
     assigned_files = reactive.value({})
     validation_results_val = reactive.value({})
-
-    # ============================================================================ #
-    # Helper: read_file
-    # ============================================================================ #
-
-    # - Reads an uploaded file from `file_info['datapath']` and returns a DataFrame.
-    # - Supports CSV and Excel; returns None on failure.
-    def read_file(file_info):
-        """
-        Reads uploaded CSV or Excel file and returns:
-        - pandas.DataFrame if CSV or Excel with 1 sheet
-        - dict of {sheet_name: DataFrame} if Excel with multiple sheets
-        """
-        file_path = file_info["datapath"]
-        file_ext = Path(file_info["name"]).suffix.lower()
-        try:
-            if file_ext == ".csv":
-                return pd.read_csv(file_path)
-            elif file_ext in [".xlsx", ".xls", ".xlsm"]:
-                # Read all sheets first
-                all_sheets = pd.read_excel(file_path, sheet_name=None)
-                if len(all_sheets) == 1:
-                    # Return only the DataFrame (not a dict) if single sheet
-                    return next(iter(all_sheets.values()))
-                else:
-                    # Multi-sheet Excel — return as dict
-                    return all_sheets
-            else:
-                return None
-        except Exception:
-            return None
+    # Content hash per uploaded filename, used to recognise unchanged files
+    file_fingerprints = {}
+    # Per-file upload state: name -> {"status": "pending"|"ok"|"error", "message": str}
+    upload_status_val = reactive.value({})
+    # Reads still running on the shared read pool: name -> Future
+    pending_reads = {}
+    pending_reads_count = reactive.value(0)
+    # .zip bundles being unpacked (name -> Future); members of unpacked bundles
+    # waiting for their header reads before being assigned and validated
+    # (bundle name -> [member names]); temp dirs holding extracted members.
+    # A new upload retires the dirs: each batch is removed once the reads and
+    # jobs started before it have finished (or at session end), as they may
+    # still be reading members: [(dirs, [Future / Job])].
+    pending_bundles = {}
+    bundles_to_assign = {}
+    bundle_dirs = []
+    retired_bundle_dirs = []
+    # Pre-filled (file_type, remarks) per uploaded filename, from a bundle's
+    # manifest, the header index or the member's name; and the header index's
+    # (file_type, confidence) per filename.
+    default_assignments = {}
+    detected_types = {}
+    # Memoized validation results: file_type -> (memo_key, result). Lets a
+    # resubmission skip validate_file (and its export) for unchanged entries.
+    validation_cache = {}
+    # Jobs on the shared scheduler: file_type -> (memo_key, Job), plus the waves
+    # of file types still to submit once the current wave has finished.
+    pending_jobs = {}
+    pending_waves = []
+    # Every job this session submitted that may still be running
+    session_jobs = []
+    pending_jobs_count = reactive.value(0)
+    # Session progress bar while jobs run, and how many jobs this submission queued
+    progress_state = {"bar": None, "submitted": 0}
+    session_user = session.user or session.id
+    # Bumped whenever this session records a run, to refresh the history panel
+    history_version = reactive.value(0)
+    history_page = reactive.value(0)
 
     # ============================================================================ #
     # Download handlers
@@ -576,49 +287,195 @@ def server(input, output, session):
     @reactive.effect
     @reactive.event(input.uploaded_files)
     def _():
-        create_modal_with_loading("Uploading files")
-        # React to changes in uploaded files. Read each into a DataFrame and
-        # store in reactive `uploaded_files_data`.
+        # React to changes in uploaded files. Each file's header sample is read
+        # on the shared read pool; `_collect_reads` moves finished files into
+        # `uploaded_files_data` as they complete.
         files = input.uploaded_files()
         if files:
-            files_data = {}
+            for future in [*pending_reads.values(), *pending_bundles.values()]:
+                future.cancel()
+            retire_bundle_dirs()
+            pending_reads.clear()
+            pending_bundles.clear()
+            bundles_to_assign.clear()
+            default_assignments.clear()
+            detected_types.clear()
+            file_fingerprints.clear()
+            uploaded_file_infos.clear()
+            status = {}
             for file_info in files:
                 file_name = file_info["name"]
-                df = read_file(file_info)
-                if df is not None:
-                    files_data[file_name] = df
-            uploaded_files_data.set(files_data)
+                if Path(file_name).suffix.lower() == ".zip":
+                    # Unpacked on the read pool; members are read once it finishes
+                    pending_bundles[file_name] = submit_bundle(file_info, validation_rules)
+                    status[file_name] = {"status": "pending", "message": f"{file_name}: Unpacking…"}
+                    continue
+                uploaded_file_infos[file_name] = file_info
+                pending_reads[file_name] = submit_upload(file_info, nrows=HEADER_SAMPLE_ROWS)
+                status[file_name] = {"status": "pending", "message": f"{file_name}: Parsing…"}
+            uploaded_files_data.set({})
+            upload_status_val.set(status)
             assigned_files.set({})
             validation_results_val.set({})
-        close_modal()
+            pending_reads_count.set(len(pending_reads) + len(pending_bundles))
+
+    def retire_bundle_dirs():
+        # Bundles still unpacking are dropped: their dir goes as soon as they finish
+        for future in pending_bundles.values():
+            future.add_done_callback(_remove_unpacked)
+        session_jobs[:] = [job for job in session_jobs if not job.done()]
+        retired_bundle_dirs.append((list(bundle_dirs), [*pending_reads.values(), *session_jobs]))
+        bundle_dirs.clear()
+        remove_retired_bundle_dirs()
+
+    def remove_retired_bundle_dirs():
+        for retired in list(retired_bundle_dirs):
+            dirs, users = retired
+            if all(user.done() for user in users):
+                for bundle_dir in dirs:
+                    shutil.rmtree(bundle_dir, ignore_errors=True)
+                retired_bundle_dirs.remove(retired)
+
+    def remove_bundle_dirs():
+        for dirs, _ in retired_bundle_dirs:
+            bundle_dirs.extend(dirs)
+        retired_bundle_dirs.clear()
+        for bundle_dir in bundle_dirs:
+            shutil.rmtree(bundle_dir, ignore_errors=True)
+        bundle_dirs.clear()
+
+    session.on_ended(remove_bundle_dirs)
+
+    def add_bundle_members(bundle, status):
+        # Register an unpacked bundle's members as uploads and queue their header reads
+        bundle_dirs.append(bundle["dir"])
+        names = []
+        for member in bundle["members"]:
+            name = member["name"]
+            if name in uploaded_file_infos or name in pending_bundles:
+                name = f"{Path(bundle['name']).stem}-{name}"
+            member = {**member, "name": name}
+            uploaded_file_infos[name] = member
+            default_assignments[name] = (member["file_type"] or "", member["remarks"] or "")
+            pending_reads[name] = submit_upload(member, nrows=HEADER_SAMPLE_ROWS)
+            status[name] = {"status": "pending", "message": f"{name}: Parsing… (from {bundle['name']})"}
+            names.append(name)
+        bundles_to_assign[bundle["name"]] = names
+
+    @reactive.effect
+    def _collect_reads():
+        # Poll the read pool while uploads are outstanding and publish each
+        # file (or its error) as soon as its read finishes.
+        if pending_reads_count() == 0:
+            return
+        reactive.invalidate_later(0.25)
+        remove_retired_bundle_dirs()
+        finished = [name for name, future in pending_reads.items() if future.done()]
+        unpacked = [name for name, future in pending_bundles.items() if future.done()]
+        if not finished and not unpacked:
+            return
+        with reactive.isolate():
+            files_data = dict(uploaded_files_data())
+            status = dict(upload_status_val())
+        for bundle_name in unpacked:
+            future = pending_bundles.pop(bundle_name)
+            if future.cancelled():
+                continue
+            bundle = future.result()
+            if bundle["ok"]:
+                status[bundle_name] = {"status": "ok", "message": f"{bundle['message']} ({bundle['seconds']:.1f}s)"}
+                add_bundle_members(bundle, status)
+            else:
+                status[bundle_name] = {"status": "error", "message": bundle["message"]}
+        for file_name in finished:
+            future = pending_reads.pop(file_name)
+            if future.cancelled():
+                continue
+            res = future.result()
+            if res["ok"]:
+                files_data[file_name] = res["data"]
+                file_fingerprints[file_name] = res["fingerprint"]
+                # Classify from the header sample; an explicit manifest entry wins
+                detected_types[file_name] = header_index.detect(res["data"])
+                detected = detected_types[file_name][0]
+                _, remarks = default_assignments.get(file_name, ("", ""))
+                if detected and uploaded_file_infos[file_name].get("mapped_by") != "manifest":
+                    default_assignments[file_name] = (detected, remarks)
+                status[file_name] = {"status": "ok", "message": f"{res['message']} ({res['seconds']:.1f}s)"}
+            else:
+                status[file_name] = {"status": "error", "message": res["message"]}
+        uploaded_files_data.set(files_data)
+        upload_status_val.set(status)
+        pending_reads_count.set(len(pending_reads) + len(pending_bundles))
+        # Bundles whose members are all read are assigned and validated right away
+        ready = [b for b, names in bundles_to_assign.items() if not any(n in pending_reads for n in names)]
+        if ready:
+            selection = {}
+            for bundle_name in ready:
+                for name in bundles_to_assign.pop(bundle_name):
+                    file_type, remarks = default_assignments.get(name, ("", ""))
+                    taken = [ft for ft, _ in selection.values()]
+                    if name in files_data and file_type and file_type not in taken:
+                        selection[name] = (file_type, remarks)
+            if selection:
+                with reactive.isolate():
+                    assign_and_validate(selection, keep_existing=True)
 
     # ============================================================================ #
     # UI: file assignment builder
     # ============================================================================ #
+    def input_id_for(prefix, file_name):
+        # Shiny ids allow only letters, digits and underscores
+        return f"{prefix}_{re.sub(r'[^A-Za-z0-9_]', '_', file_name)}"
+
     @render.ui
     # - Renders inputs to map uploaded filenames to known file types.
     def file_assignment_ui():
         # Build UI allowing the user to assign an uploaded file to a known
         # file type (attrition, recruitment, fte, fte_wide).
         files_data = uploaded_files_data()
-        if not files_data:
+        status = upload_status_val()
+        if not files_data and not status:
             return ui.div()
         file_names = list(files_data.keys())
         file_type_options = [""] + list(validation_rules.keys())
         assignment_inputs = [ui.h5("Assign File Types:")]
+        for file_name, st in status.items():
+            if st["status"] == "pending":
+                assignment_inputs.append(ui.div(ui.span(st["message"], class_="text-muted"), class_="mb-2"))
+            elif st["status"] == "error":
+                assignment_inputs.append(
+                    ui.div(
+                        ui.span("✗ ", class_="text-danger fw-bold"),
+                        ui.span(st["message"], class_="text-danger"),
+                        class_="mb-2",
+                    )
+                )
         for file_name in file_names:
+            select_id = input_id_for("file_type", file_name)
+            remarks_id = input_id_for("remarks", file_name)
+            # Keep choices already made while other files are still loading
+            default_type, default_remarks = default_assignments.get(file_name, ("", ""))
+            with reactive.isolate():
+                selected = input[select_id]() if select_id in input else default_type
+                remarks_value = input[remarks_id]() if remarks_id in input else default_remarks
+            source = uploaded_file_infos.get(file_name, {}).get("bundle")
+            detected, confidence = detected_types.get(file_name, (None, 0.0))
             assignment_inputs.append(
                 ui.div(
                     ui.strong(f"{file_name}:"),
+                    ui.span(f" from {source}", class_="text-muted small") if source else None,
+                    ui.span(f" detected {detected} ({confidence:.0%})", class_="text-muted small") if detected else None,
                     ui.input_select(
-                        f"file_type_{file_name.replace('.', '_').replace(' ', '_')}",
+                        select_id,
                         "",
                         choices=file_type_options,
-                        selected="",
+                        selected=selected,
                     ),
                     ui.input_text(
-                        f"remarks_{file_name.replace('.', '_').replace(' ', '_')}",
+                        remarks_id,
                         label="Remarks (optional)",
+                        value=remarks_value,
                     ),
                     class_="mb-2",
                 )
@@ -636,45 +493,312 @@ def server(input, output, session):
     @reactive.effect
     @reactive.event(input.submit_assignment)
     def _():
-        create_modal_with_loading("Validating assigned files")
         files_data = uploaded_files_data()
         if not files_data:
             return
-        assignments = {}
+        selection = {}
         for file_name in files_data.keys():
-            input_id = f"file_type_{file_name.replace('.', '_').replace(' ', '_')}"
+            input_id = input_id_for("file_type", file_name)
             file_type = getattr(input, input_id)()
-            input_id = f"remarks_{file_name.replace('.', '_').replace(' ', '_')}"
+            input_id = input_id_for("remarks", file_name)
             remarks = getattr(input, input_id)()
-            if file_type:
+            selection[file_name] = (file_type, remarks)
+        assign_and_validate(selection)
+
+    def assign_and_validate(selection, keep_existing=False):
+        # `selection` maps uploaded filenames to (file_type, remarks). With
+        # `keep_existing`, earlier assignments of other types are kept.
+        files_data = uploaded_files_data()
+        assignments = dict(assigned_files()) if keep_existing else {}
+        for file_name, (file_type, remarks) in selection.items():
+            if file_type and file_name in files_data:
                 assignments[file_type] = {
                     "filename": file_name,
                     "data": files_data[file_name],
+                    "file_info": uploaded_file_infos[file_name],
                     "remarks": remarks,
+                    "fingerprint": file_fingerprints.get(file_name),
                 }
         # Persist assignments and trigger validation of all assigned files
         assigned_files.set(assignments)
         validate_assigned_files()
-        close_modal()
 
     # Validation runner
-    # - validate_assigned_files runs validations for all currently-assigned files
-    #   and stores results in the reactive `validation_results_val`.
+    # - validate_assigned_files queues validations for all currently-assigned
+    #   files on the process-wide scheduler; `_collect_jobs` moves finished
+    #   results into the reactive `validation_results_val`.
+    # - Results are memoized on (file content, assigned type, rule version,
+    #   remarks, referenced exports); only entries whose key changed are
+    #   re-validated/re-exported.
+    # - Headers are checked against the rule first; only files that pass are
+    #   queued for the full parse and validation.
+    # - Types referenced by other assigned types (e.g. patch_mapping) run in a
+    #   first wave so their fresh export is used by the foreign-key checks.
     def validate_assigned_files():
         # Validate each file that the user has assigned to a type using the
         # corresponding entry in `validation_rules`.
         assignments = assigned_files()
+        for _, job in pending_jobs.values():
+            scheduler.cancel(job)
+        pending_jobs.clear()
+        referenced = set()
+        for file_type in assignments:
+            referenced |= referenced_file_types(validation_rules.get(file_type, {}))
+        pending_waves[:] = [
+            [ft for ft in assignments if ft in referenced],
+            [ft for ft in assignments if ft not in referenced],
+        ]
+        # Drop memo entries for types that are no longer assigned
+        for file_type in list(validation_cache):
+            if file_type not in assignments:
+                del validation_cache[file_type]
         results = {}
-        for file_type, file_info in assignments.items():
-            if file_type in validation_rules:
-                results[file_type] = validate_file(
-                    file_info["data"],
+        progress_state["submitted"] = 0
+        start_next_wave(assignments, results)
+        validation_results_val.set(results)
+        pending_jobs_count.set(len(pending_jobs))
+
+    def start_next_wave(assignments, results):
+        # Submit waves until one leaves jobs running (memo hits and failed
+        # header checks complete immediately).
+        while pending_waves and not pending_jobs:
+            for file_type in pending_waves.pop(0):
+                file_info = assignments[file_type]
+                if file_type not in validation_rules:
+                    continue
+                memo_key = (
+                    file_info.get("fingerprint") or file_info["filename"],
+                    file_type,
+                    rule_version(validation_rules[file_type]),
+                    file_info.get("remarks", "") or "",
+                    reference_signature(validation_rules[file_type], validation_rules),
+                )
+                cached = validation_cache.get(file_type)
+                if cached is not None and cached[0] == memo_key:
+                    results[file_type] = cached[1]
+                    continue
+                file_id = f"{file_type.capitalize()} ({file_info['filename']})"
+                precheck = precheck_headers(file_info["data"], validation_rules[file_type], file_id)
+                if precheck is not None:
+                    suggestions = [ft for ft in suggest_file_types(file_info["data"], validation_rules) if ft != file_type]
+                    if suggestions:
+                        precheck["message"] += f" Did you mean '{suggestions[0]}'?"
+                    results[file_type] = precheck
+                    validation_cache[file_type] = (memo_key, precheck)
+                    continue
+                try:
+                    job = scheduler.submit(
+                        validation_job(file_type, file_info),
+                        user=session_user,
+                        file_type=file_type,
+                        size=file_info["file_info"].get("size", 0),
+                        label=file_id,
+                        targets=export_targets(validation_rules[file_type]),
+                    )
+                except QueueFullError as e:
+                    results[file_type] = {"valid": False, "message": f"{file_id}: {e}"}
+                    continue
+                pending_jobs[file_type] = (memo_key, job)
+                session_jobs.append(job)
+                progress_state["submitted"] += 1
+                results[file_type] = {"valid": None, "pending": True, "message": f"{file_id}: Queued…"}
+
+    def validation_job(file_type, file_info):
+        # Work done on a scheduler thread: full parse, then validate/export.
+        def run(job):
+            sheet_results = {}
+
+            def on_progress(**event):
+                # Keep every finished sheet's result so it can be shown early
+                if "sheet_result" in event:
+                    sheet_results[event["sheet"]] = event.pop("sheet_result")
+                    event["sheet_results"] = dict(sheet_results)
+                job.report(**event)
+
+            # Admission control: estimate the footprint before parsing anything
+            job.report(stage="sizing", fraction=0.0)
+            estimate = estimate_footprint(file_info["file_info"], file_info["data"])
+            memory = {"estimated_mb": round(estimate["estimated_bytes"] / 1024**2, 2), "estimate_method": estimate["method"], "peak_mb": {}}
+            ok, reason = admit(estimate)
+            peaks = memory["peak_mb"]
+            # Stages outside the Python heap are always measured by RSS; the pandas stage is
+            # traced with tracemalloc in a sample of jobs only, as that slows it down
+            heap_traced = track_job()
+            timings = {}
+            if use_sql(file_info["file_info"], validation_rules[file_type], admitted=ok):
+                # Out-of-core SQL engine: queries the file in place, so the budget does not apply
+                start = time.perf_counter()
+                try:
+                    with track_peak("validate", peaks, native=True):
+                        res, rows = validate_file_sql(
+                            file_info["file_info"],
+                            validation_rules[file_type],
+                            f"{file_type.capitalize()} ({file_info['filename']})",
+                            f"{file_info['filename']}",
+                            remarks=file_info.get("remarks", ""),
+                            progress=on_progress,
+                            source_hash=file_info.get("fingerprint"),
+                            file_type=file_type,
+                        )
+                    timings["validate_s"] = round(time.perf_counter() - start, 3)
+                    return {**res, "engine": "duckdb", "memory": memory, "timings": timings, "rows": rows}
+                except UnsupportedRule as e:
+                    memory["peak_mb"].clear()
+                    if not ok:
+                        return {"valid": False, "message": f"{job.label}: {reason} (out-of-core validation does not support {e})", "memory": memory}
+            if not ok:
+                return {"valid": False, "message": f"{job.label}: {reason}", "memory": memory}
+
+            if use_polars(file_info["file_info"], validation_rules[file_type]):
+                # Polars engine: reads and checks in one go; rules it cannot express fall back to pandas
+                start = time.perf_counter()
+                try:
+                    with track_peak("validate", peaks, native=True):
+                        res, rows = validate_file_polars(
+                            file_info["file_info"],
+                            validation_rules[file_type],
+                            f"{file_type.capitalize()} ({file_info['filename']})",
+                            f"{file_info['filename']}",
+                            remarks=file_info.get("remarks", ""),
+                            progress=on_progress,
+                            source_hash=file_info.get("fingerprint"),
+                            file_type=file_type,
+                        )
+                    timings["validate_s"] = round(time.perf_counter() - start, 3)
+                    return {**res, "engine": "polars", "memory": memory, "timings": timings, "rows": rows}
+                except UnsupportedRule:
+                    memory["peak_mb"].clear()
+
+            job.report(stage="reading", fraction=0.0)
+            start = time.perf_counter()
+            # The full CSV read parses with pyarrow, outside the Python heap
+            with track_peak("read", peaks, native=True):
+                read = load_upload(file_info["file_info"], fingerprint=False, rules=validation_rules[file_type])
+            timings["read_s"] = round(time.perf_counter() - start, 3)
+            if not read["ok"]:
+                return {"valid": False, "message": read["message"], "memory": memory, "timings": timings}
+            frames = read["data"].values() if isinstance(read["data"], dict) else [read["data"]]
+            rows = sum(len(df) for df in frames)
+            start = time.perf_counter()
+            with track_peak("validate", peaks, native=not heap_traced):
+                res = validate_file(
+                    read["data"],
                     validation_rules[file_type],
                     f"{file_type.capitalize()} ({file_info['filename']})",
                     f"{file_info['filename']}",
                     remarks=file_info.get("remarks", ""),
+                    progress=on_progress,
+                    source_hash=file_info.get("fingerprint"),
+                    file_type=file_type,
                 )
-        validation_results_val.set(results)
+            timings["validate_s"] = round(time.perf_counter() - start, 3)
+            return {**res, "memory": memory, "timings": timings, "rows": rows}
+
+        return run
+
+    @reactive.effect
+    def _collect_jobs():
+        # Poll this session's jobs; publish queue position while waiting and
+        # the result as soon as each finishes, then start the next wave.
+        if pending_jobs_count() == 0:
+            return
+        reactive.invalidate_later(0.5)
+        remove_retired_bundle_dirs()
+        with reactive.isolate():
+            results = dict(validation_results_val())
+            assignments = assigned_files()
+        for file_type, (memo_key, job) in list(pending_jobs.items()):
+            if job.done():
+                del pending_jobs[file_type]
+                if job.status == "done":
+                    results[file_type] = job.result
+                    validation_cache[file_type] = (memo_key, job.result)
+                else:
+                    results[file_type] = {"valid": False, "message": f"{job.label}: Validation failed ❌ ({job.error})"}
+                record_run(file_type, job, assignments.get(file_type, {}), results[file_type])
+            elif job.status == "queued":
+                position = scheduler.position(job)
+                results[file_type] = {"valid": None, "pending": True, "message": f"{job.label}: Queued (position {position})…"}
+            else:
+                results[file_type] = {
+                    "valid": None,
+                    "pending": True,
+                    "message": f"{job.label}: {describe_progress(job.progress)}",
+                    "partial": list(job.progress.get("sheet_results", {}).values()),
+                }
+        if not pending_jobs:
+            start_next_wave(assignments, results)
+        update_progress_bar()
+        validation_results_val.set({ft: results[ft] for ft in assignments if ft in results})
+        pending_jobs_count.set(len(pending_jobs))
+
+    def record_run(file_type, job, file_info, result):
+        # Queue the finished run for the history store; the write happens off-thread
+        timings = result.get("timings", {})
+        peaks = result.get("memory", {}).get("peak_mb", {})
+        history.record(
+            user=session_user,
+            file_type=file_type,
+            filename=file_info.get("filename"),
+            valid=int(bool(result.get("valid"))),
+            message=result.get("message"),
+            warning=result.get("warning"),
+            rows=result.get("rows"),
+            violations=job.progress.get("violations"),
+            batch_key=result.get("key"),
+            export_target=", ".join(export_targets(validation_rules[file_type])),
+            source_hash=file_info.get("fingerprint"),
+            queued_s=round(job.started_at - job.submitted_at, 3) if job.started_at else None,
+            read_s=timings.get("read_s"),
+            validate_s=timings.get("validate_s"),
+            total_s=round(job.finished_at - job.submitted_at, 3) if job.finished_at else None,
+            peak_mb=max(peaks.values(), default=None),
+        )
+        with reactive.isolate():
+            history_version.set(history_version() + 1)
+
+    def describe_progress(progress):
+        # e.g. "Types — sheet Volume, column job_type (1,200 rows)…"
+        text = str(progress.get("stage", "running")).capitalize()
+        where = []
+        if progress.get("sheet"):
+            where.append(f"sheet {progress['sheet']}")
+        if progress.get("column"):
+            where.append(f"column {progress['column']}")
+        if where:
+            text += " — " + ", ".join(where)
+        if progress.get("rows") is not None:
+            text += f" ({progress['rows']:,} rows, {progress.get('violations', 0)} violations)"
+        return text + "…"
+
+    def describe_export(stats):
+        # e.g. "resource_allocation.csv.gz — gzip 37.8 MB → 3.9 MB (9.6×, 7.6 MB/s)"
+        if "codec" not in stats:
+            return [line for sheet_stats in stats.values() for line in describe_export(sheet_stats)]
+        size = lambda n: f"{n / 1e6:,.1f} MB" if n >= 1e6 else f"{n / 1e3:,.1f} KB"
+        return [
+            f"{stats['file']} — {stats['codec']} {size(stats['raw_bytes'])} → "
+            f"{size(stats['compressed_bytes'])} ({stats['ratio']}×, {stats['mb_per_s']} MB/s)"
+        ]
+
+    def update_progress_bar():
+        # One ui.Progress per session covering every job of the current submission
+        total = progress_state["submitted"]
+        if not pending_jobs or not total:
+            if progress_state["bar"] is not None:
+                progress_state["bar"].close()
+                progress_state["bar"] = None
+            return
+        if progress_state["bar"] is None:
+            progress_state["bar"] = ui.Progress(min=0, max=1)
+        finished = total - len(pending_jobs)
+        running = sum(job.progress.get("fraction", 0.0) for _, job in pending_jobs.values())
+        labels = [job.label for _, job in pending_jobs.values()]
+        progress_state["bar"].set(
+            value=(finished + running) / total,
+            message=f"Validating {finished}/{total} files done",
+            detail=", ".join(labels[:3]) + ("…" if len(labels) > 3 else ""),
+        )
 
     # ============================================================================ #
     # Display assigned files, validation results & previews
@@ -708,7 +832,24 @@ def server(input, output, session):
             )
         content = []
         for _, result in results.items():
-            if result["valid"]:
+            if result.get("pending"):
+                content.append(
+                    ui.div(
+                        ui.span("… ", class_="text-muted fw-bold"),
+                        ui.span(result["message"], class_="text-muted"),
+                        class_="mb-2",
+                    )
+                )
+                # Sheets already finished while the rest of the file runs
+                for partial in result.get("partial", []):
+                    content.append(
+                        ui.div(
+                            ui.span("✓ " if partial["valid"] else "✗ ", class_="text-success" if partial["valid"] else "text-danger"),
+                            ui.span(partial["message"], class_="text-success" if partial["valid"] else "text-danger"),
+                            class_="mb-2 ms-3",
+                        )
+                    )
+            elif result["valid"]:
                 content.append(
                     ui.div(
                         ui.span("✓ ", class_="text-success fw-bold"),
@@ -716,6 +857,8 @@ def server(input, output, session):
                         class_="mb-2",
                     )
                 )
+                for line in describe_export(result.get("export", {})):
+                    content.append(ui.div(line, class_="mb-2 ms-3 small text-muted"))
                 if "warning" in result:
                     content.append(
                         ui.div(
@@ -742,6 +885,125 @@ def server(input, output, session):
                     )
         return ui.div(*content)
 
+    def reportable_failures():
+        # Failed files that were read in full, so their violations can be listed;
+        # the report reads the whole file, so not for uploads left to the SQL engine
+        return {
+            ft: result
+            for ft, result in validation_results_val().items()
+            if result.get("valid") is False and result.get("rows") is not None and result.get("engine") != "duckdb"
+        }
+
+    @render.ui
+    # UI: error report download
+    # - Offered once a file has failed; lists every violation, not just the first.
+    def error_report_ui():
+        failures = reportable_failures()
+        if not failures:
+            return None
+        assignments = assigned_files()
+        with reactive.isolate():
+            selected = input.report_file_type() if "report_file_type" in input else None
+        return ui.div(
+            ui.input_select(
+                "report_file_type",
+                None,
+                choices={ft: assignments[ft]["filename"] for ft in failures if ft in assignments},
+                selected=selected if selected in failures else None,
+                width="220px",
+            ),
+            ui.input_radio_buttons(
+                "report_format",
+                None,
+                choices={"xlsx": "Annotated workbook (.xlsx)", "csv": "Violations list (.csv)"},
+                inline=True,
+            ),
+            ui.download_button("download_error_report", "Download error report", class_="btn-outline-danger btn-sm"),
+            class_="d-flex gap-2 align-items-center mt-2",
+        )
+
+    def error_report_filename():
+        file_type = input.report_file_type()
+        filename = assigned_files().get(file_type, {}).get("filename", file_type)
+        return f"{Path(filename).stem}_errors.{input.report_format()}"
+
+    @render.download(filename=error_report_filename)
+    async def download_error_report():
+        # Re-read the upload and write the report on a worker thread, then stream it
+        file_type = input.report_file_type()
+        fmt = input.report_format()
+        file_info = assigned_files()[file_type]
+
+        def build():
+            read = load_upload(file_info["file_info"], fingerprint=False, rules=validation_rules[file_type])
+            if not read["ok"]:
+                raise RuntimeError(read["message"])
+            return build_error_report(read["data"], validation_rules[file_type], fmt, file_type=file_type)
+
+        path, _ = await asyncio.to_thread(build)
+        try:
+            with open(path, "rb") as fh:
+                while chunk := fh.read(1024 * 1024):
+                    yield chunk
+        finally:
+            path.unlink(missing_ok=True)
+
+    HISTORY_PAGE_SIZE = 20
+
+    @reactive.effect
+    @reactive.event(input.history_file_type, input.history_mine)
+    def _reset_history_page():
+        history_page.set(0)
+
+    @reactive.effect
+    @reactive.event(input.history_prev)
+    def _history_newer():
+        history_page.set(max(history_page() - 1, 0))
+
+    @reactive.effect
+    @reactive.event(input.history_next)
+    def _history_older():
+        history_page.set(history_page() + 1)
+
+    @render.ui
+    def validation_history():
+        history_version()
+        page = history_page()
+        runs, total = history.page(
+            page,
+            HISTORY_PAGE_SIZE,
+            file_type=input.history_file_type() or None,
+            user=session_user if input.history_mine() else None,
+        )
+        if history.pending():
+            # Recorded runs still being written; look again shortly
+            reactive.invalidate_later(history.flush_seconds)
+        last_page = max((total - 1) // HISTORY_PAGE_SIZE, 0)
+        if page > last_page:
+            history_page.set(last_page)
+            return None
+        if not runs:
+            return ui.p("No validation runs recorded yet", class_="text-muted")
+        header = ui.tags.tr(*[ui.tags.th(h) for h in ["When", "User", "File type", "File", "Result", "Rows", "Time (s)", "Batch key", "Export"]])
+        body = [
+            ui.tags.tr(
+                ui.tags.td(run["recorded_at"]),
+                ui.tags.td(run["user"]),
+                ui.tags.td(run["file_type"]),
+                ui.tags.td(run["filename"]),
+                ui.tags.td("✓" if run["valid"] else "✗", title=run["message"], class_="text-success" if run["valid"] else "text-danger"),
+                ui.tags.td(f"{run['rows']:,}" if run["rows"] is not None else ""),
+                ui.tags.td(run["total_s"] if run["total_s"] is not None else ""),
+                ui.tags.td(run["batch_key"] or ""),
+                ui.tags.td(run["export_target"] or ""),
+            )
+            for run in runs
+        ]
+        return ui.div(
+            ui.tags.table(ui.tags.thead(header), ui.tags.tbody(*body), class_="table table-sm small"),
+            ui.p(f"Page {page + 1} of {last_page + 1} ({total:,} runs)", class_="text-muted small"),
+        )
+
     @render.ui
     def file_previews():
         assignments = assigned_files()
@@ -0,0 +1,168 @@
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+import zipfile
+import zlib
+from pathlib import Path, PurePosixPath
+
+# Limits for one uploaded .zip bundle.
+BUNDLE_MAX_MEMBERS = int(os.environ.get("BUNDLE_MAX_MEMBERS", 50))
+BUNDLE_MAX_BYTES = int(os.environ.get("BUNDLE_MAX_MB", 2048)) * 1024**2
+# Largest allowed uncompressed/compressed size ratio per member (zip bombs).
+BUNDLE_MAX_RATIO = 200
+# Optional member listing file types (and remarks) explicitly.
+BUNDLE_MANIFEST = "manifest.json"
+BUNDLE_EXTENSIONS = {".csv", ".parquet", ".xlsx", ".xls", ".xlsm"}
+_COPY_CHUNK = 1024 * 1024
+# Raised by zipfile on archives it cannot read: encrypted members (RuntimeError),
+# unsupported compression methods (NotImplementedError), truncated or corrupt data.
+_ZIP_ERRORS = (zipfile.BadZipFile, RuntimeError, NotImplementedError, EOFError, zlib.error)
+
+
+class BundleError(Exception):
+    """Raised when a bundle is unreadable or breaks one of the limits."""
+
+
+def _normalized_stem(name: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "_", Path(name).stem.lower()).strip("_")
+
+
+def match_file_type(name: str, file_types) -> str | None:
+    """
+    Map a member file name to a file type by pattern: the type must appear in
+    the normalised stem as a whole `_`-delimited token run (`FTE_Wide 2025-W03.csv`
+    matches `fte_wide`). The longest matching type wins, so `fte_wide` beats `fte`.
+    """
+    stem = _normalized_stem(name)
+    matches = [ft for ft in file_types if re.search(rf"(^|_){re.escape(ft)}(_|$)", stem)]
+    return max(matches, key=len) if matches else None
+
+
+def _read_manifest(zf: zipfile.ZipFile, names: dict) -> dict:
+    """Return {member name: {"file_type", "remarks"}} from the bundle's manifest.json, if any."""
+    info = names.get(BUNDLE_MANIFEST)
+    if info is None:
+        return {}
+    if info.file_size > 1024**2:
+        raise BundleError(f"{BUNDLE_MANIFEST} is larger than 1 MB")
+    try:
+        manifest = json.loads(zf.read(info).decode("utf-8"))
+    except ValueError as e:
+        raise BundleError(f"{BUNDLE_MANIFEST} is not valid JSON ({e})")
+    entries = manifest.get("files", manifest) if isinstance(manifest, dict) else {}
+    if not isinstance(entries, dict):
+        raise BundleError(f'{BUNDLE_MANIFEST} "files" must map file names to file types')
+    mapping = {}
+    for member, entry in entries.items():
+        if isinstance(entry, str):
+            entry = {"file_type": entry}
+        if isinstance(entry, dict):
+            mapping[PurePosixPath(member).name] = {"file_type": entry.get("file_type"), "remarks": entry.get("remarks", "")}
+    return mapping
+
+
+def _copy_member(zf: zipfile.ZipFile, info: zipfile.ZipInfo, target: Path, budget: int) -> int:
+    """Stream one member to `target` in chunks; stop as soon as it exceeds `budget` bytes."""
+    written = 0
+    with zf.open(info) as src, open(target, "wb") as dst:
+        while True:
+            chunk = src.read(_COPY_CHUNK)
+            if not chunk:
+                break
+            written += len(chunk)
+            if written > budget:
+                raise BundleError(f"{info.filename} expands beyond the {BUNDLE_MAX_BYTES // 1024**2} MB bundle limit")
+            dst.write(chunk)
+    return written
+
+
+def _unpack(path, bundle_name: str, file_types, dest: Path) -> list:
+    """Stream the data members of the archive at `path` into `dest`; see `extract_bundle`."""
+    try:
+        with zipfile.ZipFile(path) as zf:
+            infos = [i for i in zf.infolist() if not i.is_dir()]
+            by_name = {}
+            for i in infos:
+                if i.filename.startswith("__MACOSX/"):
+                    continue
+                base = PurePosixPath(i.filename).name
+                # Folders are flattened, so two data files (or manifests) with one base name would collide
+                if base in by_name and (base == BUNDLE_MANIFEST or Path(base).suffix.lower() in BUNDLE_EXTENSIONS):
+                    raise BundleError(f"{by_name[base].filename} and {i.filename} have the same file name; rename one")
+                by_name[base] = i
+            data_members = {n: i for n, i in by_name.items() if Path(n).suffix.lower() in BUNDLE_EXTENSIONS and not n.startswith(".")}
+            if not data_members:
+                raise BundleError("no CSV, Parquet or Excel files inside")
+            if len(data_members) > BUNDLE_MAX_MEMBERS:
+                raise BundleError(f"{len(data_members)} files inside, over the limit of {BUNDLE_MAX_MEMBERS}")
+            declared = sum(i.file_size for i in data_members.values())
+            if declared > BUNDLE_MAX_BYTES:
+                raise BundleError(f"{declared / 1024**2:,.0f} MB uncompressed, over the {BUNDLE_MAX_BYTES // 1024**2} MB limit")
+            for i in data_members.values():
+                if i.compress_size and i.file_size / i.compress_size > BUNDLE_MAX_RATIO:
+                    raise BundleError(f"{i.filename} has a suspicious compression ratio")
+            manifest = _read_manifest(zf, by_name)
+
+            members = []
+            budget = BUNDLE_MAX_BYTES
+            for member_name, info in data_members.items():
+                target = dest / member_name
+                size = _copy_member(zf, info, target, budget)
+                budget -= size
+                mapped = manifest.get(member_name, {})
+                if mapped.get("file_type") in file_types:
+                    file_type, mapped_by = mapped["file_type"], "manifest"
+                else:
+                    file_type = match_file_type(member_name, file_types)
+                    mapped_by = "filename" if file_type else None
+                members.append(
+                    {
+                        "name": member_name,
+                        "size": size,
+                        "type": "",
+                        "datapath": str(target),
+                        "bundle": bundle_name,
+                        "file_type": file_type,
+                        "mapped_by": mapped_by,
+                        "remarks": mapped.get("remarks", ""),
+                    }
+                )
+    except _ZIP_ERRORS as e:
+        raise BundleError(str(e)) from e
+    return members
+
+
+def extract_bundle(file_info, file_types, dest_dir: str = None) -> dict:
+    """
+    Extract the data files of an uploaded .zip into a temporary directory and map
+    each to a file type, from `manifest.json` when present, else by file name
+    (`match_file_type`). Members are streamed to disk one chunk at a time, so the
+    archive is never held in memory. Folders inside the archive are flattened;
+    names are reduced to their base name, so no member can escape `dest_dir`,
+    and data files sharing a base name across folders are rejected.
+
+    Returns {"name", "ok", "dir", "members", "message", "seconds"}. Each member
+    is a file_info dict ({"name", "size", "type", "datapath"}) plus "bundle",
+    "file_type" (None when unmapped), "mapped_by" ("manifest" / "filename")
+    and "remarks". Never raises.
+    """
+    start = time.perf_counter()
+    name = file_info["name"]
+    dest = Path(dest_dir or tempfile.mkdtemp(prefix="bundle-"))
+    try:
+        members = _unpack(file_info["datapath"], name, file_types, dest)
+    except (BundleError, OSError) as e:
+        shutil.rmtree(dest, ignore_errors=True)
+        return {"name": name, "ok": False, "dir": None, "members": [], "message": f"{name}: Could not be unpacked ❌ ({e})", "seconds": time.perf_counter() - start}
+    mapped = sum(1 for m in members if m["file_type"])
+    return {
+        "name": name,
+        "ok": True,
+        "dir": str(dest),
+        "members": members,
+        "message": f"{name}: Unpacked {len(members)} files, {mapped} matched to a file type ✅",
+        "seconds": time.perf_counter() - start,
+    }
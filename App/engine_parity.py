@@ -0,0 +1,234 @@
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from . import exports
+from .exports import read_manifest
+from .loadtest import generate_upload, generated_rules
+from .polars_engine import UnsupportedRule, pl, validate_file_polars
+from .readers import load_upload
+from .samples import create_sample_file
+from .sql_engine import duckdb, validate_file_sql
+from .validation import export_targets, validate_file, validation_rules
+
+# Cell values written into every column of a valid sample, one case each.
+MUTATIONS = ("abc", "-1", "1.5", "1.234", "", " b ", "ZZZZZZZZZZZZ", "2025-13-01", "jan-25", "1,5", "1e3")
+# Row of the sample that is mutated (rows count from 0 below the header).
+MUTATED_ROW = 1
+
+
+def csv_types() -> list:
+    """File types the Polars and SQL engines can take: single-sheet rules (uploaded as CSV)."""
+    return [ft for ft, rules in validation_rules.items() if "sheets" not in rules]
+
+
+def _write_csv(df: pd.DataFrame, path: Path, rules: dict) -> Path:
+    with open(path, "w", newline="", encoding="utf-8") as fh:
+        # `skiprows` rules expect title lines above the header
+        for _ in range(int(rules.get("skiprows", 0) or 0)):
+            fh.write("," * (len(df.columns) - 1) + "\n")
+        df.to_csv(fh, index=False)
+    return path
+
+
+def parity_cases(file_type: str, dest_dir: Path) -> list:
+    """
+    [(case name, path)] for one file type: its valid sample, every `MUTATIONS`
+    value in every column, a repeated row (also one equal only once normalised),
+    a dropped column and a renamed header.
+    """
+    rules = validation_rules[file_type]
+    template = create_sample_file(file_type).astype(object)
+    cases = [("valid", template)]
+    for j, col in enumerate(template.columns):
+        for value in MUTATIONS:
+            df = template.copy()
+            df.iat[MUTATED_ROW, j] = value
+            cases.append((f"{col}={value!r}", df))
+    cases.append(("repeated row", pd.concat([template, template.iloc[[0]]], ignore_index=True)))
+    normalized = [c for c, cfg in rules.get("string_checks", {}).items() if c in template.columns and (cfg.get("strip") or cfg.get("case"))]
+    if normalized:
+        # Repeats the first row only once `string_checks` normalise it
+        padded = template.iloc[[0]].copy()
+        for col in normalized:
+            padded[col] = f" {str(padded[col].iloc[0]).swapcase()} "
+        cases.append(("repeated row, normalised", pd.concat([template, padded], ignore_index=True)))
+    cases.append((f"no {template.columns[0]}", template.drop(columns=template.columns[0])))
+    cases.append((f"{template.columns[-1]} renamed", template.rename(columns={template.columns[-1]: "2025-01-07"})))
+    return [(name, _write_csv(df, dest_dir / f"{file_type}_{i}.csv", rules)) for i, (name, df) in enumerate(cases)]
+
+
+def _file_info(path: Path) -> dict:
+    return {"name": path.name, "datapath": str(path), "size": path.stat().st_size, "type": "text/csv"}
+
+
+def run_pandas(path: Path, file_type: str, rules: dict = validation_rules) -> tuple:
+    """(result, seconds) of the default engine: full read, then `validate_file`."""
+    rules = rules[file_type]
+    start = time.perf_counter()
+    read = load_upload(_file_info(path), fingerprint=False, rules=rules)
+    if not read["ok"]:
+        return {"valid": False, "message": read["message"]}, time.perf_counter() - start
+    res = validate_file(read["data"], rules, file_type, path.name, file_type=file_type)
+    return res, time.perf_counter() - start
+
+
+def run_polars(path: Path, file_type: str, rules: dict = validation_rules) -> tuple:
+    """(result, seconds) of the Polars engine; the result is None when it defers to pandas."""
+    start = time.perf_counter()
+    try:
+        res, _ = validate_file_polars(_file_info(path), rules[file_type], file_type, path.name, file_type=file_type)
+    except UnsupportedRule as e:
+        return {"valid": None, "message": f"unsupported: {e}"}, time.perf_counter() - start
+    return res, time.perf_counter() - start
+
+
+def run_sql(path: Path, file_type: str, rules: dict = validation_rules) -> tuple:
+    """(result, seconds) of the out-of-core SQL engine; the result is None when it defers to pandas."""
+    start = time.perf_counter()
+    try:
+        res, _ = validate_file_sql(_file_info(path), rules[file_type], file_type, path.name, file_type=file_type)
+    except UnsupportedRule as e:
+        return {"valid": None, "message": f"unsupported: {e}"}, time.perf_counter() - start
+    return res, time.perf_counter() - start
+
+
+def engines() -> dict:
+    """{name: runner} of the engines installed here, pandas first."""
+    available = {"pandas": run_pandas}
+    if pl is not None:
+        available["polars"] = run_polars
+    if duckdb is not None:
+        available["duckdb"] = run_sql
+    return available
+
+
+def _export_hashes(export_dir: Path, file_type: str) -> dict:
+    targets = read_manifest(export_dir).get("targets", {})
+    return {name: targets.get(name, {}).get("content_hash") for name in export_targets(validation_rules[file_type])}
+
+
+def check_parity(file_types: list, work_dir: Path) -> list:
+    """
+    Run every case through each engine, each exporting to its own directory,
+    and compare the result messages and the exported content hashes with the
+    pandas engine's. Cases run once before `patch_mapping` is exported
+    (references missing), then after. Returns [{"file_type", "case", <engine>:
+    {"valid", "message", "export"}, ..., "match"}].
+    """
+    export_dirs = {engine: work_dir / f"export_{engine}" for engine in engines()}
+    for d in export_dirs.values():
+        d.mkdir(parents=True, exist_ok=True)
+    cases_dir = work_dir / "cases"
+    cases_dir.mkdir(exist_ok=True)
+    order = sorted(file_types, key=lambda ft: ft != "patch_mapping")
+    first = [(ft, "valid (no references exported)", parity_cases(ft, cases_dir)[0][1]) for ft in file_types if ft != "patch_mapping"]
+    cases = first + [(ft, name, path) for ft in order for name, path in parity_cases(ft, cases_dir)]
+
+    results = []
+    for file_type, name, path in cases:
+        outcome = {}
+        for engine, run in engines().items():
+            exports.EXPORT_DIR = export_dirs[engine]
+            res, _ = run(path, file_type)
+            outcome[engine] = {"valid": res.get("valid"), "message": res.get("message"), "export": _export_hashes(export_dirs[engine], file_type)}
+        match = all(o["message"] == outcome["pandas"]["message"] and o["export"] == outcome["pandas"]["export"] for o in outcome.values())
+        results.append({"file_type": file_type, "case": name, **outcome, "match": match})
+    return results
+
+
+def benchmark(file_types: list, rows: list, repeat: int, data_dir: Path, work_dir: Path) -> list:
+    """
+    Time each engine on generated uploads (see `loadtest.generate_upload`), best
+    of `repeat` runs each. The uploads are valid, so every engine runs every
+    check and exports. Returns [{"file_type", "rows", "mb", "<engine>_s", ...,
+    "same_message"}]; every engine's speedup is over pandas.
+    """
+    exports.EXPORT_DIR = work_dir / "export_bench"
+    exports.EXPORT_DIR.mkdir(parents=True, exist_ok=True)
+    # References resolve against an exported patch_mapping holding every generated job code
+    rules = generated_rules()
+    run_pandas(generate_upload("patch_mapping", max(rows), data_dir), "patch_mapping", rules)
+    timings = []
+    # patch_mapping last: timing it re-exports it with fewer codes
+    for file_type in sorted(file_types, key=lambda ft: ft == "patch_mapping"):
+        for n in rows:
+            path = generate_upload(file_type, n, data_dir)
+            best = {}
+            messages = {}
+            for engine, run in engines().items():
+                for _ in range(repeat):
+                    # Without a manifest entry every run writes its export in full
+                    (exports.EXPORT_DIR / exports.MANIFEST_NAME).unlink(missing_ok=True)
+                    res, seconds = run(path, file_type, rules)
+                    best[engine] = min(seconds, best.get(engine, seconds))
+                messages[engine] = res.get("message")
+            timings.append(
+                {
+                    "file_type": file_type,
+                    "rows": n,
+                    "mb": round(path.stat().st_size / 1024**2, 1),
+                    **{f"{engine}_s": round(seconds, 3) for engine, seconds in best.items()},
+                    **{f"{engine}_speedup": round(best["pandas"] / best[engine], 2) if best[engine] else None for engine in best if engine != "pandas"},
+                    "same_message": all(m == messages["pandas"] for m in messages.values()),
+                }
+            )
+    return timings
+
+
+def _print_report(report: dict):
+    parity = report["parity"]
+    mismatches = [r for r in parity if not r["match"]]
+    print(f"Parity: {len(parity) - len(mismatches)}/{len(parity)} cases identical")
+    for r in mismatches:
+        print(f"  {r['file_type']} [{r['case']}]")
+        for engine in engines():
+            print(f"    {engine:>6}: {r[engine]['message']}")
+    if report["benchmark"]:
+        others = [e for e in engines() if e != "pandas"]
+        header = ["file_type", "rows", "MB", "pandas s"] + [f"{e} s" for e in others] + [f"{e} speedup" for e in others] + ["same"]
+        print("".join(f"{h:>20}" for h in header))
+        for t in report["benchmark"]:
+            values = [t["file_type"], f"{t['rows']:,}", t["mb"], t["pandas_s"]] + [t[f"{e}_s"] for e in others] + [t[f"{e}_speedup"] for e in others] + [t["same_message"]]
+            print("".join(f"{str(v):>20}" for v in values))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m App.engine_parity",
+        description=(
+            "Check that the Polars and SQL (DuckDB) engines give the same result messages and "
+            "exported content as the pandas engine on valid and corrupted samples of every CSV "
+            "file type, then time every engine on generated uploads."
+        ),
+    )
+    parser.add_argument("--types", type=lambda s: s.split(","), default=csv_types(), help="comma-separated file types (default: all single-sheet types)")
+    parser.add_argument("--rows", type=lambda s: [int(n) for n in s.split(",")], default=[100_000, 1_000_000], help="data rows per benchmark upload (default 100000,1000000)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per engine and upload; the best is kept")
+    parser.add_argument("--no-benchmark", action="store_true", help="only check parity")
+    parser.add_argument("--data-dir", help="where generated uploads are kept (default: a new temp dir)")
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args(argv)
+    if len(engines()) < 2:
+        parser.error("neither polars nor duckdb is installed")
+
+    with tempfile.TemporaryDirectory(prefix="engine-parity-") as tmp:
+        work_dir = Path(tmp)
+        data_dir = Path(args.data_dir) if args.data_dir else work_dir / "uploads"
+        data_dir.mkdir(parents=True, exist_ok=True)
+        report = {"parity": check_parity(args.types, work_dir), "benchmark": []}
+        if not args.no_benchmark:
+            report["benchmark"] = benchmark(args.types, args.rows, args.repeat, data_dir, work_dir)
+    _print_report(report)
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2, default=str))
+    return 0 if all(r["match"] for r in report["parity"]) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
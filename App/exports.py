@@ -1,7 +1,50 @@
 from pathlib import Path
+import hashlib
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
 import pandas as pd
 from typing import Callable
 
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Connections kept open per database file, shared by all sessions.
+SQLITE_POOL_SIZE = 4
+# Rows per worksheet in Excel, header included.
+EXCEL_MAX_ROWS = 1_048_576
+# Threads compressing CSV exports, shared by all sessions.
+COMPRESSION_THREADS = int(os.environ.get("COMPRESSION_THREADS", min(4, os.cpu_count() or 1)))
+CSV_COMPRESSION_SUFFIXES = {"gzip": ".gz", "zstd": ".zst"}
+
+_compression_pool = None
+_compression_pool_lock = threading.Lock()
+
+# Directory every export (and its manifest) is written to.
+EXPORT_DIR = Path(os.environ.get("EXPORT_DIR", Path(__file__).parent / "export"))
+
+# Manifest kept in each export directory: one entry per target with its row
+# count, schema, content hash, source file hash, the batch columns of the
+# latest load (`batch`) and those of the load whose rows are in the file
+# (`written_batch`).
+MANIFEST_NAME = "_manifest.json"
+# Columns holding one value per load: kept out of the content hash and
+# recorded in the manifest's `batch` instead.
+BATCH_COLUMNS = ("key", "Remarks", "Last Update")
+_manifest_lock = threading.Lock()
+_sqlite_pools = {}
+_sqlite_pools_lock = threading.Lock()
+
 
 def export_demand_volume(df: pd.DataFrame, export_file: Path, file_id: str):
     try:
@@ -67,34 +110,484 @@ def export_resource_allocation(df: pd.DataFrame, export_file: Path, file_id: str
         return False
 
 
-def export_validated_file(df, export_path, file_id, export_func: Callable | str = None):
+def resolve_export_file(export_path) -> Path:
+    """Map a rule's `export_path` to the file actually written under `EXPORT_DIR`."""
+    return Path(EXPORT_DIR).resolve() / Path(export_path).name
+
+
+def export_target(export_path, sink: dict = None):
+    """Return (file, manifest entry name) for the output of a rule's export."""
+    sink = sink or {}
+    sink_type = sink.get("type", "csv")
+    if sink_type == "sqlite":
+        db_file = resolve_export_file(sink["db_path"])
+        return db_file, f"{db_file.name}#{sink['table']}"
+    if sink_type == "xlsx":
+        export_file = resolve_export_file(Path(sink.get("path") or sink["table"]).with_suffix(".xlsx"))
+    elif sink.get("compression"):
+        base_file = resolve_export_file(sink["path"])
+        export_file = base_file.with_name(base_file.name + CSV_COMPRESSION_SUFFIXES.get(sink["compression"], ""))
+    else:
+        export_file = resolve_export_file(export_path)
+    return export_file, export_file.name
+
+
+def _schema_digest(df: pd.DataFrame):
+    """A blake2b digest seeded with the frame's column names and dtypes, ignoring the per-load `BATCH_COLUMNS`."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(json.dumps([[str(c), str(df[c].dtype)] for c in df.columns if c not in BATCH_COLUMNS]).encode("utf-8"))
+    return digest
+
+
+def _hash_rows(digest, df: pd.DataFrame):
+    # Row hashes are independent of each other, so a frame hashed chunk by chunk gives the same digest
+    columns = [c for c in df.columns if c not in BATCH_COLUMNS]
+    if columns and len(df):
+        digest.update(pd.util.hash_pandas_object(df[columns], index=False).to_numpy().tobytes())
+
+
+def content_hash(df: pd.DataFrame) -> str:
+    """Hash of a frame's schema and row values, ignoring the per-load `BATCH_COLUMNS`."""
+    digest = _schema_digest(df)
+    _hash_rows(digest, df)
+    return digest.hexdigest()
+
+
+def _batch_values(df: pd.DataFrame) -> dict:
+    """{column: value} of the per-load `BATCH_COLUMNS` present in a frame (constant per load)."""
+    return {c: str(df[c].iloc[0]) for c in BATCH_COLUMNS if c in df.columns and len(df)}
+
+
+def read_manifest(export_dir: Path = None) -> dict:
+    """Load `_manifest.json` from `export_dir` (default `App/export/`); empty if missing."""
+    export_dir = export_dir or resolve_export_file(MANIFEST_NAME).parent
+    try:
+        with open(export_dir / MANIFEST_NAME, encoding="utf-8") as fh:
+            return json.load(fh)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {"targets": {}}
+
+
+def _write_manifest(export_dir: Path, manifest: dict):
+    # Callers hold `_manifest_lock`
+    manifest["updated_at"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    tmp_file = export_dir / f".{MANIFEST_NAME}.tmp"
+    with open(tmp_file, "w", encoding="utf-8") as fh:
+        json.dump(manifest, fh, indent=2)
+    os.replace(tmp_file, export_dir / MANIFEST_NAME)
+
+
+def _update_manifest(export_dir: Path, name: str, **fields):
+    with _manifest_lock:
+        manifest = read_manifest(export_dir)
+        manifest.setdefault("targets", {}).setdefault(name, {}).update(fields)
+        _write_manifest(export_dir, manifest)
+
+
+def _refresh_if_unchanged(export_file: Path, target: str, digest: str, batch: dict, source_hash: str, now: str) -> bool:
+    """
+    When the target still exists and holds rows with content hash `digest`,
+    record this load's batch columns, `source_hash` and `verified_at` in its
+    manifest entry and return True: the rows need no rewrite. The compare and
+    the update happen under one `_manifest_lock`.
+    """
+    export_dir = export_file.parent
+    with _manifest_lock:
+        manifest = read_manifest(export_dir)
+        entry = manifest.setdefault("targets", {}).get(target)
+        if not entry or entry.get("content_hash") != digest or not export_file.exists():
+            return False
+        entry.update(source_hash=source_hash, key=batch.get("key"), batch=batch, verified_at=now)
+        _write_manifest(export_dir, manifest)
+        return True
+
+
+@contextmanager
+def _pooled_connection(db_file: Path):
+    """Borrow a connection to `db_file` from its pool, opening one if none is idle."""
+    with _sqlite_pools_lock:
+        pool = _sqlite_pools.setdefault(str(db_file), queue.LifoQueue(maxsize=SQLITE_POOL_SIZE))
     try:
-        base_dir = Path(__file__).parent.resolve()
-        export_dir = base_dir / "export"
-        export_dir.mkdir(parents=True, exist_ok=True)
-
-        export_file = export_dir / Path(export_path).name
-
-        func = None
-        if export_func:
-            if isinstance(export_func, str):
-                func = globals().get(export_func)
-            elif callable(export_func):
-                func = export_func
-
-        if callable(func):
-            success = func(df, export_file, file_id)
-            if success:
-                return True, f"{file_id}: Successfully validated ✅ and exported ✅"
-            else:
+        conn = pool.get_nowait()
+    except queue.Empty:
+        db_file.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(db_file, check_same_thread=False, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+    try:
+        yield conn
+    finally:
+        try:
+            pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+
+def _quote(name) -> str:
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _sqlite_type(dtype) -> str:
+    if pd.api.types.is_integer_dtype(dtype) or pd.api.types.is_bool_dtype(dtype):
+        return "INTEGER"
+    if pd.api.types.is_float_dtype(dtype):
+        return "REAL"
+    return "TEXT"
+
+
+def export_sqlite(df: pd.DataFrame, sink: dict, file_id: str):
+    """
+    Bulk-load `df` into a table of the local SQLite database described by `sink`:
+    {"db_path", "table", "key_columns", "index_columns", "batch_columns", "batch_size"}.
+    Rows are upserted on `key_columns` (when given) in `batch_size` chunks inside a
+    single transaction, and the batch `key` is recorded in the `_batches` table.
+    `batch_columns` hold one value per load (Remarks, Last Update); they are stored
+    once in `_batches.metadata` instead of on every row, joined back through `key`.
+    """
+    db_file = resolve_export_file(sink["db_path"])
+    table = sink["table"]
+    batch_columns = [c for c in sink.get("batch_columns") or [] if c in df.columns and c != "key"]
+    metadata = {str(c): (str(df[c].iloc[0]) if len(df) else None) for c in batch_columns}
+    df = df.drop(columns=batch_columns)
+    key_columns = [c for c in sink.get("key_columns") or [] if c in df.columns]
+    index_columns = [c for c in sink.get("index_columns") or [] if c in df.columns]
+    batch_size = int(sink.get("batch_size", 10000))
+    columns = [str(c) for c in df.columns]
+    column_list = ", ".join(_quote(c) for c in columns)
+
+    insert_sql = f"INSERT INTO {_quote(table)} ({column_list}) VALUES ({', '.join('?' for _ in columns)})"
+    if key_columns:
+        updates = [c for c in columns if c not in key_columns]
+        conflict = ", ".join(_quote(c) for c in key_columns)
+        if updates:
+            insert_sql += f" ON CONFLICT ({conflict}) DO UPDATE SET " + ", ".join(f"{_quote(c)} = excluded.{_quote(c)}" for c in updates)
+        else:
+            insert_sql += f" ON CONFLICT ({conflict}) DO NOTHING"
+
+    with _pooled_connection(db_file) as conn:
+        with conn:
+            column_defs = ", ".join(f"{_quote(c)} {_sqlite_type(df[c].dtype)}" for c in df.columns)
+            conn.execute(f"CREATE TABLE IF NOT EXISTS {_quote(table)} ({column_defs})")
+            existing = {row[1] for row in conn.execute(f"PRAGMA table_info({_quote(table)})")}
+            for c in df.columns:
+                if str(c) not in existing:
+                    conn.execute(f"ALTER TABLE {_quote(table)} ADD COLUMN {_quote(c)} {_sqlite_type(df[c].dtype)}")
+            if key_columns:
+                conn.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS {_quote(f'ux_{table}_key')} ON {_quote(table)} ({', '.join(_quote(c) for c in key_columns)})")
+            for c in index_columns:
+                conn.execute(f"CREATE INDEX IF NOT EXISTS {_quote(f'ix_{table}_{c}')} ON {_quote(table)} ({_quote(c)})")
+            conn.execute("CREATE TABLE IF NOT EXISTS _batches (key TEXT, target TEXT, file_id TEXT, rows INTEGER, loaded_at TEXT, metadata TEXT)")
+            if "metadata" not in {row[1] for row in conn.execute("PRAGMA table_info(_batches)")}:
+                conn.execute("ALTER TABLE _batches ADD COLUMN metadata TEXT")
+
+            for start in range(0, len(df), batch_size):
+                chunk = df.iloc[start : start + batch_size].astype(object)
+                chunk = chunk.where(chunk.notna(), None)
+                conn.executemany(insert_sql, chunk.itertuples(index=False, name=None))
+
+            batch_key = str(df["key"].iloc[0]) if "key" in df.columns and len(df) else None
+            conn.execute(
+                "INSERT INTO _batches (key, target, file_id, rows, loaded_at, metadata) VALUES (?, ?, ?, ?, ?, ?)",
+                (batch_key, table, file_id, len(df), datetime.now().strftime("%Y-%m-%d %H:%M:%S"), json.dumps(metadata)),
+            )
+    return True
+
+
+def export_xlsx(df: pd.DataFrame, sink: dict, file_id: str):
+    """
+    Stream `df` into an .xlsx workbook described by `sink`:
+    {"path", "table", "sheet_name", "max_rows", "batch_size"}.
+    The workbook is built in openpyxl write-only mode from `batch_size`-row chunks,
+    so memory stays bounded whatever the output size. When a sheet reaches
+    `max_rows` (Excel's limit by default) the rows continue on `<sheet_name>_2`,
+    `<sheet_name>_3`, ..., each with the header repeated. The file is written next
+    to the target and moved into place once complete.
+    """
+    from openpyxl import Workbook
+
+    export_file, _ = export_target(None, {**sink, "type": "xlsx"})
+    export_file.parent.mkdir(parents=True, exist_ok=True)
+    sheet_name = str(sink.get("sheet_name") or sink["table"])[:28]
+    rows_per_sheet = min(int(sink.get("max_rows", EXCEL_MAX_ROWS)), EXCEL_MAX_ROWS) - 1
+    batch_size = int(sink.get("batch_size", 10000))
+    header = [str(c) for c in df.columns]
+
+    wb = Workbook(write_only=True)
+    ws = None
+    sheets = 0
+    rows_in_sheet = rows_per_sheet
+    for start in range(0, max(len(df), 1), batch_size):
+        chunk = df.iloc[start : start + batch_size].astype(object)
+        chunk = chunk.where(chunk.notna(), None)
+        for row in chunk.itertuples(index=False, name=None):
+            if rows_in_sheet >= rows_per_sheet:
+                sheets += 1
+                ws = wb.create_sheet(sheet_name if sheets == 1 else f"{sheet_name}_{sheets}")
+                ws.append(header)
+                rows_in_sheet = 0
+            ws.append(row)
+            rows_in_sheet += 1
+    if ws is None:
+        wb.create_sheet(sheet_name).append(header)
+
+    tmp_file = export_file.with_name(f".{export_file.name}.tmp")
+    try:
+        wb.save(tmp_file)
+        os.replace(tmp_file, export_file)
+    finally:
+        if tmp_file.exists():
+            tmp_file.unlink()
+    return True
+
+
+def _get_compression_pool() -> ThreadPoolExecutor:
+    global _compression_pool
+    with _compression_pool_lock:
+        if _compression_pool is None:
+            _compression_pool = ThreadPoolExecutor(max_workers=COMPRESSION_THREADS, thread_name_prefix="export-compress")
+        return _compression_pool
+
+
+def _gzip_member(data: bytes, level: int) -> bytes:
+    # zlib releases the GIL, so members compress in parallel; concatenated
+    # members form a valid multi-member gzip file
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    return compressor.compress(data) + compressor.flush()
+
+
+def _csv_chunks(df: pd.DataFrame, chunk_rows: int):
+    for start in range(0, max(len(df), 1), chunk_rows):
+        yield df.iloc[start : start + chunk_rows].to_csv(index=False, header=start == 0).encode("utf-8")
+
+
+def _csv_codec(sink: dict):
+    """(codec, level) of a compressed CSV sink; raises ValueError for an unknown or unavailable codec."""
+    codec = sink.get("compression", "gzip")
+    if codec not in CSV_COMPRESSION_SUFFIXES:
+        raise ValueError(f"Unknown CSV compression '{codec}'")
+    if codec == "zstd" and zstandard is None:
+        raise ValueError("zstd compression needs the 'zstandard' package")
+    return codec, int(sink.get("level", 6 if codec == "gzip" else 3))
+
+
+def _write_csv_chunks(fh, chunks, codec: str = None, level: int = None) -> int:
+    """
+    Write encoded CSV `chunks` to `fh`, plain or compressed with `codec`. gzip
+    members are compressed on the shared compression threads while the next
+    chunk is formatted. Returns the uncompressed bytes written.
+    """
+    raw_bytes = 0
+    if codec is None:
+        for data in chunks:
+            raw_bytes += len(data)
+            fh.write(data)
+    elif codec == "gzip":
+        pool = _get_compression_pool()
+        pending = deque()
+        for data in chunks:
+            raw_bytes += len(data)
+            pending.append(pool.submit(_gzip_member, data, level))
+            while len(pending) > COMPRESSION_THREADS * 2:
+                fh.write(pending.popleft().result())
+        while pending:
+            fh.write(pending.popleft().result())
+    else:
+        compressor = zstandard.ZstdCompressor(level=level, threads=COMPRESSION_THREADS)
+        with compressor.stream_writer(fh, closefd=False) as writer:
+            for data in chunks:
+                raw_bytes += len(data)
+                writer.write(data)
+    return raw_bytes
+
+
+def _csv_stats(export_file: Path, codec: str, level: int, rows: int, raw_bytes: int, seconds: float) -> dict:
+    compressed_bytes = export_file.stat().st_size
+    return {
+        "file": export_file.name,
+        "codec": codec,
+        "level": level,
+        "rows": rows,
+        "raw_bytes": raw_bytes,
+        "compressed_bytes": compressed_bytes,
+        "ratio": round(raw_bytes / compressed_bytes, 2) if compressed_bytes else None,
+        "seconds": round(seconds, 3),
+        "mb_per_s": round(raw_bytes / 1024**2 / seconds, 1) if seconds else None,
+    }
+
+
+def export_csv(df: pd.DataFrame, sink: dict, file_id: str):
+    """
+    Write `df` as a compressed CSV described by `sink`:
+    {"path", "compression", "level", "chunk_rows"}.
+    `compression` is "gzip" or "zstd" (needs the `zstandard` package); the codec
+    suffix is appended to `path`. The frame is formatted in `chunk_rows` chunks
+    and compressed on the shared compression threads while the next chunk is
+    formatted. Returns stats: codec, raw/compressed bytes, ratio, MB/s.
+    """
+    codec, level = _csv_codec(sink)
+    chunk_rows = int(sink.get("chunk_rows", 100000))
+    export_file, _ = export_target(None, {**sink, "compression": codec})
+    export_file.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = export_file.with_name(f".{export_file.name}.tmp")
+
+    start = time.perf_counter()
+    try:
+        with open(tmp_file, "wb") as fh:
+            raw_bytes = _write_csv_chunks(fh, _csv_chunks(df, chunk_rows), codec, level)
+        os.replace(tmp_file, export_file)
+    finally:
+        if tmp_file.exists():
+            tmp_file.unlink()
+    return _csv_stats(export_file, codec, level, len(df), raw_bytes, time.perf_counter() - start)
+
+
+# Export sinks selectable per rule through `export_sink: {"type": ...}`; plain
+# "csv" (the default, without `compression`) goes through the rule's `export_func`.
+EXPORT_SINKS = {"csv": export_csv, "sqlite": export_sqlite, "xlsx": export_xlsx}
+
+
+def resolve_export_func(export_func: Callable | str = None):
+    """Return the callable named (or given) by a rule's `export_func`, or None."""
+    if isinstance(export_func, str):
+        func = globals().get(export_func)
+    else:
+        func = export_func
+    return func if callable(func) else None
+
+
+def export_validated_file(df, export_path, file_id, export_func: Callable | str = None, sink: dict = None, stats: dict = None, source_hash: str = None):
+    """
+    Export a validated frame through its sink (when given) or `export_func`.
+    Returns (success, message); sinks that report stats (compressed CSV) fill `stats`.
+    The target's entry in the export directory's manifest is refreshed on every
+    export; when its content hash is unchanged and the target still exists, the
+    data write is skipped and only the batch columns (`key`, `batch`),
+    `source_hash` and `verified_at` are updated in the manifest.
+    """
+    try:
+        if sink:
+            sink_type = sink.get("type", "csv")
+            sink_func = EXPORT_SINKS.get(sink_type)
+            if sink_func is None:
+                return False, f"{file_id}: Successfully validated ✅ but export sink '{sink_type}' is unknown ❌"
+        else:
+            func = resolve_export_func(export_func)
+            if not callable(func):
                 return (
                     False,
-                    f"{file_id}: Successfully validated ✅ but export function failed ❌",
+                    f"{file_id}: Successfully validated ✅ but failed to export ❌",
                 )
+
+        export_file, target = export_target(export_path, sink)
+        export_file.parent.mkdir(parents=True, exist_ok=True)
+        digest = content_hash(df)
+        batch = _batch_values(df)
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        if _refresh_if_unchanged(export_file, target, digest, batch, source_hash, now):
+            return True, f"{file_id}: Successfully validated ✅ and export is up to date ✅ (unchanged, not rewritten)"
+
+        if sink:
+            outcome = sink_func(df, sink, file_id)
+            if isinstance(outcome, dict) and stats is not None:
+                stats.update(outcome)
         else:
+            outcome = func(df, export_file, file_id)
+        if not outcome:
             return (
                 False,
-                f"{file_id}: Successfully validated ✅ but failed to export ❌",
+                f"{file_id}: Successfully validated ✅ but export function failed ❌",
             )
+
+        _update_manifest(
+            export_file.parent,
+            target,
+            rows=len(df),
+            schema={str(c): str(df[c].dtype) for c in df.columns},
+            content_hash=digest,
+            source_hash=source_hash,
+            key=batch.get("key"),
+            batch=batch,
+            written_batch=batch,
+            written_at=now,
+            verified_at=now,
+        )
+        return True, f"{file_id}: Successfully validated ✅ and exported ✅"
+    except Exception as e:
+        return False, f"{file_id}: Validation passed ✅ but export failed ❌ ({str(e)})"
+
+
+def export_validated_stream(frames, export_path, file_id, export_func: Callable | str = None, sink: dict = None, stats: dict = None, source_hash: str = None):
+    """
+    `export_validated_file` for a validated table that arrives as an iterable of
+    frames (same columns and dtypes each), so it never has to fit in memory:
+    each frame is hashed and appended to the CSV target as it comes. Only CSV
+    targets stream — the plain `export_path` (written as the `export_func`
+    writers do, `to_csv` without index) or a compressed CSV sink. When the
+    content hash turns out unchanged, the new file is discarded, the target
+    left as it was and only its manifest entry refreshed. Returns (success, message), like `export_validated_file`.
+    """
+    try:
+        sink = sink or {}
+        sink_type = sink.get("type", "csv")
+        if sink_type not in EXPORT_SINKS:
+            return False, f"{file_id}: Successfully validated ✅ but export sink '{sink_type}' is unknown ❌"
+        if sink_type != "csv":
+            return False, f"{file_id}: Successfully validated ✅ but the '{sink_type}' sink cannot be written out of memory ❌"
+        if sink:
+            codec, level = _csv_codec(sink)
+        elif resolve_export_func(export_func) is None:
+            return False, f"{file_id}: Successfully validated ✅ but failed to export ❌"
+        else:
+            codec, level = None, None
+
+        export_file, target = export_target(export_path, sink or None)
+        export_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = export_file.with_name(f".{export_file.name}.tmp")
+        seen = {"rows": 0, "digest": None, "schema": None, "batch": None, "header": True}
+
+        def encoded():
+            for df in frames:
+                if seen["digest"] is None:
+                    seen["digest"] = _schema_digest(df)
+                    seen["schema"] = {str(c): str(df[c].dtype) for c in df.columns}
+                if seen["batch"] is None and len(df):
+                    seen["batch"] = _batch_values(df)
+                _hash_rows(seen["digest"], df)
+                yield df.to_csv(index=False, header=seen["header"]).encode("utf-8")
+                seen["header"] = False
+                seen["rows"] += len(df)
+
+        start = time.perf_counter()
+        try:
+            with open(tmp_file, "wb") as fh:
+                raw_bytes = _write_csv_chunks(fh, encoded(), codec, level)
+            if seen["digest"] is None:
+                return False, f"{file_id}: Successfully validated ✅ but export function failed ❌"
+            digest = seen["digest"].hexdigest()
+            batch = seen["batch"] or {}
+            now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            if _refresh_if_unchanged(export_file, target, digest, batch, source_hash, now):
+                return True, f"{file_id}: Successfully validated ✅ and export is up to date ✅ (unchanged, not rewritten)"
+            os.replace(tmp_file, export_file)
+        finally:
+            if tmp_file.exists():
+                tmp_file.unlink()
+
+        if codec and stats is not None:
+            stats.update(_csv_stats(export_file, codec, level, seen["rows"], raw_bytes, time.perf_counter() - start))
+        _update_manifest(
+            export_file.parent,
+            target,
+            rows=seen["rows"],
+            schema=seen["schema"],
+            content_hash=digest,
+            source_hash=source_hash,
+            key=batch.get("key"),
+            batch=batch,
+            written_batch=batch,
+            written_at=now,
+            verified_at=now,
+        )
+        return True, f"{file_id}: Successfully validated ✅ and exported ✅"
     except Exception as e:
         return False, f"{file_id}: Validation passed ✅ but export failed ❌ ({str(e)})"
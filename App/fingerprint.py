@@ -0,0 +1,142 @@
+import re
+from datetime import datetime
+
+import pandas as pd
+
+# Smallest confidence at which a detected type pre-fills the assignment select.
+DETECTION_THRESHOLD = 0.6
+
+_FORMAT_PATTERNS = {"yyyy": r"\d{4}", "mmm": r"[A-Za-z]{3}", "mm": r"\d{1,2}", "yy": r"\d{2}", "dd": r"\d{1,2}"}
+
+
+def normalize_header(label) -> str:
+    """Header label as compared by the index: dates as ISO strings, text lower-cased and trimmed."""
+    if isinstance(label, datetime):
+        return label.strftime("%Y-%m-%d")
+    return re.sub(r"\s+", " ", str(label)).strip().lower()
+
+
+def _format_regex(fmt: str):
+    """Regex matching header labels written in a user date format such as `yyyy-mm-dd`."""
+    pattern = re.escape(fmt)
+    for token, regex in _FORMAT_PATTERNS.items():
+        pattern = pattern.replace(token, regex)
+    return re.compile(rf"^{pattern}$")
+
+
+def _signature(rules: dict) -> dict:
+    """Header signature of one sheet's rule: required/known columns, wide-date pattern, skiprows."""
+    required = {normalize_header(c) for c in rules.get("columns", [])}
+    known = required | {normalize_header(c) for c in [*rules.get("types", {}), *rules.get("date_columns", {})]}
+    transform = rules.get("transform_config", {})
+    wide = None
+    if transform.get("type") == "columns":
+        fmt = transform.get("column_format")
+        wide = _format_regex(fmt) if fmt else re.compile(r"^\d{4}-\d{2}-\d{2}$")
+    return {
+        "required": required,
+        "known": known,
+        "wide": wide,
+        # multi_ids: any further columns are value dimensions (e.g. cities)
+        "open": transform.get("type") == "multi_ids",
+        "skiprows": int(rules.get("skiprows", 0) or 0),
+    }
+
+
+class HeaderIndex:
+    """
+    Index of the header signatures in a `validation_rules` mapping, used to guess
+    the file type of an upload from its header sample alone.
+
+    Required column names and sheet names are held in an inverted index
+    (token -> file types), so classifying a header touches only the types that
+    share at least one token with it: O(header) for the lookups, plus one score
+    per candidate type. Headers are read at each distinct `skiprows` offset.
+    """
+
+    def __init__(self, rules_map: dict):
+        self.types = {}
+        self.tokens = {}
+        for file_type, rules in rules_map.items():
+            if "sheets" in rules:
+                sheets = {normalize_header(name): _signature(r) for name, r in rules["sheets"].items()}
+            else:
+                sheets = {None: _signature(rules)}
+            self.types[file_type] = sheets
+            for sheet_name, sig in sheets.items():
+                if sheet_name is not None:
+                    self.tokens.setdefault(("sheet", sheet_name), set()).add(file_type)
+                for col in sig["required"]:
+                    self.tokens.setdefault(("col", sig["skiprows"], col), set()).add(file_type)
+        self.offsets = sorted({sig["skiprows"] for sheets in self.types.values() for sig in sheets.values()})
+
+    @staticmethod
+    def _headers_at(frame: pd.DataFrame, skiprows: int) -> list:
+        if skiprows <= 0:
+            return [normalize_header(c) for c in frame.columns]
+        if len(frame) < skiprows:
+            return []
+        return [normalize_header(c) for c in frame.iloc[skiprows - 1]]
+
+    @staticmethod
+    def _score(headers: list, sig: dict) -> float:
+        # recall of the required columns, weighted by how much of the header the rule explains
+        if not headers or not sig["required"]:
+            return 0.0
+        present = set(headers)
+        recall = len(sig["required"] & present) / len(sig["required"])
+        extra = [h for h in headers if h not in sig["known"]]
+        if sig["open"]:
+            explained = 1.0
+        elif sig["wide"] is not None:
+            dates = sum(1 for h in extra if sig["wide"].match(h))
+            explained = 1.0 - (len(extra) - dates) / len(headers)
+            if not dates:
+                explained *= 0.5
+        else:
+            explained = 1.0 - len(extra) / len(headers)
+        return recall * (0.5 + 0.5 * explained)
+
+    def classify(self, sample) -> list:
+        """Return [(file_type, confidence)] for a header sample, best first; confidence is 0..1."""
+        frames = sample if isinstance(sample, dict) else {None: sample}
+        headers = {
+            (normalize_header(name) if name is not None else None, offset): self._headers_at(frame, offset)
+            for name, frame in frames.items()
+            for offset in self.offsets
+        }
+        candidates = set()
+        for (sheet_name, offset), cols in headers.items():
+            if sheet_name is not None:
+                candidates |= self.tokens.get(("sheet", sheet_name), set())
+            for col in cols:
+                candidates |= self.tokens.get(("col", offset, col), set())
+
+        scores = []
+        for file_type in candidates:
+            sheets = self.types[file_type]
+            if None in sheets:
+                sig = sheets[None]
+                # A single-sheet rule scores on the best-matching uploaded sheet
+                best = max(self._score(headers[(name, sig["skiprows"])], sig) for name in {n for n, _ in headers})
+                if len(frames) > 1:
+                    best *= 0.9
+            else:
+                uploaded = {n for n, _ in headers}
+                best = sum(
+                    self._score(headers[(name, sig["skiprows"])], sig) if name in uploaded else 0.0
+                    for name, sig in sheets.items()
+                ) / len(sheets)
+            scores.append((file_type, round(best, 2)))
+        return sorted((s for s in scores if s[1] > 0), key=lambda s: (-s[1], s[0]))
+
+    def detect(self, sample):
+        """Return (file_type, confidence) of the best match at or above DETECTION_THRESHOLD, else (None, best confidence)."""
+        ranked = self.classify(sample)
+        if not ranked:
+            return None, 0.0
+        file_type, confidence = ranked[0]
+        if len(ranked) > 1 and ranked[1][1] == confidence:
+            # A tie is no detection
+            return None, confidence
+        return (file_type, confidence) if confidence >= DETECTION_THRESHOLD else (None, confidence)
@@ -1,3 +1,4 @@
+import hashlib
 from shiny import ui
 from datetime import datetime
 
@@ -76,3 +77,12 @@ def close_modal(delay_seconds: int = 2):
 
     time.sleep(delay_seconds)
     ui.modal_remove()
+
+
+def file_fingerprint(path, chunk_size: int = 1024 * 1024) -> str:
+    """Return a content hash of the file at `path`, read in fixed-size chunks."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
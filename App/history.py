@@ -0,0 +1,158 @@
+import os
+import queue
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+
+# Append-only record of every validation run, shared by all sessions.
+HISTORY_DB = Path(os.environ.get("HISTORY_DB", Path(__file__).parent / "history" / "validation_history.db"))
+# Runs written per transaction, and the longest a recorded run waits to be written.
+HISTORY_BATCH_SIZE = 200
+HISTORY_FLUSH_SECONDS = 1.0
+# Runs buffered in memory; beyond this new runs are dropped (and counted) rather than block.
+HISTORY_QUEUE_SIZE = 10000
+
+HISTORY_COLUMNS = (
+    "recorded_at",
+    "user",
+    "file_type",
+    "filename",
+    "valid",
+    "message",
+    "warning",
+    "rows",
+    "violations",
+    "batch_key",
+    "export_target",
+    "source_hash",
+    "queued_s",
+    "read_s",
+    "validate_s",
+    "total_s",
+    "peak_mb",
+)
+
+_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS runs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        recorded_at TEXT NOT NULL, user TEXT, file_type TEXT, filename TEXT,
+        valid INTEGER, message TEXT, warning TEXT, rows INTEGER, violations INTEGER,
+        batch_key TEXT, export_target TEXT, source_hash TEXT,
+        queued_s REAL, read_s REAL, validate_s REAL, total_s REAL, peak_mb REAL
+    )""",
+    "CREATE INDEX IF NOT EXISTS ix_runs_file_type ON runs (file_type, id)",
+    "CREATE INDEX IF NOT EXISTS ix_runs_user ON runs (user, id)",
+    "CREATE TRIGGER IF NOT EXISTS runs_no_update BEFORE UPDATE ON runs BEGIN SELECT RAISE(ABORT, 'validation history is append-only'); END",
+    "CREATE TRIGGER IF NOT EXISTS runs_no_delete BEFORE DELETE ON runs BEGIN SELECT RAISE(ABORT, 'validation history is append-only'); END",
+]
+
+
+class HistoryWriter:
+    """
+    Non-blocking recorder for validation runs.
+
+    `record` only puts the run on an in-memory queue; a background thread writes
+    queued runs to the SQLite database (WAL mode) in batches of up to
+    `batch_size`, at least every `flush_seconds`. `page` opens a new read-only
+    connection on each call; WAL lets it read while a batch is being written.
+    """
+
+    def __init__(self, db_path: Path, batch_size: int, flush_seconds: float, max_queue: int):
+        self.db_path = Path(db_path)
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._thread_lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        with conn:
+            for statement in _SCHEMA:
+                conn.execute(statement)
+        return conn
+
+    def _ensure_thread(self):
+        with self._thread_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="history-writer", daemon=True)
+                self._thread.start()
+
+    def record(self, **run):
+        """Queue one run (keys from `HISTORY_COLUMNS`); never blocks the caller."""
+        run.setdefault("recorded_at", datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+        row = tuple(run.get(c) for c in HISTORY_COLUMNS)
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            self.dropped += 1
+
+    def pending(self) -> int:
+        """Runs recorded but not yet written."""
+        return self._queue.unfinished_tasks
+
+    def flush(self, timeout: float = None):
+        """Block until every queued run is written (used at shutdown and by tools)."""
+        if self._thread is not None:
+            with self._queue.all_tasks_done:
+                self._queue.all_tasks_done.wait_for(lambda: self._queue.unfinished_tasks == 0, timeout)
+
+    def _run(self):
+        conn = self._connect()
+        insert_sql = f"INSERT INTO runs ({', '.join(HISTORY_COLUMNS)}) VALUES ({', '.join('?' for _ in HISTORY_COLUMNS)})"
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get(timeout=self.flush_seconds))
+                except queue.Empty:
+                    break
+            try:
+                with conn:
+                    conn.executemany(insert_sql, batch)
+            except sqlite3.Error:
+                # Keep the writer alive; a failed batch is lost rather than retried forever
+                pass
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def page(self, page: int = 0, page_size: int = 20, file_type: str = None, user: str = None):
+        """
+        Return (runs as dicts, newest first, for `page`; total matching runs),
+        read through a read-only connection opened for this call.
+        """
+        if not self.db_path.exists():
+            return [], 0
+        where, params = [], []
+        if file_type:
+            where.append("file_type = ?")
+            params.append(file_type)
+        if user:
+            where.append("user = ?")
+            params.append(user)
+        clause = f"WHERE {' AND '.join(where)}" if where else ""
+        conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True, timeout=30)
+        try:
+            conn.row_factory = sqlite3.Row
+            try:
+                total = conn.execute(f"SELECT COUNT(*) FROM runs {clause}", params).fetchone()[0]
+            except sqlite3.OperationalError:
+                # Database created but the writer has not made the table yet
+                return [], 0
+            rows = conn.execute(
+                f"SELECT id, {', '.join(HISTORY_COLUMNS)} FROM runs {clause} ORDER BY id DESC LIMIT ? OFFSET ?",
+                [*params, page_size, page * page_size],
+            ).fetchall()
+            return [dict(r) for r in rows], total
+        finally:
+            conn.close()
+
+
+history = HistoryWriter(HISTORY_DB, HISTORY_BATCH_SIZE, HISTORY_FLUSH_SECONDS, HISTORY_QUEUE_SIZE)
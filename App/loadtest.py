@@ -0,0 +1,513 @@
+import argparse
+import asyncio
+import copy
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+import urllib.request
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .samples import create_sample_file
+from .validation import validation_rules
+
+# Outputs each simulated browser asks the server to render.
+OBSERVED_OUTPUTS = ("file_assignment_ui", "validation_results")
+# Interval of the event-loop lag probe (in-process) or ping (remote).
+LAG_PROBE_SECONDS = 0.05
+# Longest a session waits for its header reads, then for its results.
+SESSION_TIMEOUT_SECONDS = float(os.environ.get("LOADTEST_TIMEOUT", 600))
+PERCENTILES = (50, 90, 95, 99)
+
+
+# ============================================================================ #
+# Generated uploads
+# ============================================================================ #
+
+
+def job_codes(n: int) -> np.ndarray:
+    """The first `n` job codes of generated uploads ("J0000000", "J0000001", ...)."""
+    return np.char.add("J", np.char.zfill(np.arange(n).astype(str), 7))
+
+
+def _generate_rows(df: pd.DataFrame, rules: dict, rows: int) -> pd.DataFrame:
+    """
+    Repeat the template `df` to `rows` rows, giving each row a key of its own:
+    the string key columns (job codes) move to the next code each time the
+    template repeats, while its other key columns (weeks) cycle with it.
+    """
+    out = df.iloc[np.arange(rows) % len(df)].reset_index(drop=True)
+    keys = [c for c in rules.get("unique_keys", []) if c in df.columns]
+    codes = [c for c in keys if rules.get("types", {}).get(c) == "string"]
+    cycle = len(df) if len(keys) > len(codes) else 1
+    for col in codes:
+        out[col] = job_codes(-(-rows // cycle))[np.arange(rows) // cycle]
+    return out
+
+
+def generate_upload(file_type: str, rows: int, dest_dir) -> Path:
+    """
+    Write a valid upload of `rows` data rows for `file_type` from its sample
+    template (see `create_sample_file`), with a unique key on every row. Job
+    codes come from `job_codes`, so they resolve against a generated
+    `patch_mapping` of at least as many rows (see `generated_rules`).
+    Files are reused across sessions and runs.
+    """
+    rules = validation_rules[file_type]
+    template = create_sample_file(file_type)
+    ext = ".xlsx" if "sheets" in rules else ".csv"
+    path = Path(dest_dir) / f"{file_type}_{rows}{ext}"
+    if path.exists():
+        return path
+    tmp = path.with_name(f".{path.name}.tmp{ext}")
+    if isinstance(template, dict):
+        with pd.ExcelWriter(tmp) as writer:
+            for sheet_name, df in template.items():
+                _generate_rows(df, rules["sheets"][sheet_name], rows).to_excel(writer, sheet_name=sheet_name, index=False)
+    else:
+        with open(tmp, "w", newline="", encoding="utf-8") as fh:
+            # `skiprows` rules expect title lines above the header
+            for _ in range(int(rules.get("skiprows", 0) or 0)):
+                fh.write("," * (len(template.columns) - 1) + "\n")
+            _generate_rows(template, rules, rows).to_csv(fh, index=False)
+    os.replace(tmp, path)
+    return path
+
+
+def generated_rules() -> dict:
+    """
+    A copy of the validation rules without the fixed `patch_mapping.wmis` code
+    list, so a generated patch_mapping (new job codes, still upper-case
+    alphanumerics) validates and exports, and the other types' references
+    resolve against it. The shared rules are left untouched.
+    """
+    rules = copy.deepcopy(validation_rules)
+    rules["patch_mapping"]["value_checks"].pop("wmis", None)
+    return rules
+
+
+@contextmanager
+def generated_codes_allowed():
+    """
+    Run the in-process app with `generated_rules` for patch_mapping: the app
+    looks its rules up per file, so the entry is swapped for the duration of
+    the run and restored afterwards.
+    """
+    original = validation_rules["patch_mapping"]
+    validation_rules["patch_mapping"] = generated_rules()["patch_mapping"]
+    try:
+        yield
+    finally:
+        validation_rules["patch_mapping"] = original
+
+
+def parse_mix(text: str) -> dict:
+    """`fte_wide=3,resource_allocation=1` -> {"fte_wide": 3.0, ...}; bare names weigh 1."""
+    mix = {}
+    for part in filter(None, (p.strip() for p in text.split(","))):
+        name, _, weight = part.partition("=")
+        if name not in validation_rules:
+            raise argparse.ArgumentTypeError(f"unknown file type '{name}', expected one of {list(validation_rules)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def plan_sessions(sessions: int, files_per_session: int, mix: dict, sizes: list, seed: int) -> list:
+    """
+    [(file_type, rows)] per session; file types are distinct within a session, as
+    in the app. Every session starts with a `patch_mapping` of the largest size,
+    which the app validates and exports before the types that reference it.
+    """
+    rng = random.Random(seed)
+    plans = []
+    for _ in range(sessions):
+        types = [t for t in mix if t != "patch_mapping"]
+        weights = [mix[t] for t in types]
+        chosen = []
+        while types and len(chosen) < files_per_session:
+            pick = rng.choices(range(len(types)), weights=weights)[0]
+            chosen.append((types.pop(pick), rng.choice(sizes)))
+            weights.pop(pick)
+        plans.append([("patch_mapping", max(sizes)), *chosen])
+    return plans
+
+
+# ============================================================================ #
+# Simulated browsers
+# ============================================================================ #
+
+
+def _text(html) -> str:
+    return re.sub(r"<[^>]+>", " ", html or "")
+
+
+def _input_id(prefix: str, file_name: str) -> str:
+    # Same ids as the assignment UI builds
+    return f"{prefix}_{re.sub(r'[^A-Za-z0-9_]', '_', file_name)}"
+
+
+class _Client:
+    """
+    One simulated browser: sends input updates and method calls, and keeps the
+    latest rendered value of every observed output.
+    """
+
+    def __init__(self):
+        self.values = {}
+        self.changed = asyncio.Event()
+        self._responses = {}
+        self._tags = 0
+
+    def _receive(self, message: dict):
+        if message.get("values"):
+            self.values.update(message["values"])
+            self.changed.set()
+        if "response" in message:
+            future = self._responses.pop(message["response"].get("tag"), None)
+            if future is not None and not future.done():
+                future.set_result(message["response"])
+
+    async def _send(self, message: dict):
+        raise NotImplementedError
+
+    async def init(self):
+        data = {f".clientdata_output_{o}_hidden": False for o in OBSERVED_OUTPUTS}
+        data.update(history_file_type="", history_mine=False, history_prev=0, history_next=0)
+        await self._send({"method": "init", "data": data})
+
+    async def update(self, **data):
+        await self._send({"method": "update", "data": data})
+
+    async def call(self, method: str, *args) -> dict:
+        self._tags += 1
+        future = asyncio.get_running_loop().create_future()
+        self._responses[self._tags] = future
+        await self._send({"method": method, "args": list(args), "tag": self._tags})
+        return await future
+
+    async def ping(self) -> float:
+        """Round trip through the server's event loop (an unknown method is answered at once)."""
+        start = time.perf_counter()
+        await self.call("loadtestPing")
+        return time.perf_counter() - start
+
+    async def wait_for(self, output: str, predicate, timeout: float):
+        deadline = time.perf_counter() + timeout
+        while True:
+            html = (self.values.get(output) or {}).get("html")
+            if html and predicate(html):
+                return html
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                raise TimeoutError(f"timed out waiting for {output}")
+            self.changed.clear()
+            try:
+                await asyncio.wait_for(self.changed.wait(), remaining)
+            except asyncio.TimeoutError:
+                pass
+
+    async def upload(self, paths: list):
+        raise NotImplementedError
+
+    async def close(self):
+        raise NotImplementedError
+
+
+class InProcessClient(_Client):
+    """Session of an app object in this process, driven through a mock connection."""
+
+    def __init__(self, app):
+        from shiny._connection import MockConnection
+
+        super().__init__()
+        client = self
+
+        class Connection(MockConnection):
+            async def send(self, message: str):
+                client._receive(json.loads(message))
+
+        self.conn = Connection()
+        self.session = app._create_session(self.conn)
+        self._task = asyncio.create_task(self.session._run())
+
+    async def _send(self, message: dict):
+        self.conn.cause_receive(json.dumps(message))
+
+    async def upload(self, paths: list):
+        infos = [{"name": p.name, "size": p.stat().st_size, "type": "", "datapath": str(p)} for p in paths]
+        await self.update(uploaded_files=infos)
+
+    async def close(self):
+        self.conn.cause_disconnect()
+        await asyncio.sleep(0)
+
+
+class RemoteClient(_Client):
+    """Session of a running server, over its websocket and upload endpoints."""
+
+    def __init__(self, url: str):
+        super().__init__()
+        self.url = url.rstrip("/")
+        self.ws = None
+        self._reader = None
+
+    async def connect(self):
+        import websockets
+
+        ws_url = re.sub(r"^http", "ws", self.url) + "/websocket/"
+        self.ws = await websockets.connect(ws_url, max_size=None)
+        self._reader = asyncio.create_task(self._read())
+
+    async def _read(self):
+        async for raw in self.ws:
+            self._receive(json.loads(raw))
+
+    async def _send(self, message: dict):
+        await self.ws.send(json.dumps(message))
+
+    def _post(self, upload_url: str, path: Path):
+        with open(path, "rb") as fh:
+            request = urllib.request.Request(f"{self.url}/{upload_url}", data=fh, method="POST")
+            request.add_header("Content-Length", str(path.stat().st_size))
+            request.add_header("Content-Type", "application/octet-stream")
+            with urllib.request.urlopen(request) as response:
+                response.read()
+
+    async def upload(self, paths: list):
+        infos = [{"name": p.name, "size": p.stat().st_size, "type": ""} for p in paths]
+        job = (await self.call("uploadInit", infos))["value"]
+        for path in paths:
+            await asyncio.to_thread(self._post, job["uploadUrl"], path)
+        await self.call("uploadEnd", job["jobId"], "uploaded_files")
+
+    async def close(self):
+        await self.ws.close()
+        if self._reader is not None:
+            self._reader.cancel()
+
+
+# ============================================================================ #
+# Measurements
+# ============================================================================ #
+
+
+def process_memory_mb(pid="self") -> dict:
+    """{"rss_mb", "peak_rss_mb"} of a process from /proc (Linux); empty elsewhere."""
+    try:
+        status = Path(f"/proc/{pid}/status").read_text()
+    except OSError:
+        return {}
+    fields = dict(re.findall(r"^(VmRSS|VmHWM):\s+(\d+) kB", status, re.M))
+    return {"rss_mb": round(int(fields.get("VmRSS", 0)) / 1024, 1), "peak_rss_mb": round(int(fields.get("VmHWM", 0)) / 1024, 1)}
+
+
+def summarize(values: list) -> dict:
+    if not values:
+        return {}
+    arr = np.asarray(values, dtype=float)
+    stats = {f"p{p}": round(float(np.percentile(arr, p)), 3) for p in PERCENTILES}
+    stats.update(mean=round(float(arr.mean()), 3), max=round(float(arr.max()), 3), n=len(values))
+    return stats
+
+
+async def _probe_loop_lag(samples: list, stop: asyncio.Event):
+    # Oversleep of a short timer = time the event loop spent blocked
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(LAG_PROBE_SECONDS)
+        samples.append(max(time.perf_counter() - start - LAG_PROBE_SECONDS, 0.0))
+
+
+async def _probe_ping(client: _Client, samples: list, stop: asyncio.Event):
+    while not stop.is_set():
+        samples.append(await client.ping())
+        await asyncio.sleep(LAG_PROBE_SECONDS)
+
+
+async def _sample_memory(pids: list, samples: dict, stop: asyncio.Event):
+    while not stop.is_set():
+        for pid in pids:
+            rss = process_memory_mb(pid).get("rss_mb")
+            if rss is not None:
+                samples.setdefault(str(pid), []).append(rss)
+        await asyncio.sleep(0.5)
+
+
+# ============================================================================ #
+# Sessions
+# ============================================================================ #
+
+
+async def run_session(make_client, uploads: list) -> dict:
+    """
+    Upload `uploads` ([(file_type, path)]), wait for every header read, assign the
+    types, submit and wait until every file has a final result. Returns timings.
+    """
+    record = {"files": len(uploads), "bytes": sum(p.stat().st_size for _, p in uploads)}
+    client = await make_client()
+    try:
+        start = time.perf_counter()
+        await client.init()
+        await client.upload([p for _, p in uploads])
+        select_ids = [_input_id("file_type", p.name) for _, p in uploads]
+        await client.wait_for("file_assignment_ui", lambda html: all(f'id="{i}"' in html for i in select_ids), SESSION_TIMEOUT_SECONDS)
+        record["upload_s"] = time.perf_counter() - start
+
+        assignments = {}
+        for file_type, path in uploads:
+            assignments[_input_id("file_type", path.name)] = file_type
+            assignments[_input_id("remarks", path.name)] = "load test"
+        await client.update(**assignments)
+        submitted = time.perf_counter()
+        await client.update(submit_assignment=1)
+
+        def finished(html):
+            done = html.count("text-success fw-bold") + html.count("text-danger fw-bold")
+            return done >= len(uploads) and "text-muted fw-bold" not in html
+
+        html = await client.wait_for("validation_results", finished, SESSION_TIMEOUT_SECONDS)
+        record["validate_s"] = time.perf_counter() - submitted
+        record["total_s"] = time.perf_counter() - start
+        record["valid"] = html.count("text-success fw-bold")
+        record["invalid"] = html.count("text-danger fw-bold")
+        record["messages"] = " ".join(_text(html).split())
+    except Exception as e:
+        record["error"] = f"{type(e).__name__}: {e}"
+    finally:
+        await client.close()
+    return record
+
+
+async def run_load_test(args) -> dict:
+    dest = Path(args.data_dir or tempfile.mkdtemp(prefix="loadtest-"))
+    dest.mkdir(parents=True, exist_ok=True)
+    plans = plan_sessions(args.sessions, args.files_per_session, args.mix, args.rows, args.seed)
+    files = {key: generate_upload(*key, dest) for key in {item for plan in plans for item in plan}}
+
+    if args.url:
+        # The server's own rules apply: its patch_mapping must accept the generated job codes
+        async def make_client():
+            client = RemoteClient(args.url)
+            await client.connect()
+            return client
+
+        pids = args.server_pid
+        rules_scope = nullcontext()
+    else:
+        from .app import app
+
+        async def make_client():
+            return InProcessClient(app)
+
+        pids = ["self"]
+        rules_scope = generated_codes_allowed()
+
+    stop = asyncio.Event()
+    lag, memory = [], {}
+    monitors = [asyncio.create_task(_sample_memory(pids, memory, stop))]
+    monitor_client = None
+    if args.url:
+        monitor_client = await make_client()
+        await monitor_client.init()
+        monitors.append(asyncio.create_task(_probe_ping(monitor_client, lag, stop)))
+    else:
+        monitors.append(asyncio.create_task(_probe_loop_lag(lag, stop)))
+
+    semaphore = asyncio.Semaphore(args.concurrency or args.sessions)
+
+    async def session(i, plan):
+        await asyncio.sleep(args.ramp * i / max(args.sessions, 1))
+        async with semaphore:
+            return await run_session(make_client, [(file_type, files[(file_type, rows)]) for file_type, rows in plan])
+
+    start = time.perf_counter()
+    with rules_scope:
+        records = await asyncio.gather(*(session(i, plan) for i, plan in enumerate(plans)))
+    wall = time.perf_counter() - start
+    stop.set()
+    await asyncio.gather(*monitors, return_exceptions=True)
+    if monitor_client is not None:
+        await monitor_client.close()
+
+    ok = [r for r in records if "error" not in r]
+    lag_key = "ping_s" if args.url else "loop_lag_s"
+    files_done = sum(r["files"] for r in ok)
+    return {
+        "mode": args.url or "in-process",
+        "sessions": len(records),
+        "failed_sessions": len(records) - len(ok),
+        "errors": sorted({r["error"] for r in records if "error" in r}),
+        "wall_s": round(wall, 3),
+        "files": files_done,
+        "valid_files": sum(r["valid"] for r in ok),
+        "invalid_files": sum(r["invalid"] for r in ok),
+        "throughput": {
+            "files_per_s": round(files_done / wall, 3) if wall else None,
+            "mb_per_s": round(sum(r["bytes"] for r in ok) / 1024**2 / wall, 3) if wall else None,
+        },
+        "latency_s": {stage: summarize([r[stage] for r in ok]) for stage in ("upload_s", "validate_s", "total_s")},
+        lag_key: summarize(lag),
+        "memory_mb": {
+            str(pid): {**process_memory_mb(pid), "max_sampled_rss_mb": max(memory.get(str(pid), []), default=None)}
+            for pid in pids
+        },
+        "session_records": records if args.verbose else None,
+    }
+
+
+def _print_report(report: dict):
+    print(f"Mode: {report['mode']} — {report['sessions']} sessions, {report['failed_sessions']} failed, {report['wall_s']} s")
+    for error in report["errors"]:
+        print(f"  error: {error}")
+    print(f"Files: {report['files']} ({report['valid_files']} valid, {report['invalid_files']} invalid)")
+    print(f"Throughput: {report['throughput']['files_per_s']} files/s, {report['throughput']['mb_per_s']} MB/s")
+    header = ["", *[f"p{p}" for p in PERCENTILES], "mean", "max"]
+    rows = [(stage, report["latency_s"][stage]) for stage in report["latency_s"]]
+    lag_key = "loop_lag_s" if "loop_lag_s" in report else "ping_s"
+    rows.append((lag_key, report[lag_key]))
+    print("".join(f"{h:>12}" for h in header))
+    for name, stats in rows:
+        print(f"{name:>12}" + "".join(f"{stats.get(h, ''):>12}" for h in header[1:]))
+    for pid, mem in report["memory_mb"].items():
+        print(f"Memory ({pid}): {mem}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m App.loadtest",
+        description=(
+            "Drive the app with N simulated sessions. Each session uploads generated files, "
+            "assigns their types, submits and waits for every result. Reports latency "
+            "percentiles, throughput, event-loop lag and RSS."
+        ),
+    )
+    parser.add_argument("--sessions", type=int, default=10, help="simulated sessions (default 10)")
+    parser.add_argument("--concurrency", type=int, default=0, help="sessions open at once (default: all)")
+    parser.add_argument("--ramp", type=float, default=0.0, help="seconds over which session starts are spread")
+    parser.add_argument("--files-per-session", type=int, default=2, help="files per session besides its patch_mapping (default 2)")
+    parser.add_argument("--mix", type=parse_mix, default={ft: 1.0 for ft in validation_rules}, help="file type weights, e.g. fte_wide=3,resource_allocation=1")
+    parser.add_argument("--rows", type=lambda s: [int(n) for n in s.split(",")], default=[1000], help="data rows per file, one picked per file, e.g. 1000,100000")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--data-dir", help="where generated uploads are kept (default: a new temp dir)")
+    parser.add_argument("--url", help="test a running server (e.g. http://127.0.0.1:8000) instead of the app in-process")
+    parser.add_argument("--server-pid", type=int, action="append", default=[], help="server worker pid(s) whose RSS to sample (with --url)")
+    parser.add_argument("--json", help="also write the report to this file")
+    parser.add_argument("--verbose", action="store_true", help="include every session's record in the JSON report")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run_load_test(args))
+    _print_report(report)
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2, default=str))
+    return 0 if not report["failed_sessions"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
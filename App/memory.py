@@ -0,0 +1,166 @@
+import os
+import random
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+
+import pandas as pd
+
+# Largest estimated in-memory footprint admitted for one upload.
+MEMORY_BUDGET_MB = float(os.environ.get("MEMORY_BUDGET_MB", 2048))
+# Fraction of jobs whose pandas validation is traced with tracemalloc (1 = every job), as
+# it slows those jobs about 3x; the others, and every native stage, are measured by RSS.
+MEMORY_TRACKING = float(os.environ.get("MEMORY_TRACKING", 0))
+# Seconds between RSS samples for stages that allocate outside the Python heap (Arrow, Polars, DuckDB).
+RSS_SAMPLE_INTERVAL = 0.02
+# Copies made between parse and export (input copy, skiprows, melt, date normalisation).
+WORKING_SET_FACTOR = 4
+# Python objects built per cell by the Excel reader before the frame exists.
+EXCEL_BYTES_PER_CELL = 100
+
+_tracking_lock = threading.Lock()
+_active_trackers = 0
+
+
+def _frames(sample):
+    return list(sample.values()) if isinstance(sample, dict) else [sample]
+
+
+def _bytes_per_row(df: pd.DataFrame) -> float:
+    if df is None or len(df) == 0:
+        return 0.0
+    return float(df.memory_usage(deep=True, index=False).sum()) / len(df)
+
+
+def _csv_rows(path, file_size: int, probe_bytes: int = 64 * 1024) -> int:
+    with open(path, "rb") as fh:
+        head = fh.read(probe_bytes)
+    lines = max(head.count(b"\n"), 1)
+    return int(file_size / (len(head) / lines)) if head else 0
+
+
+def _excel_dimensions(path) -> dict:
+    """Sheet name -> (rows, columns) from each sheet's stored dimension, without reading cells."""
+    from openpyxl import load_workbook
+
+    wb = load_workbook(path, read_only=True)
+    try:
+        return {ws.title: (ws.max_row or 0, ws.max_column or 0) for ws in wb.worksheets}
+    finally:
+        wb.close()
+
+
+def estimate_footprint(file_info, sample=None) -> dict:
+    """
+    Estimate the peak memory needed to parse and validate an upload, from the file
+    size (CSV) or stored sheet dimensions (Excel) and the per-row cost of the dtypes
+    seen in the header `sample`. Returns {"rows", "estimated_bytes", "method"}.
+    """
+    path = file_info["datapath"]
+    file_size = file_info.get("size") or os.path.getsize(path)
+    frames = _frames(sample) if sample is not None else []
+    ext = Path(file_info["name"]).suffix.lower()
+    if ext == ".csv":
+        rows = _csv_rows(path, file_size)
+        per_row = _bytes_per_row(frames[0]) if frames else 0.0
+        # Without a sample, assume each byte of text becomes ~5 bytes of objects
+        frame_bytes = rows * per_row if per_row else file_size * 5
+        return {"rows": rows, "estimated_bytes": int(frame_bytes * WORKING_SET_FACTOR), "method": "csv size"}
+    if ext in (".xlsx", ".xlsm"):
+        dims = _excel_dimensions(path)
+        per_row = {name: _bytes_per_row(df) for name, df in (sample.items() if isinstance(sample, dict) else [])}
+        single = _bytes_per_row(frames[0]) if frames and not isinstance(sample, dict) else 0.0
+        total = 0
+        rows = 0
+        for name, (n_rows, n_cols) in dims.items():
+            rows += n_rows
+            row_bytes = per_row.get(name, single) or n_cols * 64
+            total += n_rows * row_bytes * WORKING_SET_FACTOR + n_rows * n_cols * EXCEL_BYTES_PER_CELL
+        return {"rows": rows, "estimated_bytes": int(total), "method": "sheet dimensions"}
+    # .xls and anything else: no cheap dimensions, scale the file size
+    return {"rows": None, "estimated_bytes": int(file_size * 10 * WORKING_SET_FACTOR), "method": "file size"}
+
+
+def admit(estimate: dict, budget_mb: float = None):
+    """Return (True, None) if the estimate fits the budget, else (False, reason)."""
+    budget_mb = MEMORY_BUDGET_MB if budget_mb is None else budget_mb
+    estimated_mb = estimate["estimated_bytes"] / 1024**2
+    if estimated_mb > budget_mb:
+        return False, f"File needs about {estimated_mb:,.0f} MB in memory, over the {budget_mb:,.0f} MB limit per upload ❌"
+    return True, None
+
+
+def track_job() -> bool:
+    """Whether to trace this job's Python heap with tracemalloc, sampling `MEMORY_TRACKING` of jobs."""
+    return MEMORY_TRACKING >= 1 or random.random() < MEMORY_TRACKING
+
+
+def _rss_bytes():
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+@contextmanager
+def _track_rss(stage: str, peaks: dict):
+    base = _rss_bytes()
+    if base is None:
+        # No /proc (not Linux): nothing to sample
+        yield
+        return
+    peak = [base]
+    stop = threading.Event()
+
+    def sample():
+        while not stop.wait(RSS_SAMPLE_INTERVAL):
+            peak[0] = max(peak[0], _rss_bytes() or 0)
+
+    sampler = threading.Thread(target=sample, name=f"rss-{stage}", daemon=True)
+    sampler.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        sampler.join()
+        peak[0] = max(peak[0], _rss_bytes() or 0)
+        peaks[stage] = round(max(peak[0] - base, 0) / 1024**2, 2)
+
+
+@contextmanager
+def track_peak(stage: str, peaks: dict, native: bool = False):
+    """
+    Record the peak allocation (MB) of the enclosed block in `peaks[stage]`;
+    `peaks=None` records nothing. `native=True` samples the process RSS growth,
+    which is cheap and also sees pyarrow, Polars and DuckDB; otherwise
+    tracemalloc measures the Python heap exactly but slows the block down.
+    Both are process-wide: while stages overlap on other threads, peaks are
+    upper bounds. RSS growth misses memory the process freed earlier and
+    reuses, so it can also undercount.
+    """
+    global _active_trackers
+    if peaks is None:
+        yield
+        return
+    if native:
+        with _track_rss(stage, peaks):
+            yield
+        return
+    with _tracking_lock:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        if _active_trackers == 0:
+            tracemalloc.reset_peak()
+        _active_trackers += 1
+        base = tracemalloc.get_traced_memory()[0]
+    try:
+        yield
+    finally:
+        with _tracking_lock:
+            peak = tracemalloc.get_traced_memory()[1]
+            _active_trackers -= 1
+            if _active_trackers == 0:
+                tracemalloc.stop()
+        peaks[stage] = round(max(peak - base, 0) / 1024**2, 2)
@@ -0,0 +1,566 @@
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+try:
+    import polars as pl
+except ImportError:
+    # Every upload is validated by the pandas engine
+    pl = None
+
+from .readers import _csv_header, inferred_columns
+from .references import allowed_values
+from .validation import (
+    DATE_INFERENCE_SAMPLE,
+    _check_header_dates,
+    _convert_user_fmt,
+    _expected_len_from_pyfmt,
+    _parse_header_dates,
+    _report,
+    _with_header_dates,
+    export_single,
+    infer_date_format,
+    validation_rules,
+)
+
+# CSV uploads of at least this many MB are validated by the Polars engine; 0 (the default)
+# leaves it to rules with `"engine": "polars"`. It is opt-in as it is not faster than pandas
+# on one core (see `python -m App.engine_parity`).
+POLARS_MIN_MB = float(os.environ.get("POLARS_MIN_MB", 0))
+# Strings read as missing, as by pyarrow's CSV reader (the pandas engine's default reader).
+CSV_NULL_VALUES = ["", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN", "N/A", "NA", "NULL", "NaN", "n/a", "nan", "null"]
+# Month-name directives: pandas matches them in any case, Polars only title case.
+_NAME_DIRECTIVES = ("%b", "%B")
+
+
+class UnsupportedRule(Exception):
+    """Raised when an upload needs something only the pandas engine handles; the caller falls back to it."""
+
+
+def use_polars(file_info, rules: dict) -> bool:
+    """
+    Whether an upload is validated by the Polars engine: single-sheet CSV rules
+    only, forced by the rule's `engine` key ("polars" / "pandas"), else chosen
+    for files of at least `POLARS_MIN_MB` when that is set.
+    """
+    if pl is None or "sheets" in rules or Path(file_info["name"]).suffix.lower() != ".csv":
+        return False
+    engine = rules.get("engine")
+    if engine:
+        return engine == "polars"
+    size = file_info.get("size") or os.path.getsize(file_info["datapath"])
+    return POLARS_MIN_MB > 0 and size >= POLARS_MIN_MB * 1024**2
+
+
+def _read(path, rules: dict):
+    """
+    A lazy scan of the whole CSV as text (the rule's `skiprows` row as header)
+    and its column names. Nothing is parsed until a query is collected.
+    """
+    skiprows = int(rules.get("skiprows", 0) or 0)
+    try:
+        header = _csv_header(path, skiprows)
+    except (UnicodeDecodeError, OSError) as e:
+        raise UnsupportedRule(f"unreadable by Polars ({e})")
+    if len(set(header)) != len(header):
+        raise UnsupportedRule("repeated column names")
+    lf = pl.scan_csv(path, skip_rows=skiprows, infer_schema=False, null_values=CSV_NULL_VALUES)
+    usecols = rules.get("usecols")
+    if usecols:
+        header = [c for c in header if c in usecols]
+        lf = lf.select(header)
+    return lf, header
+
+
+def _kinds(lf, columns: list) -> dict:
+    """
+    The pandas dtype kind ("int", "float" or "str") the Arrow reader would infer
+    for each type-inferred column: whole numbers without gaps read as int64, any
+    other all-numeric column as float64, the rest as text.
+    """
+    if not columns:
+        return {}
+    exprs = []
+    for i, col in enumerate(columns):
+        text = pl.col(col).str.strip_chars()
+        exprs += [
+            text.str.contains(r"^-?\d+$").all().alias(f"int{i}"),
+            (text.cast(pl.Float64, strict=False).is_not_null() | text.is_null()).all().alias(f"num{i}"),
+            pl.col(col).null_count().alias(f"nulls{i}"),
+        ]
+    row = lf.select(exprs).collect(engine="streaming").row(0, named=True)
+    kinds = {}
+    for i, col in enumerate(columns):
+        if row[f"int{i}"] and not row[f"nulls{i}"]:
+            kinds[col] = "int"
+        elif row[f"num{i}"]:
+            kinds[col] = "float"
+        else:
+            kinds[col] = "str"
+    return kinds
+
+
+def _shown(value, kind: str = "str") -> str:
+    """A value as the pandas engine prints it in messages (its column dtype decides)."""
+    if value is None:
+        return "nan"
+    if kind == "int":
+        return str(int(value.strip()))
+    if kind == "float":
+        return str(float(value.strip()))
+    return value
+
+
+def _key_value(value, kind: str = "str"):
+    """A key value as pandas' groupby hands it back, so duplicate messages render alike."""
+    if value is None:
+        return float("nan")
+    if kind == "int":
+        return np.int64(int(value.strip()))
+    if kind == "float":
+        return np.float64(float(value.strip()))
+    return value
+
+
+def _numeric_values(expr, cfg: dict, textual: bool):
+    """The float values `validation._numeric_masks` coerces a column to; `textual` when pandas holds it as text."""
+    values = expr.str.strip_chars()
+    pct = None
+    if textual and (cfg.get("thousands") or cfg.get("percent")):
+        if cfg.get("thousands"):
+            values = values.str.replace_all(cfg["thousands"], "", literal=True)
+        if cfg.get("percent"):
+            pct = values.str.ends_with("%").fill_null(False)
+            values = values.str.strip_chars_end("%")
+    arr = values.cast(pl.Float64, strict=False)
+    if pct is not None:
+        arr = pl.when(pct).then(arr / 100).otherwise(arr)
+    return arr
+
+
+def _with_numeric_values(lf, columns: dict):
+    """`lf` plus the `_numeric_values` of each {column: (cfg, textual)}, as `__num__<column>`."""
+    return lf.with_columns([_numeric_values(pl.col(c), cfg, textual).alias(f"__num__{c}") for c, (cfg, textual) in columns.items()])
+
+
+def _numeric_masks(expr, arr, cfg: dict) -> list:
+    """
+    Polars form of `validation._numeric_masks` for a column `expr` coerced to
+    `arr` (a column of `_numeric_values`, computed once before the masks).
+    """
+    present = (arr.is_not_null() & arr.is_not_nan()).fill_null(False)
+    masks = [(~present & expr.is_not_null(), "has invalid numeric format")]
+    if cfg.get("min") is not None:
+        masks.append((present & (arr < cfg["min"]), f"is below the minimum {cfg['min']}"))
+    if cfg.get("max") is not None:
+        masks.append((present & (arr > cfg["max"]), f"is above the maximum {cfg['max']}"))
+    if cfg.get("integer"):
+        masks.append((present & (arr != arr.floor()), "is not a whole number"))
+    if cfg.get("decimals") is not None:
+        scaled = arr * 10 ** cfg["decimals"]
+        tolerance = pl.max_horizontal(pl.lit(1e-6), scaled.abs() * 1e-12)
+        masks.append((present & ((scaled - scaled.round()).abs() > tolerance), f"has more than {cfg['decimals']} decimal places"))
+    return masks
+
+
+def _string_masks(expr, cfg: dict):
+    """Polars form of `validation._string_masks`. Returns ([(mask, reason)], normalized expression)."""
+    text = expr
+    if cfg.get("strip"):
+        text = text.str.strip_chars()
+    case = cfg.get("case")
+    if case == "upper":
+        text = text.str.to_uppercase()
+    elif case == "lower":
+        text = text.str.to_lowercase()
+    elif case == "title":
+        text = text.str.to_titlecase()
+    masks = []
+    pattern = cfg.get("pattern")
+    if pattern:
+        masks.append((~text.str.contains(f"^(?:{pattern})$"), f"does not match pattern '{pattern}'"))
+    if cfg.get("min_length") is not None:
+        masks.append((text.str.len_chars() < cfg["min_length"], f"is shorter than {cfg['min_length']} characters"))
+    if cfg.get("max_length") is not None:
+        masks.append((text.str.len_chars() > cfg["max_length"], f"is longer than {cfg['max_length']} characters"))
+    return masks, text
+
+
+def _normalize_strings(lf, header: list, rules: dict):
+    """`lf` with the `strip` / `case` normalisation of `string_checks` applied, as `validation.normalize_strings`."""
+    normalized = []
+    for col, cfg in rules.get("string_checks", {}).items():
+        if col in header and rules.get("types", {}).get(col) == "string" and (cfg.get("strip") or cfg.get("case")):
+            normalized.append(_string_masks(pl.col(col), {"strip": cfg.get("strip"), "case": cfg.get("case")})[1].alias(col))
+    return lf.with_columns(normalized) if normalized else lf
+
+
+def _date_mask(lf, col: str, col_cfg, cache_key=None):
+    """
+    Polars form of `validation._date_mask`. Without a declared format, the format
+    is inferred from the same sample of distinct values; a column with no
+    recognisable format is left to the pandas engine's per-value parsing.
+    """
+    expr = pl.col(col)
+    fmt = col_cfg.get("format") if isinstance(col_cfg, dict) else None
+    if fmt:
+        py_fmt = _convert_user_fmt(fmt)
+        sample_len = _expected_len_from_pyfmt(py_fmt)
+        text = expr.str.slice(0, sample_len) if sample_len else expr
+    else:
+        sample = lf.select(expr.drop_nulls().str.strip_chars().unique(maintain_order=True).head(DATE_INFERENCE_SAMPLE)).collect().to_series()
+        py_fmt = infer_date_format(sample.to_pandas(), cache_key)
+        if not py_fmt:
+            raise UnsupportedRule(f"no date format recognised in column '{col}'")
+        fmt = f"{py_fmt} (inferred)"
+        text = expr
+    text = text.str.strip_chars()
+    if any(d in py_fmt for d in _NAME_DIRECTIVES):
+        text = text.str.to_titlecase()
+    parsed = text.str.strptime(pl.Datetime, py_fmt, strict=False)
+    return parsed.is_null() & expr.is_not_null(), fmt
+
+
+def _value_mask(expr, check):
+    """Polars form of `validation._value_mask`; membership is tested on text, as pandas compares it."""
+    if check == "not_null":
+        return expr.is_null(), "has empty values"
+    if isinstance(check, dict) and "references" in check:
+        ref = check["references"]
+        allowed, source = allowed_values(ref, validation_rules)
+        if allowed is None:
+            return None, f"references {ref['file_type']}.{ref['column']}, which has not been exported yet. Upload {ref['file_type']} first."
+        allowed = {v for v in allowed if isinstance(v, str)}
+    elif isinstance(check, (list, tuple, set)):
+        allowed = {v for v in check if isinstance(v, str)}
+        source = sorted(map(str, set(check)))
+    else:
+        return None, None
+    return expr.is_not_null() & ~expr.is_in(pl.Series(sorted(allowed), dtype=pl.String).implode()), f"has values not in {source}"
+
+
+def _hit_plans(lf, checks: list) -> list:
+    """
+    Plans evaluating row checks together: `checks` holds (column, mask, value,
+    per_value) tuples, or None. Numeric checks run row-wise in one query;
+    `per_value` checks (text, dates, value lists) run once per distinct value of
+    their column, as the pandas engine parses dates. Read with `_first_hits`.
+    """
+    row_wise, per_column = [], {}
+    for i, check in enumerate(checks):
+        if check is not None:
+            col, mask, value, per_value = check
+            (per_column.setdefault(col, []) if per_value else row_wise).append((i, mask.fill_null(False), value))
+    plans = []
+    if row_wise:
+        plans.append(lf.with_row_index("__row__").select([e for i, mask, value in row_wise for e in (pl.col("__row__").filter(mask).first().alias(f"p{i}"), value.filter(mask).first().alias(f"v{i}"))]))
+    for col, col_checks in per_column.items():
+        distinct = lf.with_row_index("__row__").group_by(col).agg(pl.col("__row__").min()).sort("__row__")
+        plans.append(distinct.select([e for i, mask, value in col_checks for e in (pl.col("__row__").filter(mask).first().alias(f"p{i}"), value.filter(mask).first().alias(f"v{i}"))]))
+    return plans
+
+
+def _first_hits(results: list, n_checks: int) -> list:
+    """[(position, value)] of each check's first flagged row from the collected `_hit_plans`; (None, None) when nothing is flagged."""
+    row = {}
+    for result in results:
+        row.update(result.row(0, named=True))
+    return [(row.get(f"p{i}"), row.get(f"v{i}")) for i in range(n_checks)]
+
+
+def _duplicate_plan(lf, key_cols: list, max_rows: int = 10):
+    """
+    Plan of every key repeated in `lf`: key values, its first `max_rows` row
+    positions and row count, in order of first occurrence. Keys are counted
+    first, so row positions are only gathered for the repeated ones.
+    """
+    repeated = lf.group_by(key_cols).agg(pl.len().alias("__count__")).filter(pl.col("__count__") > 1)
+    return (
+        lf.with_row_index("__row__")
+        .join(repeated, on=key_cols, how="inner", nulls_equal=True)
+        .group_by(key_cols)
+        .agg(pl.col("__row__").sort().head(max_rows), pl.col("__count__").first())
+        .sort(pl.col("__row__").list.first())
+    )
+
+
+def _duplicate_groups(dups) -> list:
+    """[(key values, first row positions, row count)] of a collected `_duplicate_plan`."""
+    return [(row[:-2], row[-2], row[-1]) for row in dups.iter_rows()]
+
+
+def _collect(plans: dict) -> dict:
+    """
+    Collect {name: plan or [plans]} in one streaming `collect_all`; None plans
+    stay None. Each plan streams the file itself: sharing one scan would cache
+    the whole parsed file in memory.
+    """
+    flat = [(name, lf) for name, plan in plans.items() if plan is not None for lf in (plan if isinstance(plan, list) else [plan])]
+    results = {name: [] if isinstance(plan, list) else None for name, plan in plans.items()}
+    for (name, _), df in zip(flat, pl.collect_all([lf for _, lf in flat], engine="streaming", optimizations=pl.QueryOptFlags(comm_subplan_elim=False))):
+        if isinstance(plans[name], list):
+            results[name].append(df)
+        else:
+            results[name] = df
+    return results
+
+
+def _duplicates_result(groups: list, key_cols: list, file_id: str, total: int, max_groups: int = 5, max_rows: int = 10):
+    """
+    The failed result `validation._check_unique_keys` reports for the same groups:
+    (key values, row positions) pairs, or (key values, first row positions, row
+    count) when only the first `max_rows` positions were fetched.
+    """
+    details = []
+    for key_values, rows, *count in groups[:max_groups]:
+        n_rows = count[0] if count else len(rows)
+        row_numbers = ", ".join(str(r + 1) for r in rows[:max_rows])
+        if n_rows > max_rows:
+            row_numbers += f", … ({n_rows:,} rows)"
+        details.append(f"{dict(zip(key_cols, key_values))} at rows {row_numbers}")
+    more = f" ({total} duplicate groups in total)" if total > len(details) else ""
+    return {"valid": False, "message": f"{file_id}: Duplicate rows for unique key {key_cols}: {'; '.join(details)}{more}"}
+
+
+def _melt_layout(header: list, rules: dict):
+    """{"id_vars", "value_vars", "names_to", "values_to"} of a `columns` / `multi_ids` rule, else None."""
+    transform = rules.get("transform_config", {"type": "none"}).get("type")
+    if transform == "columns":
+        id_vars = rules["columns"]
+    elif transform == "multi_ids":
+        id_vars = rules.get("id_columns", [])
+    else:
+        return None
+    return {
+        "id_vars": id_vars,
+        "value_vars": [c for c in header if c not in id_vars],
+        "names_to": rules.get("names_to", "date" if transform == "columns" else "city_name"),
+        "values_to": rules.get("values_to", "value" if transform == "columns" else "allocation_value"),
+    }
+
+
+def _names_labels(value_vars: list, rules: dict) -> list:
+    """The `names_to` value of each melted column, as `_with_header_dates` writes it."""
+    fmt = rules.get("transform_config", {}).get("column_format")
+    if fmt and value_vars:
+        parsed = _parse_header_dates(tuple(value_vars), fmt)
+        if not parsed.hasnans and not parsed.has_duplicates:
+            return list(parsed.strftime("%Y-%m-%d"))
+    return list(value_vars)
+
+
+def _check_frame(lf, header: list, rules: dict, file_id: str, kinds: dict, file_type: str = None):
+    """
+    `validation.validate_single_file` on the lazy text frame: the same checks, in
+    the same order, so the first failure (and its message) is the same. The row,
+    duplicate and melted checks are planned first and collected in one
+    `collect_all` call, each plan streaming the file on its own (see `_collect`).
+    Returns (failed result or None, rows read); rows is None
+    when the header alone failed.
+    """
+    expected_columns = rules["columns"]
+    if not set(expected_columns).issubset(set(header)):
+        return {"valid": False, "message": f"{file_id}: Invalid columns. Expected {expected_columns}, got {header}"}, None
+    if rules.get("transform_config", {}).get("type") == "columns":
+        res = _check_header_dates(header, rules, file_id)
+        if res is not None:
+            return res, None
+
+    numeric_cfg = rules.get("numeric_checks", {})
+    string_cfg = rules.get("string_checks", {})
+    date_columns_cfg = rules.get("date_columns", {})
+    numeric_cols = {c: (numeric_cfg.get(c, {}), kinds.get(c, "str") == "str") for c, t in rules["types"].items() if t == "numeric" and c in header}
+    work = _with_numeric_values(lf, numeric_cols)
+    normalized = {}
+    # (row check, message, kind of the shown value) in the pandas engine's order; a None
+    # check fails outright, a None kind reports the row only
+    checks = []
+    for col, expected_type in rules["types"].items():
+        if col not in header:
+            continue
+        kind = kinds.get(col, "str")
+        raw = pl.col(col)
+        if expected_type == "numeric":
+            for mask, reason in _numeric_masks(raw, pl.col(f"__num__{col}"), numeric_cfg.get(col, {})):
+                checks.append(((col, mask, raw, False), f"{file_id}: Column '{col}' {reason}", kind))
+        elif kind != "str":
+            raise UnsupportedRule(f"column '{col}' is read as numbers but checked as {expected_type}")
+        elif expected_type == "string" and string_cfg.get(col):
+            masks, normalized[col] = _string_masks(raw, string_cfg[col])
+            for mask, reason in masks:
+                checks.append(((col, mask, raw, True), f"{file_id}: Column '{col}' {reason}", kind))
+        elif expected_type == "date":
+            mask, fmt = _date_mask(lf, col, date_columns_cfg.get(col, {}), (file_type, col) if file_type else None)
+            checks.append(((col, mask, raw, True), f"{file_id}: Column '{col}' has invalid date format. Expected format '{fmt}'", kind))
+
+    for col, check in rules.get("value_checks", {}).items():
+        if col not in header:
+            continue
+        if check != "not_null" and kinds.get(col, "str") != "str":
+            raise UnsupportedRule(f"value check on numeric column '{col}'")
+        values = normalized.get(col, pl.col(col))
+        mask, reason = _value_mask(values, check)
+        if mask is None:
+            if reason:
+                checks.append((None, f"{file_id}: Column '{col}' {reason}", None))
+        elif check == "not_null":
+            checks.append(((col, mask, values, True), f"{file_id}: Column '{col}' has empty values", None))
+        else:
+            checks.append(((col, mask, values, True), f"{file_id}: Column '{col}' {reason}", "str"))
+
+    unique_keys = rules.get("unique_keys", [])
+    keyed = bool(unique_keys) and set(unique_keys).issubset(set(header))
+    layout = _melt_layout(header, rules)
+    # Keys compare (and are exported) normalised
+    normalized_lf = _normalize_strings(lf, header, rules)
+    results = _collect(
+        {
+            "rows": lf.select(pl.len()),
+            "hits": _hit_plans(work, [c for c, _, _ in checks]),
+            "duplicates": _duplicate_plan(normalized_lf, unique_keys) if keyed else None,
+            **(_melted_plans(normalized_lf, header, layout, rules, kinds) if layout else {}),
+        }
+    )
+    rows = results["rows"].item()
+
+    for (check, message, kind), (pos, value) in zip(checks, _first_hits(results["hits"], len(checks))):
+        if check is None:
+            return {"valid": False, "message": message}, rows
+        if pos is not None:
+            found = f"First at row {pos + 1}" if kind is None else f"Found '{_shown(value, kind)}' at row {pos + 1}"
+            return {"valid": False, "message": f"{message}. {found}"}, rows
+
+    if keyed:
+        groups = _duplicate_groups(results["duplicates"])
+        if groups:
+            shown = [(tuple(_key_value(v, kinds.get(k, "str")) for k, v in zip(unique_keys, key)), positions, count) for key, positions, count in groups]
+            return _duplicates_result(shown, unique_keys, file_id, len(groups)), rows
+    return (_check_melted(results, layout, rules, file_id, kinds, rows) if layout else None), rows
+
+
+def _melted_plans(lf, header: list, layout: dict, rules: dict, kinds: dict) -> dict:
+    """
+    Plans of `validation._check_melted` without melting: the `values_to` checks
+    run on each value column, and melted keys repeat exactly where the id keys
+    do (header labels are distinct), once per value column.
+    """
+    value_vars, names_to, values_to = layout["value_vars"], layout["names_to"], layout["values_to"]
+    plans = {"melted_hits": None, "melted_duplicates": None}
+    if rules.get("types", {}).get(values_to) == "numeric" and values_to not in header:
+        cfg = rules.get("numeric_checks", {}).get(values_to, {})
+        textual = "str" in [kinds.get(c, "str") for c in value_vars]
+        work = _with_numeric_values(lf, {c: (cfg, textual) for c in value_vars})
+        per_column = [_numeric_masks(pl.col(c), pl.col(f"__num__{c}"), cfg) for c in value_vars]
+        n_reasons = len(per_column[0]) if per_column else 0
+        plans["melted_hits"] = _hit_plans(work, [(c, masks[r][0], pl.col(c), False) for r in range(n_reasons) for c, masks in zip(value_vars, per_column)])
+
+    unique_keys = rules.get("unique_keys", [])
+    if not unique_keys or set(unique_keys).issubset(set(header)):
+        return plans
+    if values_to in unique_keys:
+        raise UnsupportedRule(f"unique key on the melted '{values_to}' column")
+    id_keys = [k for k in unique_keys if k != names_to]
+    if set(unique_keys).issubset(set(layout["id_vars"]) | {names_to}) and id_keys and value_vars:
+        plans["melted_duplicates"] = _duplicate_plan(lf, id_keys)
+    return plans
+
+
+def _check_melted(results: dict, layout: dict, rules: dict, file_id: str, kinds: dict, n_rows: int):
+    """
+    `validation._check_melted` from the collected `_melted_plans`: melted row
+    numbers are derived (column index × rows + row), as `melt` stacks the value
+    columns in order.
+    """
+    value_vars, names_to, values_to = layout["value_vars"], layout["names_to"], layout["values_to"]
+    file_id = f"{file_id} (after transform)"
+
+    if results.get("melted_hits") is not None:
+        value_kinds = [kinds.get(c, "str") for c in value_vars]
+        # Melted, mixed text and numbers become one object column; numbers share the widest dtype
+        textual = "str" in value_kinds
+        melted_kind = None if textual else ("float" if "float" in value_kinds else "int")
+        cfg = rules.get("numeric_checks", {}).get(values_to, {})
+        reasons = [reason for _, reason in _numeric_masks(pl.col(value_vars[0]), pl.col(value_vars[0]), cfg)] if value_vars else []
+        hits = _first_hits(results["melted_hits"], len(reasons) * len(value_vars))
+        for r, reason in enumerate(reasons):
+            for j, (pos, value) in enumerate(hits[r * len(value_vars) : (r + 1) * len(value_vars)]):
+                if pos is not None:
+                    shown = _shown(value, melted_kind or value_kinds[j])
+                    return {"valid": False, "message": f"{file_id}: Column '{values_to}' {reason}. Found '{shown}' at row {j * n_rows + pos + 1}"}
+
+    if results.get("melted_duplicates") is None:
+        return None
+    groups = _duplicate_groups(results["melted_duplicates"])
+    if not groups:
+        return None
+    unique_keys = rules["unique_keys"]
+    id_keys = [k for k in unique_keys if k != names_to]
+    labels = _names_labels(value_vars, rules)
+    shown = []
+    for j, label in enumerate(labels):
+        for key, positions, count in groups:
+            values = dict(zip(id_keys, (_key_value(v, kinds.get(k, "str")) for k, v in zip(id_keys, key))), **{names_to: label})
+            shown.append((tuple(values[k] for k in unique_keys), [j * n_rows + r for r in positions], count))
+            if len(shown) == 5:
+                break
+        if len(shown) == 5:
+            break
+    return _duplicates_result(shown, unique_keys, file_id, len(groups) * len(value_vars))
+
+
+def _export_frame(lf, header: list, rules: dict, kinds: dict) -> pd.DataFrame:
+    """
+    The frame the pandas engine exports, built in Polars: `string_checks`
+    columns normalised, inferred columns cast to their pandas dtype (collected with the streaming engine), melted (`unpivot`)
+    for `columns` / `multi_ids` rules, then handed to pandas once.
+    """
+    typed = _normalize_strings(lf, header, rules).with_columns([pl.col(c).str.strip_chars().cast(pl.Int64 if kind == "int" else pl.Float64) for c, kind in kinds.items() if kind != "str"]).collect(engine="streaming")
+    layout = _melt_layout(header, rules)
+    if layout is None:
+        return typed.to_pandas()
+    id_vars, value_vars, names_to, values_to = layout["id_vars"], layout["value_vars"], layout["names_to"], layout["values_to"]
+    if all(kinds.get(c) in ("int", "float") for c in value_vars):
+        # Eager: the lazy (streaming) unpivot does not keep melt's column-by-column row order
+        df = typed.unpivot(on=value_vars, index=id_vars, variable_name=names_to, value_name=values_to).to_pandas()
+    else:
+        # Text among the value columns: pandas melts them to an object column of mixed values
+        df = typed.to_pandas().melt(id_vars=id_vars, value_vars=value_vars, var_name=names_to, value_name=values_to)
+    if rules["transform_config"]["type"] == "columns":
+        df = _with_header_dates(df, value_vars, typed.height, rules)
+    return df
+
+
+def validate_file_polars(file_info, rules: dict, file_id, filename, remarks: str = None, progress=None, source_hash: str = None, file_type: str = None):
+    """
+    Validate, transform and export a single-sheet CSV upload with Polars: the
+    file is scanned lazily, every check is planned over the scan and collected
+    in one `collect_all` call (each plan re-reads the file), and only a valid upload is materialised and
+    converted to pandas for the shared export (`validation.export_single`).
+    Messages and exports match `validate_file`.
+
+    Returns (result, rows read). Raises UnsupportedRule when the upload or rule
+    needs the pandas engine.
+    """
+    if pl is None:
+        raise UnsupportedRule("polars is not installed")
+    if "sheets" in rules:
+        raise UnsupportedRule("multi-sheet rules")
+    _report(progress, stage="reading", fraction=0.0)
+    lf, header = _read(file_info["datapath"], rules)
+    try:
+        kinds = _kinds(lf, [c for c in header if c in inferred_columns(header, rules)])
+        _report(progress, stage="types", fraction=0.2)
+        res, rows = _check_frame(lf, header, rules, file_id, kinds, file_type)
+        if rows is None:
+            rows = lf.select(pl.len()).collect(engine="streaming").item()
+        _report(progress, stage="validated", rows=rows, violations=0 if res is None else 1)
+        if res is not None:
+            return res, rows
+        # On a new scan: after `collect_all` over plans sharing it, Polars (2.0) may fail to re-plan the old one
+        df = _export_frame(_read(file_info["datapath"], rules)[0], header, rules, kinds)
+    except (pl.exceptions.PolarsError, UnicodeDecodeError, OSError) as e:
+        # The scan is lazy, so a malformed file surfaces at the first collect
+        raise UnsupportedRule(f"unreadable by Polars ({e})")
+    return export_single(df, rules, file_id, filename, remarks=remarks, progress=progress, source_hash=source_hash, file_type=file_type), rows
@@ -0,0 +1,171 @@
+import csv
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+    import pyarrow.parquet as pq
+except ImportError:
+    # Full CSV reads fall back to pandas' C parser; Parquet uploads cannot be read
+    pa = None
+    pacsv = None
+    pq = None
+
+from .bundles import extract_bundle
+from .helpers import file_fingerprint
+
+# Upper bound on uploads parsed at the same time, shared by all sessions.
+UPLOAD_READ_WORKERS = int(os.environ.get("UPLOAD_READ_WORKERS", min(4, os.cpu_count() or 1)))
+# Rows read at upload time: enough for the header (after `skiprows`) and a preview.
+HEADER_SAMPLE_ROWS = 10
+# Parse full CSV reads with pyarrow's multithreaded reader from a memory map.
+ARROW_CSV = os.environ.get("ARROW_CSV", "1") == "1"
+# Bytes per parse block; blocks are what the reader spreads across threads.
+ARROW_CSV_BLOCK_SIZE = 4 * 1024 * 1024
+# Frame attribute set when the reader already used the rule's `skiprows` row as header.
+SKIPROWS_APPLIED = "skiprows_applied"
+
+_read_pool = None
+_read_pool_lock = threading.Lock()
+
+
+def _csv_header(path, skiprows: int) -> list:
+    """Column names of a CSV, from the row after the first `skiprows` rows."""
+    with open(path, newline="", encoding="utf-8-sig") as fh:
+        reader = csv.reader(fh)
+        for _ in range(skiprows):
+            next(reader, None)
+        return next(reader, [])
+
+
+def inferred_columns(header: list, rules: dict) -> set:
+    """
+    Columns whose type is inferred on a full read: numeric columns (declared, or
+    the value columns of a wide-format rule). Everything else is read as text,
+    as `pd.read_csv` would leave it, so dates keep their uploaded format.
+    """
+    transform = rules.get("transform_config", {}).get("type")
+    if transform == "columns":
+        return set(header) - set(rules.get("columns", []))
+    if transform == "multi_ids":
+        return set(header) - set(rules.get("id_columns", []))
+    return {c for c, t in rules.get("types", {}).items() if t == "numeric"}
+
+
+def _arrow_column_types(header: list, rules: dict) -> dict:
+    """Arrow types per column: text for every column not in `inferred_columns`."""
+    inferred = inferred_columns(header, rules)
+    return {c: pa.string() for c in header if c not in inferred}
+
+
+def read_csv_arrow(path, rules: dict = None) -> pd.DataFrame:
+    """
+    Parse a whole CSV with pyarrow's multithreaded reader, straight from a memory
+    map of the file. The rule's `skiprows` picks the header row (the frame is then
+    flagged `SKIPROWS_APPLIED`), its column types decide what is parsed as text
+    and an optional `usecols` limits the columns read. Arrow buffers are handed to
+    pandas without an intermediate copy where the dtype allows.
+    """
+    rules = rules or {}
+    skiprows = int(rules.get("skiprows", 0) or 0)
+    header = _csv_header(path, skiprows)
+    usecols = rules.get("usecols")
+    read_options = pacsv.ReadOptions(use_threads=True, block_size=ARROW_CSV_BLOCK_SIZE, skip_rows=skiprows)
+    convert_options = pacsv.ConvertOptions(
+        column_types=_arrow_column_types(header, rules),
+        include_columns=[c for c in header if c in usecols] if usecols else None,
+        strings_can_be_null=True,
+    )
+    with pa.memory_map(str(path), "r") as source:
+        table = pacsv.read_csv(source, read_options=read_options, convert_options=convert_options)
+    # Columns with no values at all come back as float NaN, like pandas reads them
+    nulls = [i for i, field in enumerate(table.schema) if pa.types.is_null(field.type)]
+    for i in nulls:
+        table = table.set_column(i, table.schema.field(i).name, table.column(i).cast(pa.float64()))
+    df = table.to_pandas(split_blocks=True, self_destruct=True)
+    if skiprows:
+        df.attrs[SKIPROWS_APPLIED] = True
+    return df
+
+
+def read_file(file_info, nrows: int = None, rules: dict = None):
+    """
+    Reads uploaded CSV, Parquet or Excel file and returns:
+    - pandas.DataFrame if CSV, Parquet or Excel with 1 sheet
+    - dict of {sheet_name: DataFrame} if Excel with multiple sheets
+    With `nrows`, only the first `nrows` data rows of each sheet are parsed.
+    Full CSV reads go through `read_csv_arrow` (with the file type's `rules`)
+    when pyarrow is installed, falling back to pandas if Arrow rejects the file.
+    Raises ValueError for unsupported extensions; parser errors propagate.
+    """
+    file_path = file_info["datapath"]
+    file_ext = Path(file_info["name"]).suffix.lower()
+    if file_ext == ".csv":
+        if nrows is None and ARROW_CSV and pacsv is not None:
+            try:
+                return read_csv_arrow(file_path, rules)
+            except (pa.ArrowInvalid, UnicodeDecodeError):
+                # e.g. ragged rows or a non-UTF-8 file: let pandas parse (or report) it
+                pass
+        return pd.read_csv(file_path, nrows=nrows)
+    elif file_ext == ".parquet":
+        if pq is None:
+            raise ValueError("Parquet uploads need the 'pyarrow' package")
+        parquet = pq.ParquetFile(file_path)
+        if nrows is None:
+            table = parquet.read()
+        else:
+            # Only the first row group(s) holding `nrows` rows are decoded
+            first = next(parquet.iter_batches(batch_size=max(nrows, 1)), None)
+            table = pa.Table.from_batches([first] if first is not None else [], schema=parquet.schema_arrow).slice(0, nrows)
+        df = table.to_pandas()
+        # No title lines in a Parquet file: the header is already the rule's header row
+        df.attrs[SKIPROWS_APPLIED] = True
+        return df
+    elif file_ext in [".xlsx", ".xls", ".xlsm"]:
+        # Read all sheets first
+        all_sheets = pd.read_excel(file_path, sheet_name=None, nrows=nrows)
+        if len(all_sheets) == 1:
+            # Return only the DataFrame (not a dict) if single sheet
+            return next(iter(all_sheets.values()))
+        else:
+            # Multi-sheet Excel — return as dict
+            return all_sheets
+    else:
+        raise ValueError(f"Unsupported file type '{file_ext}'")
+
+
+def load_upload(file_info, nrows: int = None, fingerprint: bool = True, rules: dict = None) -> dict:
+    """Read (and optionally fingerprint) one upload. Never raises; failures are reported in the result."""
+    start = time.perf_counter()
+    name = file_info["name"]
+    try:
+        data = read_file(file_info, nrows=nrows, rules=rules)
+        fingerprint = file_fingerprint(file_info["datapath"]) if fingerprint else None
+    except Exception as e:
+        return {"name": name, "ok": False, "data": None, "fingerprint": None, "message": f"{name}: Could not be read ❌ ({e})", "seconds": time.perf_counter() - start}
+    return {"name": name, "ok": True, "data": data, "fingerprint": fingerprint, "message": f"{name}: Loaded ✅", "seconds": time.perf_counter() - start}
+
+
+def _get_read_pool() -> ThreadPoolExecutor:
+    global _read_pool
+    with _read_pool_lock:
+        if _read_pool is None:
+            _read_pool = ThreadPoolExecutor(max_workers=UPLOAD_READ_WORKERS, thread_name_prefix="upload-read")
+        return _read_pool
+
+
+def submit_upload(file_info, nrows: int = None, fingerprint: bool = True) -> Future:
+    """Queue `load_upload(file_info, ...)` on the shared bounded read pool."""
+    return _get_read_pool().submit(load_upload, file_info, nrows, fingerprint)
+
+
+def submit_bundle(file_info, file_types) -> Future:
+    """Queue `extract_bundle(file_info, file_types)` on the shared bounded read pool."""
+    return _get_read_pool().submit(extract_bundle, file_info, list(file_types))
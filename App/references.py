@@ -0,0 +1,89 @@
+import threading
+from pathlib import Path
+
+import pandas as pd
+
+from .exports import resolve_export_file
+
+# (export file, column) -> ((mtime_ns, size), frozenset of values)
+_reference_index = {}
+_reference_lock = threading.Lock()
+
+
+def _file_signature(path: Path):
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def reference_export_file(ref: dict, rules_map: dict) -> Path | None:
+    """
+    Resolve the export file behind a `references` spec:
+    {"file_type": ..., "column": ..., "sheet": optional sheet name}.
+    """
+    rules = rules_map.get(ref.get("file_type"), {})
+    if ref.get("sheet"):
+        rules = rules.get("sheets", {}).get(ref["sheet"], {})
+    export_path = rules.get("export_path")
+    return resolve_export_file(export_path) if export_path else None
+
+
+def _reference_specs(rules: dict):
+    for sub_rules in rules.get("sheets", {"": rules}).values():
+        for col, check in sub_rules.get("value_checks", {}).items():
+            if isinstance(check, dict) and "references" in check:
+                yield col, check["references"]
+
+
+def referenced_file_types(rules: dict) -> set:
+    """File types whose exports `rules` (and its sheets) reference."""
+    return {ref["file_type"] for _, ref in _reference_specs(rules)}
+
+
+def reference_signature(rules: dict, rules_map: dict) -> tuple:
+    """Signatures of every reference export used by `rules` (and its sheets); changes when any is re-exported."""
+    sigs = []
+    for col, ref in _reference_specs(rules):
+        path = reference_export_file(ref, rules_map)
+        sigs.append((col, str(path), _file_signature(path) if path else None))
+    return tuple(sigs)
+
+
+def reference_values(export_file: Path, column: str) -> frozenset | None:
+    """
+    Return the set of values in `column` of the exported reference file, or None if
+    it has not been exported yet. The set is built once and reused until the file's
+    mtime/size change, so each lookup is an O(1) hash probe.
+    """
+    signature = _file_signature(export_file)
+    if signature is None:
+        return None
+    cache_key = (str(export_file), column)
+    with _reference_lock:
+        cached = _reference_index.get(cache_key)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+    # Read outside the lock so lookups of other (cached) references are not held up
+    values = pd.read_csv(export_file, usecols=[column], dtype=str, keep_default_na=False)[column]
+    index = frozenset(values.unique())
+    with _reference_lock:
+        _reference_index[cache_key] = (signature, index)
+    return index
+
+
+def allowed_values(ref: dict, rules_map: dict):
+    """
+    (allowed values, source shown in messages) of a `references` spec: the values
+    of the referenced export, or the spec's `fallback` list while that export
+    does not exist yet. (None, None) when neither is available.
+    """
+    export_file = reference_export_file(ref, rules_map)
+    allowed = reference_values(export_file, ref["column"]) if export_file else None
+    if allowed is not None:
+        return allowed, f"{ref['file_type']}.{ref['column']}"
+    if ref.get("fallback") is not None:
+        fallback = set(ref["fallback"])
+        return fallback, sorted(map(str, fallback))
+    return None, None
@@ -0,0 +1,170 @@
+import csv
+import os
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .exports import EXCEL_MAX_ROWS
+from .validation import collect_violations
+
+# Upload rows turned into report rows per pass; only this slice is ever held as Python objects.
+REPORT_CHUNK_ROWS = 10_000
+REPORT_FORMATS = ("csv", "xlsx")
+# Fill of flagged cells in the annotated workbook (Excel's "bad" red).
+ERROR_FILL = "FFC7CE"
+CSV_HEADER = ["sheet", "row", "column", "value", "rule"]
+
+
+def error_sections(data, rules: dict, file_type: str = None) -> list:
+    """
+    Collect the violations of a fully read upload, per sheet:
+    [(sheet name or None, frame, [(column, mask, reason)])] (see `collect_violations`).
+    """
+    if "sheets" not in rules:
+        return [(None, *collect_violations(data, rules, file_type=file_type))]
+    if not isinstance(data, dict):
+        return [(None, pd.DataFrame(), [(None, None, f"Expected an Excel with sheets {list(rules['sheets'])}")])]
+    sections = []
+    for sheet_name, s_rules in rules["sheets"].items():
+        if sheet_name not in data:
+            sections.append((sheet_name, pd.DataFrame(), [(None, None, f"Missing required sheet '{sheet_name}'")]))
+            continue
+        sheet_type = f"{file_type}:{sheet_name}" if file_type else None
+        sections.append((sheet_name, *collect_violations(data[sheet_name], s_rules, file_type=sheet_type)))
+    return sections
+
+
+def _chunk_hits(df: pd.DataFrame, issues: list, start: int, stop: int) -> list:
+    """(position, column, value, reason) for every flagged cell in rows [start, stop), in row order."""
+    hits = []
+    for order, (col, mask, reason) in enumerate(issues):
+        positions = np.flatnonzero(mask[start:stop]) + start
+        if len(positions):
+            values = df[col].iloc[positions].tolist()
+            hits.extend((int(pos), order, col, value, reason) for pos, value in zip(positions, values))
+    hits.sort(key=lambda hit: hit[:2])
+    return [(pos, col, value, reason) for pos, _, col, value, reason in hits]
+
+
+def _cell_value(value):
+    return None if value is None or (not isinstance(value, str) and pd.isna(value)) else value
+
+
+def _bold(ws, value, font):
+    from openpyxl.cell import WriteOnlyCell
+
+    cell = WriteOnlyCell(ws, value=value)
+    cell.font = font
+    return cell
+
+
+def write_error_csv(sections: list, path) -> int:
+    """
+    Write one (sheet, row, column, value, rule) line per violation, file-level
+    problems first. Streams the masks `REPORT_CHUNK_ROWS` rows at a time.
+    Returns the number of lines written.
+    """
+    written = 0
+    with open(path, "w", newline="", encoding="utf-8") as fh:
+        writer = csv.writer(fh)
+        writer.writerow(CSV_HEADER)
+        for sheet, df, issues in sections:
+            for col, mask, reason in issues:
+                if mask is None:
+                    writer.writerow([sheet or "", "", col or "", "", reason])
+                    written += 1
+            row_issues = [issue for issue in issues if issue[1] is not None and issue[1].any()]
+            for start in range(0, len(df) if row_issues else 0, REPORT_CHUNK_ROWS):
+                hits = _chunk_hits(df, row_issues, start, min(start + REPORT_CHUNK_ROWS, len(df)))
+                writer.writerows([sheet or "", df.index[pos] + 1, col, _cell_value(value), reason] for pos, col, value, reason in hits)
+                written += len(hits)
+    return written
+
+
+def write_error_xlsx(sections: list, path) -> int:
+    """
+    Write a copy of the upload with every flagged cell highlighted and an
+    `Errors` column listing the row's violations, after a `Summary` sheet of
+    violation counts per column and rule. The workbook is built in openpyxl
+    write-only mode, `REPORT_CHUNK_ROWS` rows at a time; sheets longer than
+    Excel's row limit continue on `<sheet>_2`, ... Returns the number of flagged cells.
+    """
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font, PatternFill
+
+    wb = Workbook(write_only=True)
+    fill = PatternFill("solid", fgColor=ERROR_FILL)
+    bold = Font(bold=True)
+    summary = wb.create_sheet("Summary")
+    summary.append(["sheet", "column", "rule", "rows"])
+    flagged = 0
+    for sheet, _, issues in sections:
+        for col, mask, reason in issues:
+            count = int(mask.sum()) if mask is not None else None
+            if count != 0:
+                summary.append([sheet or "", col or "", reason, count])
+                flagged += count or 0
+
+    rows_per_sheet = EXCEL_MAX_ROWS - 1
+    for sheet, df, issues in sections:
+        title = str(sheet or "Data")[:28]
+        header = [*map(str, df.columns), "Errors"]
+        positions = {c: i for i, c in enumerate(df.columns)}
+        row_issues = [issue for issue in issues if issue[1] is not None and issue[1].any()]
+        ws = None
+        sheets = 0
+        rows_in_sheet = rows_per_sheet
+        for start in range(0, max(len(df), 1), REPORT_CHUNK_ROWS):
+            stop = min(start + REPORT_CHUNK_ROWS, len(df))
+            errors = {}
+            for pos, col, _, reason in _chunk_hits(df, row_issues, start, stop):
+                errors.setdefault(pos, []).append((col, reason))
+            chunk = df.iloc[start:stop].astype(object)
+            chunk = chunk.where(chunk.notna(), None)
+            for pos, row in enumerate(chunk.itertuples(index=False, name=None), start=start):
+                if rows_in_sheet >= rows_per_sheet:
+                    sheets += 1
+                    ws = wb.create_sheet(title if sheets == 1 else f"{title}_{sheets}")
+                    ws.append([_bold(ws, c, bold) for c in header])
+                    rows_in_sheet = 0
+                row_errors = errors.get(pos)
+                if row_errors:
+                    row = list(row)
+                    for col, _ in row_errors:
+                        cell = WriteOnlyCell(ws, value=row[positions[col]])
+                        cell.fill = fill
+                        row[positions[col]] = cell
+                    row.append("; ".join(f"{col} {reason}" for col, reason in row_errors))
+                ws.append(row)
+                rows_in_sheet += 1
+        if ws is None:
+            ws = wb.create_sheet(title)
+            ws.append([_bold(ws, c, bold) for c in header])
+
+    wb.save(path)
+    return flagged
+
+
+REPORT_WRITERS = {"csv": write_error_csv, "xlsx": write_error_xlsx}
+
+
+def build_error_report(data, rules: dict, fmt: str, file_type: str = None, dest_dir: str = None) -> tuple:
+    """
+    Write the error report of an upload as `fmt` ("csv" or "xlsx") to a new
+    temporary file. Returns (path, number of violations reported); the caller
+    removes the file once it has been sent.
+    """
+    if fmt not in REPORT_WRITERS:
+        raise ValueError(f"Unknown report format '{fmt}', expected one of {REPORT_FORMATS}")
+    sections = error_sections(data, rules, file_type=file_type)
+    fd, path = tempfile.mkstemp(prefix="error-report-", suffix=f".{fmt}", dir=dest_dir)
+    os.close(fd)
+    try:
+        count = REPORT_WRITERS[fmt](sections, path)
+    except Exception:
+        Path(path).unlink(missing_ok=True)
+        raise
+    return Path(path), count
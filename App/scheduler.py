@@ -0,0 +1,162 @@
+import itertools
+import os
+import threading
+import time
+
+# Process-wide limits for validation/export jobs. All sessions share one scheduler.
+VALIDATION_WORKERS = int(os.environ.get("VALIDATION_WORKERS", min(4, os.cpu_count() or 1)))
+VALIDATION_QUEUE_SIZE = int(os.environ.get("VALIDATION_QUEUE_SIZE", 50))
+VALIDATION_PER_USER_LIMIT = int(os.environ.get("VALIDATION_PER_USER_LIMIT", 2))
+VALIDATION_PER_TYPE_LIMIT = int(os.environ.get("VALIDATION_PER_TYPE_LIMIT", 2))
+# Seconds after which a queued job goes ahead of smaller ones, so large files cannot starve.
+VALIDATION_MAX_WAIT_S = float(os.environ.get("VALIDATION_MAX_WAIT_S", 60))
+
+
+class QueueFullError(Exception):
+    """Raised by `JobScheduler.submit` when the queue is at capacity."""
+
+
+class Job:
+    """A queued unit of work. `status` is one of queued, running, done, failed."""
+
+    def __init__(self, fn, user: str, file_type: str, size: int, label: str, targets=()):
+        self.fn = fn
+        self.user = user
+        self.file_type = file_type
+        self.size = size
+        self.label = label
+        self.targets = frozenset(targets)
+        self.status = "queued"
+        self.result = None
+        self.error = None
+        self.progress = {}
+        self.submitted_at = time.perf_counter()
+        self.started_at = None
+        self.finished_at = None
+
+    def done(self) -> bool:
+        return self.status in ("done", "failed")
+
+    def report(self, **progress):
+        """Record progress from inside the job; read by the session polling it."""
+        self.progress = {**self.progress, **progress}
+
+
+class JobScheduler:
+    """
+    Bounded worker pool for validation/export jobs.
+
+    Queued jobs are ordered by file size (smallest first, then submission order),
+    except that jobs queued for `max_wait` seconds or more come first, oldest
+    first. A worker takes the first queued job whose user and file type are both
+    under their concurrency limits and whose export targets no running job is
+    writing; jobs beyond `max_queue` are rejected on submit.
+    """
+
+    def __init__(self, workers: int, max_queue: int, per_user_limit: int, per_type_limit: int, max_wait: float = VALIDATION_MAX_WAIT_S):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.per_user_limit = per_user_limit
+        self.per_type_limit = per_type_limit
+        self.max_wait = max_wait
+        self._queue = []
+        self._running_by_user = {}
+        self._running_by_type = {}
+        self._running_targets = set()
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._threads = []
+
+    def _ensure_workers(self):
+        if self._threads:
+            return
+        for i in range(self.workers):
+            t = threading.Thread(target=self._worker, name=f"validation-worker-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def submit(self, fn, user: str, file_type: str, size: int = 0, label: str = "", targets=()) -> Job:
+        """Queue `fn(job)`; `targets` names the exports it writes, which no two jobs write at once."""
+        job = Job(fn, user, file_type, size or 0, label, targets)
+        with self._cond:
+            if len(self._queue) >= self.max_queue:
+                raise QueueFullError(f"Validation queue is full ({self.max_queue} jobs waiting). Please try again shortly.")
+            self._ensure_workers()
+            self._queue.append(((job.size, next(self._seq)), job))
+            self._queue.sort(key=lambda item: item[0])
+            self._cond.notify_all()
+        return job
+
+    def cancel(self, job: Job) -> bool:
+        """Drop a job that is still queued. Running jobs are left to finish."""
+        with self._cond:
+            for i, (_, queued) in enumerate(self._queue):
+                if queued is job:
+                    del self._queue[i]
+                    job.status = "failed"
+                    job.error = RuntimeError("Cancelled")
+                    return True
+        return False
+
+    def position(self, job: Job) -> int:
+        """1-based position of a queued job, or 0 once it has started."""
+        with self._cond:
+            for i, queued in enumerate(self._ordered()):
+                if queued is job:
+                    return i + 1
+        return 0
+
+    def _ordered(self) -> list:
+        # Caller holds `_cond`; `_queue` is kept sorted by (size, submission order)
+        now = time.perf_counter()
+        overdue = [item for item in self._queue if now - item[1].submitted_at >= self.max_wait]
+        overdue.sort(key=lambda item: item[0][1])
+        return [job for _, job in overdue] + [job for _, job in self._queue if now - job.submitted_at < self.max_wait]
+
+    def _next_runnable(self):
+        for job in self._ordered():
+            if self._running_by_user.get(job.user, 0) >= self.per_user_limit:
+                continue
+            if self._running_by_type.get(job.file_type, 0) >= self.per_type_limit:
+                continue
+            if job.targets & self._running_targets:
+                continue
+            self._queue = [item for item in self._queue if item[1] is not job]
+            return job
+        return None
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                job = self._next_runnable()
+                while job is None:
+                    self._cond.wait()
+                    job = self._next_runnable()
+                self._running_by_user[job.user] = self._running_by_user.get(job.user, 0) + 1
+                self._running_by_type[job.file_type] = self._running_by_type.get(job.file_type, 0) + 1
+                self._running_targets |= job.targets
+                job.status = "running"
+                job.started_at = time.perf_counter()
+            status = "failed"
+            try:
+                job.result = job.fn(job)
+                status = "done"
+            except Exception as e:
+                job.error = e
+            finally:
+                # Timings first: a poller that sees the job done reads them at once
+                job.finished_at = time.perf_counter()
+                with self._cond:
+                    self._running_by_user[job.user] -= 1
+                    self._running_by_type[job.file_type] -= 1
+                    self._running_targets -= job.targets
+                    job.status = status
+                    self._cond.notify_all()
+
+
+scheduler = JobScheduler(
+    workers=VALIDATION_WORKERS,
+    max_queue=VALIDATION_QUEUE_SIZE,
+    per_user_limit=VALIDATION_PER_USER_LIMIT,
+    per_type_limit=VALIDATION_PER_TYPE_LIMIT,
+)
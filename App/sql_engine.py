@@ -0,0 +1,599 @@
+import os
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+try:
+    import duckdb
+    import pyarrow.compute as pc
+except ImportError:
+    # Uploads over the memory budget are turned away, as without this engine
+    duckdb = None
+
+from .exports import export_validated_stream
+from .polars_engine import CSV_NULL_VALUES, UnsupportedRule, _duplicates_result, _key_value, _melt_layout, _names_labels, _shown
+from .readers import _csv_header, inferred_columns
+from .references import allowed_values, reference_export_file
+from .validation import (
+    DATE_INFERENCE_SAMPLE,
+    _check_header_dates,
+    _convert_user_fmt,
+    _expected_len_from_pyfmt,
+    _export_sink,
+    _parse_dates,
+    _parse_header_dates,
+    _report,
+    add_key_column,
+    constant_column,
+    infer_date_format,
+    validation_rules,
+)
+
+# Memory DuckDB may use per upload; larger aggregates and joins spill to `SQL_TEMP_DIR`.
+SQL_MEMORY_LIMIT_MB = int(os.environ.get("SQL_MEMORY_LIMIT_MB", 512))
+# Threads per SQL engine query.
+SQL_THREADS = int(os.environ.get("SQL_THREADS", min(4, os.cpu_count() or 1)))
+# Directory DuckDB spills to when a query needs more than `SQL_MEMORY_LIMIT_MB`.
+SQL_TEMP_DIR = os.environ.get("SQL_TEMP_DIR", os.path.join(tempfile.gettempdir(), "bulk-upload-sql"))
+# Rows per batch streamed from the export query to the export file.
+SQL_EXPORT_BATCH_ROWS = 100_000
+# Upload formats DuckDB queries in place.
+SQL_EXTENSIONS = {".csv", ".parquet"}
+# Whitespace `str.strip()` removes, as the characters argument of SQL `trim`.
+_WHITESPACE = "' ' || chr(9) || chr(10) || chr(11) || chr(12) || chr(13)"
+
+
+def use_sql(file_info, rules: dict, admitted: bool = True) -> bool:
+    """
+    Whether an upload is validated by the SQL engine: single-sheet rules on a CSV
+    or Parquet file, forced by the rule's `engine: "duckdb"`, else chosen when
+    the memory budget turns the upload away (`admitted` False). It is slower
+    than pandas on uploads that fit in memory, so it is never picked for speed.
+    """
+    if duckdb is None or "sheets" in rules or Path(file_info["name"]).suffix.lower() not in SQL_EXTENSIONS:
+        return False
+    return rules.get("engine") == "duckdb" or not admitted
+
+
+def _ident(name) -> str:
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _literal(value) -> str:
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def _strip(expr: str) -> str:
+    return f"trim({expr}, {_WHITESPACE})"
+
+
+def _number(text: str) -> str:
+    # DuckDB also reads digit separators ("1_000") as numbers; Arrow and pandas do not
+    return f"CASE WHEN contains({text}, '_') THEN NULL ELSE TRY_CAST({text} AS DOUBLE) END"
+
+
+def _title(values):
+    """`case: title` as an Arrow UDF: capitalise each word, lower-case the rest."""
+    return pc.utf8_title(values)
+
+
+def _connect():
+    Path(SQL_TEMP_DIR).mkdir(parents=True, exist_ok=True)
+    con = duckdb.connect(
+        config={
+            "memory_limit": f"{SQL_MEMORY_LIMIT_MB}MB",
+            "threads": SQL_THREADS,
+            "temp_directory": SQL_TEMP_DIR,
+            # Results come back in file order: melted rows and row numbers depend on it
+            "preserve_insertion_order": True,
+        }
+    )
+    con.create_function("utf8_title", _title, [duckdb.sqltype("VARCHAR")], duckdb.sqltype("VARCHAR"), type="arrow")
+    return con
+
+
+def _source(con, path, ext: str, rules: dict) -> list:
+    """
+    Define the view `upload` over the file itself: every column as text (the
+    `CSV_NULL_VALUES` as NULL) plus `__row__`, the 0-based data row. Nothing is
+    loaded; each query scans the file. Returns the column names.
+    """
+    if ext == ".parquet":
+        source = f"read_parquet({_literal(path)})"
+        header = [row[0] for row in con.execute(f"DESCRIBE SELECT * FROM {source}").fetchall()]
+    else:
+        skiprows = int(rules.get("skiprows", 0) or 0)
+        header = _csv_header(path, skiprows)
+        if len(set(header)) != len(header):
+            raise UnsupportedRule("repeated column names")
+        columns = ", ".join(f"{_literal(c)}: 'VARCHAR'" for c in header)
+        nulls = ", ".join(_literal(v) for v in CSV_NULL_VALUES)
+        source = (
+            f"read_csv({_literal(path)}, header = true, skip = {skiprows}, delim = ',', quote = '\"', escape = '\"', "
+            f"auto_detect = false, columns = {{{columns}}}, nullstr = [{nulls}])"
+        )
+    usecols = rules.get("usecols")
+    if usecols:
+        header = [c for c in header if c in usecols]
+    columns = ", ".join(f"CAST({_ident(c)} AS VARCHAR) AS {_ident(c)}" for c in header)
+    con.execute(f"CREATE VIEW upload AS SELECT row_number() OVER () - 1 AS __row__, {columns} FROM {source}")
+    return header
+
+
+def _kinds(con, columns: list):
+    """
+    (kinds, rows): the pandas dtype kind ("int", "float" or "str") the Arrow
+    reader would infer for each type-inferred column, as in
+    `polars_engine._kinds`, and the upload's row count, from one scan.
+    """
+    exprs = ["count(*)"]
+    for col in columns:
+        text = _strip(_ident(col))
+        exprs += [
+            f"coalesce(bool_and(regexp_full_match({text}, '-?[0-9]+')), true)",
+            f"coalesce(bool_and({_ident(col)} IS NULL OR {_number(text)} IS NOT NULL), true)",
+            f"count(*) - count({_ident(col)})",
+        ]
+    row = con.execute(f"SELECT {', '.join(exprs)} FROM upload").fetchone()
+    kinds = {}
+    for i, col in enumerate(columns):
+        is_int, is_num, nulls = row[1 + 3 * i : 4 + 3 * i]
+        kinds[col] = "int" if is_int and not nulls else "float" if is_num else "str"
+    return kinds, row[0]
+
+
+def _numeric_values(col: str, cfg: dict, textual: bool) -> str:
+    """SQL form of `polars_engine._numeric_values`."""
+    text = _strip(_ident(col))
+    if textual and cfg.get("thousands"):
+        text = f"replace({text}, {_literal(cfg['thousands'])}, '')"
+    if textual and cfg.get("percent"):
+        value = _number(f"rtrim({text}, '%')")
+        return f"CASE WHEN ends_with({text}, '%') THEN {value} / 100 ELSE {value} END"
+    return _number(text)
+
+
+def _numeric_masks(col: str, arr: str, cfg: dict) -> list:
+    """SQL form of `validation._numeric_masks` for `col` coerced to `arr` (its `__num__` column)."""
+    present = f"({arr} IS NOT NULL AND NOT isnan({arr}))"
+    masks = [(f"NOT {present} AND {_ident(col)} IS NOT NULL", "has invalid numeric format")]
+    if cfg.get("min") is not None:
+        masks.append((f"{present} AND {arr} < {cfg['min']}", f"is below the minimum {cfg['min']}"))
+    if cfg.get("max") is not None:
+        masks.append((f"{present} AND {arr} > {cfg['max']}", f"is above the maximum {cfg['max']}"))
+    if cfg.get("integer"):
+        masks.append((f"{present} AND {arr} != floor({arr})", "is not a whole number"))
+    if cfg.get("decimals") is not None:
+        scaled = f"({arr} * {10 ** cfg['decimals']})"
+        masks.append((f"{present} AND abs({scaled} - round({scaled})) > greatest(1e-6, abs({scaled}) * 1e-12)", f"has more than {cfg['decimals']} decimal places"))
+    return masks
+
+
+def _string_masks(col: str, cfg: dict):
+    """SQL form of `validation._string_masks`. Returns ([(mask, reason)], normalized expression)."""
+    text = _ident(col)
+    if cfg.get("strip"):
+        text = _strip(text)
+    case = cfg.get("case")
+    if case == "upper":
+        text = f"upper({text})"
+    elif case == "lower":
+        text = f"lower({text})"
+    elif case == "title":
+        text = f"utf8_title({text})"
+    masks = []
+    pattern = cfg.get("pattern")
+    if pattern:
+        masks.append((f"NOT regexp_full_match({text}, {_literal(f'^(?:{pattern})$')})", f"does not match pattern '{pattern}'"))
+    if cfg.get("min_length") is not None:
+        masks.append((f"length({text}) < {cfg['min_length']}", f"is shorter than {cfg['min_length']} characters"))
+    if cfg.get("max_length") is not None:
+        masks.append((f"length({text}) > {cfg['max_length']}", f"is longer than {cfg['max_length']} characters"))
+    return masks, text
+
+
+def _normalized_upload(header: list, rules: dict) -> str:
+    """`upload` with the `strip` / `case` normalisation of `string_checks` applied, as `validation.normalize_strings`."""
+    normalized = []
+    for col, cfg in rules.get("string_checks", {}).items():
+        if col in header and rules.get("types", {}).get(col) == "string" and (cfg.get("strip") or cfg.get("case")):
+            normalized.append(f"{_string_masks(col, {'strip': cfg.get('strip'), 'case': cfg.get('case')})[1]} AS {_ident(col)}")
+    return f"(SELECT * REPLACE ({', '.join(normalized)}) FROM upload)" if normalized else "upload"
+
+
+def _date_format(con, col: str, col_cfg, cache_key=None):
+    """
+    (strptime format, format as reported) of a date column: the declared one, or
+    one inferred from the first `DATE_INFERENCE_SAMPLE` distinct values, as the
+    pandas engine samples them. A column with no recognisable format needs the
+    pandas engine's per-value parsing.
+    """
+    fmt = col_cfg.get("format") if isinstance(col_cfg, dict) else None
+    if fmt:
+        return _convert_user_fmt(fmt), fmt
+    text = _strip(_ident(col))
+    sample = con.execute(
+        f"SELECT value FROM (SELECT {text} AS value, min(__row__) AS first FROM upload WHERE {_ident(col)} IS NOT NULL GROUP BY value) "
+        f"ORDER BY first LIMIT {DATE_INFERENCE_SAMPLE}"
+    ).fetchall()
+    py_fmt = infer_date_format(pd.Series([v for (v,) in sample], dtype=object), cache_key)
+    if not py_fmt:
+        raise UnsupportedRule(f"no date format recognised in column '{col}'")
+    return py_fmt, f"{py_fmt} (inferred)"
+
+
+def _date_mask(col: str, py_fmt: str, declared: bool) -> str:
+    """SQL form of `validation._date_mask`: declared formats are matched on as many characters as they need."""
+    text = _ident(col)
+    sample_len = _expected_len_from_pyfmt(py_fmt) if declared else None
+    if sample_len:
+        text = f"left({text}, {sample_len})"
+    return f"try_strptime({_strip(text)}, {_literal(py_fmt)}) IS NULL AND {_ident(col)} IS NOT NULL"
+
+
+def _value_mask(values: str, check):
+    """
+    SQL form of `validation._value_mask`. A reference is matched against its
+    export file, read by DuckDB in the query itself; its `fallback` list (while
+    that file does not exist yet) is matched like a value list.
+    """
+    if check == "not_null":
+        return f"{values} IS NULL", "has empty values"
+    if isinstance(check, dict) and "references" in check:
+        ref = check["references"]
+        export_file = reference_export_file(ref, validation_rules)
+        if export_file is not None and export_file.exists():
+            # Read as text with empty fields kept as '', as `references.reference_values` reads it
+            reference = (
+                f"SELECT COALESCE({_ident(ref['column'])}, '') FROM read_csv({_literal(str(export_file))}, header = true, "
+                f"delim = ',', quote = '\"', escape = '\"', all_varchar = true)"
+            )
+            return f"{values} IS NOT NULL AND {values} NOT IN ({reference})", f"has values not in {ref['file_type']}.{ref['column']}"
+        allowed, source = allowed_values(ref, validation_rules)
+        if allowed is None:
+            return None, f"references {ref['file_type']}.{ref['column']}, which has not been exported yet. Upload {ref['file_type']} first."
+    elif isinstance(check, (list, tuple, set)):
+        allowed, source = check, sorted(map(str, set(check)))
+    else:
+        return None, None
+    allowed = sorted(v for v in allowed if isinstance(v, str))
+    mask = f"{values} IS NOT NULL AND {values} NOT IN ({', '.join(map(_literal, allowed))})" if allowed else f"{values} IS NOT NULL"
+    return mask, f"has values not in {source}"
+
+
+def _first_hits(con, checks: list, numeric: dict) -> list:
+    """
+    Evaluate row checks together: `checks` holds (column, mask, value, per_value)
+    tuples of SQL, or None; `numeric` maps `__num__` column names to their SQL.
+    Numeric checks run row-wise in one aggregate scan; `per_value` checks (text,
+    dates, value lists) run once per distinct value of their column, every
+    column grouped in one more scan (GROUPING SETS). Returns [(position, value)]
+    of each check's first flagged row, (None, None) when nothing is flagged.
+    """
+    row_wise, per_column = [], {}
+    for i, check in enumerate(checks):
+        if check is not None:
+            col, mask, value, per_value = check
+            (per_column.setdefault(col, []) if per_value else row_wise).append((i, mask, value))
+    hits = [(None, None)] * len(checks)
+    if row_wise:
+        work = ", ".join(["*"] + [f"{expr} AS {_ident(name)}" for name, expr in numeric.items()])
+        inner = ", ".join(f"({mask}) AS __m{i}, {value} AS __v{i}" for i, mask, value in row_wise)
+        outer = ", ".join(f"min(__row__) FILTER (WHERE __m{i}), arg_min(__v{i}, __row__) FILTER (WHERE __m{i})" for i, _, _ in row_wise)
+        row = con.execute(f"SELECT {outer} FROM (SELECT __row__, {inner} FROM (SELECT {work} FROM upload))").fetchone()
+        for k, (i, _, _) in enumerate(row_wise):
+            hits[i] = (row[2 * k], row[2 * k + 1])
+    if per_column:
+        columns = list(per_column)
+        keys = ", ".join(_ident(c) for c in columns)
+        groups = ", ".join(f"GROUPING({_ident(c)}) AS __g{g}" for g, c in enumerate(columns))
+        distinct = f"SELECT {keys}, {groups}, min(__row__) AS __row__ FROM upload GROUP BY GROUPING SETS ({', '.join(f'({_ident(c)})' for c in columns)})"
+        col_checks = [(g, i, mask, value) for g, c in enumerate(columns) for i, mask, value in per_column[c]]
+        # Each grouping set's rows hold NULL in the other columns; a check only counts its own set
+        inner = ", ".join(f"__g{g} = 0 AND ({mask}) AS __m{i}, {value} AS __v{i}" for g, i, mask, value in col_checks)
+        outer = ", ".join(f"min(__row__) FILTER (WHERE __m{i}), arg_min(__v{i}, __row__) FILTER (WHERE __m{i})" for _, i, _, _ in col_checks)
+        row = con.execute(f"SELECT {outer} FROM (SELECT __row__, {inner} FROM ({distinct}))").fetchone()
+        for k, (_, i, _, _) in enumerate(col_checks):
+            hits[i] = (row[2 * k], row[2 * k + 1])
+    return hits
+
+
+def _duplicate_groups(con, key_cols: list, source: str = "upload", max_groups: int = 5, max_rows: int = 10):
+    """
+    (groups, total): the first `max_groups` keys repeated in `source` (the upload,
+    or a query over it), in order of first occurrence, as (key values, first
+    `max_rows` row positions, row count), and the number of repeated keys. Only
+    those groups' rows are fetched.
+    """
+    keys = ", ".join(_ident(k) for k in key_cols)
+    con.execute(
+        f"CREATE OR REPLACE TEMP TABLE __dups AS SELECT {keys}, count(*) AS __n, min(__row__) AS __first, count(*) OVER () AS __total "
+        f"FROM {source} GROUP BY {keys} HAVING count(*) > 1 ORDER BY __first LIMIT {max_groups}"
+    )
+    dups = con.execute(f"SELECT {keys}, __n, __first, __total FROM __dups ORDER BY __first").fetchall()
+    if not dups:
+        return [], 0
+    on = " AND ".join(f"u.{_ident(k)} IS NOT DISTINCT FROM d.{_ident(k)}" for k in key_cols)
+    rows = {}
+    for first, row in con.execute(
+        f"SELECT d.__first, u.__row__ FROM {source} u JOIN __dups d ON {on} "
+        f"QUALIFY row_number() OVER (PARTITION BY d.__first ORDER BY u.__row__) <= {max_rows} ORDER BY d.__first, u.__row__"
+    ).fetchall():
+        rows.setdefault(first, []).append(row)
+    n_keys = len(key_cols)
+    return [(d[:n_keys], rows[d[n_keys + 1]], d[n_keys]) for d in dups], dups[0][-1]
+
+
+def _check_upload(con, header: list, rules: dict, file_id: str, kinds: dict, n_rows: int, formats: dict, file_type: str = None):
+    """
+    `validation.validate_single_file` as SQL over the file: the same checks, in
+    the same order, as `polars_engine._check_frame`, so the first failure (and
+    its message) is the same. All row checks take two scans (see `_first_hits`);
+    the date formats used are kept in `formats` for the export. A failed result
+    is returned, else None.
+    """
+    expected_columns = rules["columns"]
+    if not set(expected_columns).issubset(set(header)):
+        return {"valid": False, "message": f"{file_id}: Invalid columns. Expected {expected_columns}, got {header}"}
+    if rules.get("transform_config", {}).get("type") == "columns":
+        res = _check_header_dates(header, rules, file_id)
+        if res is not None:
+            return res
+
+    numeric_cfg = rules.get("numeric_checks", {})
+    string_cfg = rules.get("string_checks", {})
+    date_columns_cfg = rules.get("date_columns", {})
+    numeric = {f"__num__{c}": _numeric_values(c, numeric_cfg.get(c, {}), kinds.get(c, "str") == "str") for c, t in rules["types"].items() if t == "numeric" and c in header}
+    normalized = {}
+    # (row check, message, kind of the shown value) in the pandas engine's order; a None
+    # check fails outright, a None kind reports the row only
+    checks = []
+    for col, expected_type in rules["types"].items():
+        if col not in header:
+            continue
+        kind = kinds.get(col, "str")
+        if expected_type == "numeric":
+            for mask, reason in _numeric_masks(col, _ident(f"__num__{col}"), numeric_cfg.get(col, {})):
+                checks.append(((col, mask, _ident(col), False), f"{file_id}: Column '{col}' {reason}", kind))
+        elif kind != "str":
+            raise UnsupportedRule(f"column '{col}' is read as numbers but checked as {expected_type}")
+        elif expected_type == "string" and string_cfg.get(col):
+            masks, normalized[col] = _string_masks(col, string_cfg[col])
+            for mask, reason in masks:
+                checks.append(((col, mask, _ident(col), True), f"{file_id}: Column '{col}' {reason}", kind))
+        elif expected_type == "date":
+            col_cfg = date_columns_cfg.get(col, {})
+            py_fmt, fmt = formats[col] = _date_format(con, col, col_cfg, (file_type, col) if file_type else None)
+            mask = _date_mask(col, py_fmt, declared=isinstance(col_cfg, dict) and bool(col_cfg.get("format")))
+            checks.append(((col, mask, _ident(col), True), f"{file_id}: Column '{col}' has invalid date format. Expected format '{fmt}'", kind))
+
+    for col, check in rules.get("value_checks", {}).items():
+        if col not in header:
+            continue
+        if check != "not_null" and kinds.get(col, "str") != "str":
+            raise UnsupportedRule(f"value check on numeric column '{col}'")
+        values = normalized.get(col, _ident(col))
+        mask, reason = _value_mask(values, check)
+        if mask is None:
+            if reason:
+                checks.append((None, f"{file_id}: Column '{col}' {reason}", None))
+        elif check == "not_null":
+            checks.append(((col, mask, values, True), f"{file_id}: Column '{col}' has empty values", None))
+        else:
+            checks.append(((col, mask, values, True), f"{file_id}: Column '{col}' {reason}", "str"))
+
+    for (check, message, kind), (pos, value) in zip(checks, _first_hits(con, [c for c, _, _ in checks], numeric)):
+        if check is None:
+            return {"valid": False, "message": message}
+        if pos is not None:
+            found = f"First at row {pos + 1}" if kind is None else f"Found '{_shown(value, kind)}' at row {pos + 1}"
+            return {"valid": False, "message": f"{message}. {found}"}
+
+    unique_keys = rules.get("unique_keys", [])
+    if unique_keys and set(unique_keys).issubset(set(header)):
+        groups, total = _duplicate_groups(con, unique_keys, _normalized_upload(header, rules))
+        if groups:
+            shown = [(tuple(_key_value(v, kinds.get(k, "str")) for k, v in zip(unique_keys, key)), rows, count) for key, rows, count in groups]
+            return _duplicates_result(shown, unique_keys, file_id, total)
+    return _check_melted(con, header, rules, file_id, kinds, n_rows)
+
+
+def _check_melted(con, header: list, rules: dict, file_id: str, kinds: dict, n_rows: int):
+    """`polars_engine._check_melted` in SQL: value columns are checked in place and melted row numbers derived."""
+    layout = _melt_layout(header, rules)
+    if layout is None:
+        return None
+    id_vars, value_vars, names_to, values_to = layout["id_vars"], layout["value_vars"], layout["names_to"], layout["values_to"]
+    file_id = f"{file_id} (after transform)"
+
+    if rules.get("types", {}).get(values_to) == "numeric" and values_to not in header:
+        value_kinds = [kinds.get(c, "str") for c in value_vars]
+        # Melted, mixed text and numbers become one object column; numbers share the widest dtype
+        textual = "str" in value_kinds
+        melted_kind = None if textual else ("float" if "float" in value_kinds else "int")
+        cfg = rules.get("numeric_checks", {}).get(values_to, {})
+        numeric = {f"__num__{c}": _numeric_values(c, cfg, textual) for c in value_vars}
+        per_column = [_numeric_masks(c, _ident(f"__num__{c}"), cfg) for c in value_vars]
+        reasons = [reason for _, reason in per_column[0]] if per_column else []
+        hits = _first_hits(con, [(c, masks[r][0], _ident(c), False) for r in range(len(reasons)) for c, masks in zip(value_vars, per_column)], numeric)
+        for r, reason in enumerate(reasons):
+            for j, (pos, value) in enumerate(hits[r * len(value_vars) : (r + 1) * len(value_vars)]):
+                if pos is not None:
+                    shown = _shown(value, melted_kind or value_kinds[j])
+                    return {"valid": False, "message": f"{file_id}: Column '{values_to}' {reason}. Found '{shown}' at row {j * n_rows + pos + 1}"}
+
+    unique_keys = rules.get("unique_keys", [])
+    if not unique_keys or set(unique_keys).issubset(set(header)):
+        return None
+    if values_to in unique_keys:
+        raise UnsupportedRule(f"unique key on the melted '{values_to}' column")
+    if not set(unique_keys).issubset(set(id_vars) | {names_to}):
+        return None
+    id_keys = [k for k in unique_keys if k != names_to]
+    # Header labels are distinct, so melted keys repeat exactly where the id keys do, once per value column
+    groups, total = _duplicate_groups(con, id_keys, _normalized_upload(header, rules)) if id_keys else ([], 0)
+    if not groups or not value_vars:
+        return None
+    labels = _names_labels(value_vars, rules)
+    shown = []
+    for j, label in enumerate(labels):
+        for key, rows, count in groups:
+            values = dict(zip(id_keys, (_key_value(v, kinds.get(k, "str")) for k, v in zip(id_keys, key))), **{names_to: label})
+            shown.append((tuple(values[k] for k in unique_keys), [j * n_rows + r for r in rows], count))
+            if len(shown) == 5:
+                break
+        if len(shown) == 5:
+            break
+    return _duplicates_result(shown, unique_keys, file_id, total * len(value_vars))
+
+
+def _export_query(con, header: list, rules: dict, kinds: dict, formats: dict, file_type: str = None):
+    """
+    The SQL producing the frame the pandas engine exports, and how to finish each
+    batch of it: inferred columns cast to their pandas dtype, date columns
+    normalised to ISO text ("" where unparsed) as `_normalize_dates_for_export`
+    does, and for `columns` / `multi_ids` rules one SELECT per value column
+    joined by UNION ALL, which stacks them in `melt`'s order. Returns (sql,
+    names_to column, values_to column when it mixes text and numbers, the
+    names_to labels, whether they form a categorical).
+    """
+    date_columns_cfg = rules.get("date_columns", {})
+    types_map = rules.get("types", {})
+
+    def column(col):
+        kind = kinds.get(col, "str")
+        if col in date_columns_cfg or types_map.get(col) == "date":
+            if kind != "str":
+                raise UnsupportedRule(f"date column '{col}' is read as numbers")
+            if col not in formats:
+                formats[col] = _date_format(con, col, date_columns_cfg.get(col, {}), (file_type, col) if file_type else None)
+            parsed = f"try_strptime({_strip(_ident(col))}, {_literal(formats[col][0])})"
+            return f"coalesce(strftime({parsed}, '%Y-%m-%d'), '')"
+        if kind == "int":
+            return f"CAST({_strip(_ident(col))} AS BIGINT)"
+        if kind == "float":
+            return _number(_strip(_ident(col)))
+        return _ident(col)
+
+    # `string_checks` columns are exported normalised
+    source = _normalized_upload(header, rules)
+    layout = _melt_layout(header, rules)
+    if layout is None:
+        return f"SELECT {', '.join(f'{column(c)} AS {_ident(c)}' for c in header)} FROM {source}", None, None, None, False
+    id_vars, value_vars, names_to, values_to = layout["id_vars"], layout["value_vars"], layout["names_to"], layout["values_to"]
+    transform = rules["transform_config"]["type"]
+    value_kinds = {kinds.get(c, "str") for c in value_vars}
+    # Text among the value columns: pandas melts them to an object column of mixed values,
+    # which hash and print as their text (see `_export`)
+    value_type = "VARCHAR" if "str" in value_kinds else "DOUBLE" if "float" in value_kinds else "BIGINT"
+    labels = list(value_vars)
+    categorical = False
+    if transform == "columns":
+        fmt = rules["transform_config"].get("column_format")
+        parsed = _parse_header_dates(tuple(value_vars), fmt) if fmt and value_vars else None
+        if parsed is not None and not parsed.hasnans and not parsed.has_duplicates:
+            # `_with_header_dates`: the parsed header dates, as a categorical
+            labels, categorical = list(parsed.strftime("%Y-%m-%d")), True
+        else:
+            parsed, _ = _parse_dates(pd.Series(labels, dtype=object), cache_key=(file_type, names_to) if file_type else None)
+            labels = list(parsed.dt.strftime("%Y-%m-%d").fillna(""))
+    ids = ", ".join(f"{column(c)} AS {_ident(c)}" for c in id_vars)
+    selects = [
+        f"SELECT {ids + ', ' if ids else ''}{j} AS {_ident(names_to)}, CAST({column(c)} AS {value_type}) AS {_ident(values_to)} FROM {source}"
+        for j, c in enumerate(value_vars)
+    ]
+    return " UNION ALL ".join(selects), names_to, values_to if value_type == "VARCHAR" else None, labels, categorical
+
+
+def _export(con, header: list, rules: dict, kinds: dict, n_rows: int, formats: dict, file_id, filename, remarks=None, progress=None, source_hash=None, file_type=None):
+    """
+    `validation.export_single` without the frame: the export query's result is
+    streamed in `SQL_EXPORT_BATCH_ROWS` batches, each finished in pandas (melted
+    labels, key, `Remarks`, `Last Update`) and appended to the export file.
+    """
+    export_path = rules.get("export_path", None)
+    if not export_path:
+        return {"valid": False, "message": f"{file_id}: File is valid ✅ but no export path defined ❌", "warning": "Export skipped"}
+    sql, names_to, mixed, labels, categorical = _export_query(con, header, rules, kinds, formats, file_type)
+    file_key = add_key_column(None, filename)
+    updated = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    total = n_rows * (len(labels) if names_to else 1)
+    _report(progress, stage="exporting", rows=total, fraction=0.8)
+
+    def finish(df):
+        if names_to:
+            codes = df[names_to].to_numpy(np.int32)
+            if categorical:
+                df[names_to] = pd.Categorical.from_codes(codes, categories=labels)
+            else:
+                df[names_to] = pd.array(np.asarray(labels, dtype=object)[codes], dtype="str")
+        if mixed:
+            values = df[mixed].astype(object)
+            df[mixed] = values.where(values.notna(), np.nan)
+        df["key"] = constant_column(file_key, len(df))
+        df["Remarks"] = constant_column(remarks or "", len(df))
+        df["Last Update"] = constant_column(updated, len(df))
+        return df
+
+    def frames():
+        reader = con.execute(sql).to_arrow_reader(SQL_EXPORT_BATCH_ROWS)
+        done = 0
+        for batch in reader:
+            if batch.num_rows:
+                done += batch.num_rows
+                yield finish(batch.to_pandas())
+                _report(progress, stage="exporting", rows=total, fraction=0.8 + 0.2 * done / max(total, 1))
+        if not done:
+            yield finish(reader.schema.empty_table().to_pandas())
+
+    stats = {}
+    success, export_msg = export_validated_stream(frames(), export_path, file_id, export_func=rules.get("export_func"), sink=_export_sink(rules), stats=stats, source_hash=source_hash)
+    if not success:
+        return {"valid": success, "message": export_msg, "warning": "Export failed"}
+    result = {"valid": success, "message": export_msg, "key": file_key}
+    if stats:
+        result["export"] = stats
+    return result
+
+
+def validate_file_sql(file_info, rules: dict, file_id, filename, remarks: str = None, progress=None, source_hash: str = None, file_type: str = None):
+    """
+    Validate, transform and export a single-sheet CSV or Parquet upload out of
+    core: DuckDB queries the uploaded file in place, every rule compiles to SQL
+    (row checks in two aggregate scans), and the validated, melted result is
+    streamed in batches straight to the export file. Memory stays within
+    `SQL_MEMORY_LIMIT_MB` (plus one batch) whatever the file size. Messages and
+    exports match `validate_file`.
+
+    Returns (result, rows read). Raises UnsupportedRule when the upload or rule
+    needs an in-memory engine.
+    """
+    if duckdb is None:
+        raise UnsupportedRule("duckdb is not installed")
+    if "sheets" in rules:
+        raise UnsupportedRule("multi-sheet rules")
+    ext = Path(file_info["name"]).suffix.lower()
+    if ext not in SQL_EXTENSIONS:
+        raise UnsupportedRule(f"{ext} uploads")
+    _report(progress, stage="reading", fraction=0.0)
+    con = _connect()
+    try:
+        try:
+            header = _source(con, file_info["datapath"], ext, rules)
+            kinds, n_rows = _kinds(con, [c for c in header if c in inferred_columns(header, rules)])
+        except (duckdb.IOException, duckdb.InvalidInputException, duckdb.ConversionException, UnicodeDecodeError, OSError) as e:
+            # DuckDB appends parser hints to CSV errors; the error itself is enough here
+            detail = str(e).split("Possible fixes")[0].strip()
+            return {"valid": False, "message": f"{file_info['name']}: Could not be read ❌ ({detail})"}, None
+        _report(progress, stage="types", rows=n_rows, fraction=0.2)
+        formats = {}
+        res = _check_upload(con, header, rules, file_id, kinds, n_rows, formats, file_type)
+        _report(progress, stage="validated", violations=0 if res is None else 1)
+        if res is not None:
+            return res, n_rows
+        return _export(con, header, rules, kinds, n_rows, formats, file_id, filename, remarks=remarks, progress=progress, source_hash=source_hash, file_type=file_type), n_rows
+    finally:
+        con.close()
@@ -0,0 +1,67 @@
+import zipfile
+
+from App.bundles import extract_bundle
+
+FILE_TYPES = ["patch_mapping", "fte"]
+
+
+def _bundle(tmp_path, members: dict):
+    path = tmp_path / "upload.zip"
+    with zipfile.ZipFile(path, "w") as zf:
+        for name, text in members.items():
+            zf.writestr(name, text)
+    (tmp_path / "out").mkdir()
+    return {"name": path.name, "datapath": str(path)}
+
+
+def test_members_in_folders_are_flattened(tmp_path):
+    bundle = extract_bundle(_bundle(tmp_path, {"week1/patch_mapping.csv": "wmis,region\nA,North\n"}), FILE_TYPES, str(tmp_path / "out"))
+    assert bundle["ok"]
+    assert [(m["name"], m["file_type"]) for m in bundle["members"]] == [("patch_mapping.csv", "patch_mapping")]
+
+
+def test_duplicate_names_across_folders_are_rejected(tmp_path):
+    members = {"week1/fte.csv": "week,job_type,fte_count\n", "week2/fte.csv": "week,job_type,fte_count\n"}
+    bundle = extract_bundle(_bundle(tmp_path, members), FILE_TYPES, str(tmp_path / "out"))
+    assert not bundle["ok"]
+    assert "week1/fte.csv and week2/fte.csv have the same file name" in bundle["message"]
+    assert not (tmp_path / "out").exists()
+
+
+def test_manifest_files_must_be_a_mapping(tmp_path):
+    members = {"fte.csv": "week,job_type,fte_count\n", "manifest.json": '{"files": ["fte.csv"]}'}
+    bundle = extract_bundle(_bundle(tmp_path, members), FILE_TYPES, str(tmp_path / "out"))
+    assert not bundle["ok"]
+    assert '"files" must map file names to file types' in bundle["message"]
+
+
+def _patch_member(path, local_offset: int, central_offset: int, value: int):
+    # Overwrite one 2-byte field of the archive's single member in both its headers
+    data = bytearray(path.read_bytes())
+    for header, offset in ((b"PK\x03\x04", local_offset), (b"PK\x01\x02", central_offset)):
+        at = data.find(header) + offset
+        data[at : at + 2] = value.to_bytes(2, "little")
+    path.write_bytes(bytes(data))
+
+
+def test_encrypted_member_is_reported(tmp_path):
+    info = _bundle(tmp_path, {"fte.csv": "week,job_type,fte_count\n"})
+    # General purpose flag bit 0: encrypted
+    _patch_member(tmp_path / "upload.zip", 6, 8, 0x1)
+    bundle = extract_bundle(info, FILE_TYPES, str(tmp_path / "out"))
+    assert not bundle["ok"]
+    assert "encrypted" in bundle["message"]
+
+
+def test_unsupported_compression_is_reported(tmp_path):
+    info = _bundle(tmp_path, {"fte.csv": "week,job_type,fte_count\n"})
+    _patch_member(tmp_path / "upload.zip", 8, 10, 99)
+    bundle = extract_bundle(info, FILE_TYPES, str(tmp_path / "out"))
+    assert not bundle["ok"]
+    assert "compression method" in bundle["message"]
+
+
+def test_parquet_members_are_extracted(tmp_path):
+    bundle = extract_bundle(_bundle(tmp_path, {"fte.parquet": b"PAR1"}), FILE_TYPES, str(tmp_path / "out"))
+    assert bundle["ok"]
+    assert [(m["name"], m["file_type"]) for m in bundle["members"]] == [("fte.parquet", "fte")]
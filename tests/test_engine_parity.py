@@ -0,0 +1,27 @@
+import pytest
+
+from App import exports
+from App.engine_parity import MUTATIONS, check_parity, csv_types, engines
+
+pytestmark = pytest.mark.skipif(len(engines()) < 2, reason="neither polars nor duckdb is installed")
+
+
+@pytest.fixture(scope="module")
+def parity(tmp_path_factory):
+    export_dir = exports.EXPORT_DIR
+    try:
+        return check_parity(csv_types(), tmp_path_factory.mktemp("parity"))
+    finally:
+        exports.EXPORT_DIR = export_dir
+
+
+def test_every_mutation_is_checked(parity):
+    cases = {r["case"] for r in parity}
+    for value in MUTATIONS:
+        assert any(case.endswith(f"={value!r}") for case in cases), value
+
+
+@pytest.mark.parametrize("file_type", csv_types())
+def test_engines_match_pandas(parity, file_type):
+    mismatches = {r["case"]: {engine: r[engine]["message"] for engine in engines()} for r in parity if r["file_type"] == file_type and not r["match"]}
+    assert not mismatches
@@ -0,0 +1,172 @@
+import json
+import sqlite3
+from datetime import datetime
+
+import openpyxl
+import pandas as pd
+import pytest
+
+from App import exports, validation
+from App.samples import create_sample_file
+from App.validation import constant_column, validate_file, validation_rules
+
+
+@pytest.fixture(autouse=True)
+def export_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(exports, "EXPORT_DIR", tmp_path)
+    return tmp_path
+
+
+def _load(key, remarks, last_update="2025-01-06 09:00:00"):
+    df = pd.DataFrame({"wmis": ["A", "B"], "region": ["North", "South"]})
+    df["key"] = constant_column(key, len(df))
+    df["Remarks"] = constant_column(remarks, len(df))
+    df["Last Update"] = constant_column(last_update, len(df))
+    return df
+
+
+def _export(df, stream=False):
+    if stream:
+        return exports.export_validated_stream(iter([df]), "./exports/patch_mapping.csv", "pm", export_func="export_patch_mapping")
+    return exports.export_validated_file(df, "./exports/patch_mapping.csv", "pm", export_func="export_patch_mapping")
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_identical_load_is_not_rewritten(export_dir, stream):
+    assert _export(_load("pm_1", "first"), stream)[1] == "pm: Successfully validated ✅ and exported ✅"
+    ok, message = _export(_load("pm_1", "first"), stream)
+    assert ok
+    assert "unchanged, not rewritten" in message
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_remarks_only_change_updates_manifest_only(export_dir, stream):
+    _export(_load("pm_1", "first"), stream)
+    ok, message = _export(_load("pm_2", "second", "2025-01-06 10:00:00"), stream)
+    assert ok
+    assert "unchanged, not rewritten" in message
+    written = pd.read_csv(export_dir / "patch_mapping.csv", dtype=str)
+    assert set(written["Remarks"]) == {"first"}
+    entry = exports.read_manifest(export_dir)["targets"]["patch_mapping.csv"]
+    assert entry["key"] == "pm_2"
+    assert entry["batch"] == {"key": "pm_2", "Remarks": "second", "Last Update": "2025-01-06 10:00:00"}
+    assert entry["written_batch"]["key"] == "pm_1"
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_changed_rows_are_written(export_dir, stream):
+    _export(_load("pm_1", "first"), stream)
+    df = _load("pm_2", "second")
+    df.loc[0, "region"] = "East"
+    assert _export(df, stream)[1] == "pm: Successfully validated ✅ and exported ✅"
+    written = pd.read_csv(export_dir / "patch_mapping.csv", dtype=str)
+    assert list(written["region"]) == ["East", "South"]
+    assert set(written["key"]) == {"pm_2"}
+    assert exports.read_manifest(export_dir)["targets"]["patch_mapping.csv"]["written_batch"]["key"] == "pm_2"
+
+
+def test_revalidating_later_does_not_rewrite(export_dir, monkeypatch):
+    df = create_sample_file("patch_mapping")
+    rules = validation_rules["patch_mapping"]
+    stamps = iter([datetime(2025, 1, 6, 9, 0, 0)] * 2 + [datetime(2025, 1, 6, 9, 0, 2)] * 2 + [datetime(2025, 1, 6, 9, 0, 5)] * 10)
+
+    class Clock(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return next(stamps)
+
+    monkeypatch.setattr(validation, "datetime", Clock)
+    first = validate_file(df, rules, "pm", "patch_mapping.csv", file_type="patch_mapping")
+    assert first["message"] == "pm: Successfully validated ✅ and exported ✅"
+    written_at = (export_dir / "patch_mapping.csv").stat().st_mtime_ns
+    second = validate_file(df, rules, "pm", "patch_mapping.csv", file_type="patch_mapping")
+    assert second["valid"]
+    assert "unchanged, not rewritten" in second["message"]
+    assert second["key"] != first["key"]
+    assert (export_dir / "patch_mapping.csv").stat().st_mtime_ns == written_at
+    entry = exports.read_manifest(export_dir)["targets"]["patch_mapping.csv"]
+    assert entry["key"] == second["key"]
+    assert entry["written_batch"]["key"] == first["key"]
+
+
+def test_content_hash_ignores_batch_columns():
+    assert exports.content_hash(_load("pm_1", "first")) == exports.content_hash(_load("pm_2", "second"))
+
+
+def test_batch_columns_are_dictionary_encoded(export_dir, monkeypatch):
+    frames = []
+    export = exports.export_patch_mapping
+    monkeypatch.setattr(exports, "export_patch_mapping", lambda df, *args: frames.append(df) or export(df, *args))
+    res = validate_file(create_sample_file("patch_mapping"), validation_rules["patch_mapping"], "pm", "patch_mapping.csv", remarks="note", file_type="patch_mapping")
+    assert res["valid"], res["message"]
+    for col in exports.BATCH_COLUMNS:
+        assert isinstance(frames[0][col].dtype, pd.CategoricalDtype)
+        assert len(frames[0][col].cat.categories) == 1
+        assert frames[0][col].cat.codes.dtype == "int8"
+    written = pd.read_csv(export_dir / "patch_mapping.csv", dtype=str)
+    assert list(written["Remarks"]) == ["note"] * 3
+    assert set(written["key"]) == {res["key"]}
+
+
+def test_xlsx_sink_continues_on_new_sheets(export_dir):
+    df = pd.DataFrame({"n": range(5), "label": ["a", None, "c", "d", "e"]})
+    assert exports.export_xlsx(df, {"path": "./exports/numbers.csv", "table": "numbers", "max_rows": 3, "batch_size": 2}, "n")
+    wb = openpyxl.load_workbook(export_dir / "numbers.xlsx")
+    assert wb.sheetnames == ["numbers", "numbers_2", "numbers_3"]
+    rows = [[c.value for c in row] for ws in wb for row in ws.iter_rows()]
+    assert rows == [["n", "label"], [0, "a"], [1, None], ["n", "label"], [2, "c"], [3, "d"], ["n", "label"], [4, "e"]]
+    assert not list(export_dir.glob(".*.tmp"))
+
+
+def test_xlsx_sink_writes_the_header_of_an_empty_frame(export_dir):
+    exports.export_xlsx(pd.DataFrame(columns=["n", "label"]), {"table": "empty"}, "n")
+    ws = openpyxl.load_workbook(export_dir / "empty.xlsx")["empty"]
+    assert [[c.value for c in row] for row in ws.iter_rows()] == [["n", "label"]]
+
+
+@pytest.mark.parametrize("codec", ["gzip", "zstd"])
+def test_compressed_csv_sink_round_trips(export_dir, codec):
+    if codec == "zstd":
+        pytest.importorskip("zstandard")
+    df = pd.DataFrame({"n": range(25), "label": [f"row {i}" for i in range(25)]})
+    stats = exports.export_csv(df, {"path": "./exports/numbers.csv", "compression": codec, "chunk_rows": 10}, "n")
+    suffix = exports.CSV_COMPRESSION_SUFFIXES[codec]
+    assert stats["file"] == f"numbers.csv{suffix}"
+    assert stats["rows"] == 25
+    assert stats["raw_bytes"] == len(df.to_csv(index=False).encode("utf-8"))
+    # gzip is written as one member per chunk
+    pd.testing.assert_frame_equal(pd.read_csv(export_dir / stats["file"], compression=codec), df)
+
+
+def test_unknown_compression_is_rejected(export_dir):
+    with pytest.raises(ValueError, match="Unknown CSV compression 'lz4'"):
+        exports.export_csv(pd.DataFrame({"n": [1]}), {"path": "./exports/numbers.csv", "compression": "lz4"}, "n")
+
+
+def test_compressed_sink_through_the_rules(export_dir):
+    rules = {**validation_rules["patch_mapping"], "export_sink": {"type": "csv", "compression": "gzip"}}
+    res = validate_file(create_sample_file("patch_mapping"), rules, "pm", "patch_mapping.csv", file_type="patch_mapping")
+    assert res["valid"], res["message"]
+    assert res["export"]["codec"] == "gzip"
+    assert not (export_dir / "patch_mapping.csv").exists()
+    written = pd.read_csv(export_dir / "patch_mapping.csv.gz", dtype=str)
+    assert list(written["wmis"]) == ["A", "B", "C"]
+
+
+def test_sqlite_sink_upserts_on_the_key(export_dir):
+    rules = {**validation_rules["patch_mapping"], "export_sink": {"type": "sqlite", "db_path": "./exports/validated.db"}}
+    df = create_sample_file("patch_mapping")
+    first = validate_file(df, rules, "pm", "patch_mapping.csv", remarks="first", file_type="patch_mapping")
+    assert first["valid"], first["message"]
+    df.loc[0, "region"] = "West"
+    second = validate_file(df, rules, "pm", "patch_mapping.csv", remarks="second", file_type="patch_mapping")
+    assert second["valid"], second["message"]
+
+    with sqlite3.connect(export_dir / "validated.db") as conn:
+        columns = [row[1] for row in conn.execute('PRAGMA table_info("patch_mapping")')]
+        rows = conn.execute('SELECT wmis, region FROM "patch_mapping" ORDER BY wmis').fetchall()
+        batches = conn.execute("SELECT target, rows, metadata FROM _batches ORDER BY rowid").fetchall()
+    # Remarks and Last Update are stored once per load, not on every row
+    assert "Remarks" not in columns and "Last Update" not in columns
+    assert rows == [("A", "West"), ("B", "South"), ("C", "East")]
+    assert [(target, n, json.loads(metadata)["Remarks"]) for target, n, metadata in batches] == [("patch_mapping", 3, "first"), ("patch_mapping", 3, "second")]
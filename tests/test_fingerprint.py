@@ -0,0 +1,47 @@
+import pandas as pd
+import pytest
+
+from App.fingerprint import DETECTION_THRESHOLD, HeaderIndex
+from App.readers import HEADER_SAMPLE_ROWS, read_file
+from App.samples import create_sample_file
+from App.validation import validation_rules
+
+
+@pytest.fixture(scope="module")
+def index():
+    return HeaderIndex(validation_rules)
+
+
+def _upload(file_type, dest):
+    # Written and read back as the app does at upload time
+    sample = create_sample_file(file_type)
+    if isinstance(sample, dict):
+        path = dest / f"{file_type}.xlsx"
+        with pd.ExcelWriter(path) as writer:
+            for sheet_name, df in sample.items():
+                df.to_excel(writer, sheet_name=sheet_name, index=False)
+    else:
+        path = dest / f"{file_type}.csv"
+        title = ",".join([""] * len(sample.columns)) + "\n"
+        path.write_text(title * int(validation_rules[file_type].get("skiprows", 0) or 0) + sample.to_csv(index=False), encoding="utf-8")
+    return read_file({"name": path.name, "datapath": str(path)}, nrows=HEADER_SAMPLE_ROWS)
+
+
+@pytest.mark.parametrize("file_type", list(validation_rules))
+def test_every_sample_is_detected(index, file_type, tmp_path):
+    assert index.detect(_upload(file_type, tmp_path)) == (file_type, 1.0)
+
+
+def test_labels_are_normalised(index):
+    assert index.detect(pd.DataFrame(columns=[" Week ", "JOB_TYPE", "fte_count"])) == ("fte", 1.0)
+
+
+def test_unknown_header_is_not_detected(index):
+    assert index.classify(pd.DataFrame(columns=["foo", "bar"])) == []
+    assert index.detect(pd.DataFrame(columns=["foo", "bar"])) == (None, 0.0)
+
+
+def test_partial_match_stays_below_the_threshold(index):
+    file_type, confidence = index.detect(pd.DataFrame(columns=["week", "job_type", "amount", "notes"]))
+    assert file_type is None
+    assert 0 < confidence < DETECTION_THRESHOLD
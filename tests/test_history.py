@@ -0,0 +1,64 @@
+import functools
+import sqlite3
+
+import pytest
+
+from App.history import HistoryWriter
+
+
+@pytest.fixture
+def writer(tmp_path):
+    return HistoryWriter(tmp_path / "history.db", batch_size=3, flush_seconds=0.05, max_queue=100)
+
+
+def _record(writer, n, **fields):
+    for i in range(n):
+        writer.record(user=fields.get("user", "u"), file_type=fields.get("file_type", "fte"), filename=f"f{i}.csv", valid=1, rows=i)
+
+
+def test_runs_are_written_in_batches(writer, monkeypatch):
+    batches = []
+
+    class Counting(sqlite3.Connection):
+        def executemany(self, sql, rows):
+            batches.append(len(rows))
+            return super().executemany(sql, rows)
+
+    monkeypatch.setattr(sqlite3, "connect", functools.partial(sqlite3.connect, factory=Counting))
+    _record(writer, 7)
+    writer.flush(timeout=5)
+    assert writer.pending() == 0
+    assert sum(batches) == 7
+    assert max(batches) <= 3
+    assert writer.page(page_size=50)[1] == 7
+
+
+def test_history_is_append_only(writer):
+    _record(writer, 1)
+    writer.flush(timeout=5)
+    conn = sqlite3.connect(writer.db_path)
+    try:
+        with pytest.raises(sqlite3.IntegrityError, match="append-only"):
+            conn.execute("UPDATE runs SET valid = 0")
+        with pytest.raises(sqlite3.IntegrityError, match="append-only"):
+            conn.execute("DELETE FROM runs")
+    finally:
+        conn.close()
+
+
+def test_page_filters_newest_first(writer):
+    _record(writer, 5, user="a", file_type="fte")
+    _record(writer, 2, user="b", file_type="attrition")
+    writer.flush(timeout=5)
+    runs, total = writer.page(page=0, page_size=2, file_type="fte")
+    assert total == 5
+    assert [r["filename"] for r in runs] == ["f4.csv", "f3.csv"]
+    runs, total = writer.page(page=2, page_size=2, file_type="fte")
+    assert [r["filename"] for r in runs] == ["f0.csv"]
+    runs, total = writer.page(user="b")
+    assert total == 2
+    assert {r["file_type"] for r in runs} == {"attrition"}
+
+
+def test_page_before_any_run(writer):
+    assert writer.page() == ([], 0)
@@ -0,0 +1,32 @@
+import pytest
+
+from App import exports
+from App.engine_parity import run_pandas
+from App.loadtest import generate_upload, generated_codes_allowed, generated_rules
+from App.validation import validation_rules
+
+
+@pytest.fixture(autouse=True)
+def export_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(exports, "EXPORT_DIR", tmp_path / "export")
+    return exports.EXPORT_DIR
+
+
+def test_generated_rules_leave_the_shared_rules_alone():
+    rules = generated_rules()
+    assert "wmis" not in rules["patch_mapping"]["value_checks"]
+    assert "wmis" in validation_rules["patch_mapping"]["value_checks"]
+
+
+def test_generated_patch_mapping_needs_generated_rules(tmp_path):
+    path = generate_upload("patch_mapping", 50, tmp_path)
+    assert not run_pandas(path, "patch_mapping")[0]["valid"]
+    assert run_pandas(path, "patch_mapping", generated_rules())[0]["valid"]
+
+
+def test_generated_codes_allowed_restores_the_rules():
+    original = validation_rules["patch_mapping"]
+    with generated_codes_allowed():
+        assert "wmis" not in validation_rules["patch_mapping"]["value_checks"]
+    assert validation_rules["patch_mapping"] is original
+    assert "wmis" in original["value_checks"]
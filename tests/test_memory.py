@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+
+from App import memory
+from App.memory import admit, estimate_footprint, track_peak
+
+
+def _csv(tmp_path, rows):
+    path = tmp_path / "fte.csv"
+    pd.DataFrame({"week": ["2025-01-06"] * rows, "job_type": ["A"] * rows, "fte_count": [1.5] * rows}).to_csv(path, index=False)
+    return {"name": path.name, "size": path.stat().st_size, "datapath": str(path)}
+
+
+def test_csv_estimate_scales_with_rows(tmp_path):
+    info = _csv(tmp_path, 10_000)
+    sample = pd.read_csv(info["datapath"], nrows=100)
+    estimate = estimate_footprint(info, sample)
+    assert estimate["method"] == "csv size"
+    assert 9_000 <= estimate["rows"] <= 11_000
+    per_row = sample.memory_usage(deep=True, index=False).sum() / len(sample)
+    assert estimate["estimated_bytes"] == int(estimate["rows"] * per_row * memory.WORKING_SET_FACTOR)
+
+
+def test_csv_estimate_without_sample_scales_file_size(tmp_path):
+    info = _csv(tmp_path, 1_000)
+    assert estimate_footprint(info)["estimated_bytes"] == info["size"] * 5 * memory.WORKING_SET_FACTOR
+
+
+def test_excel_estimate_uses_sheet_dimensions(tmp_path):
+    path = tmp_path / "demand.xlsx"
+    with pd.ExcelWriter(path) as writer:
+        pd.DataFrame({"a": range(50), "b": range(50)}).to_excel(writer, sheet_name="Volume", index=False)
+        pd.DataFrame({"a": range(20)}).to_excel(writer, sheet_name="Mix", index=False)
+    estimate = estimate_footprint({"name": path.name, "size": path.stat().st_size, "datapath": str(path)})
+    assert estimate["method"] == "sheet dimensions"
+    assert estimate["rows"] == 51 + 21
+
+
+def test_admit_against_budget():
+    estimate = {"estimated_bytes": 300 * 1024**2}
+    assert admit(estimate, budget_mb=512) == (True, None)
+    ok, reason = admit(estimate, budget_mb=100)
+    assert not ok
+    assert "about 300 MB in memory, over the 100 MB limit" in reason
+
+
+def test_track_peak_records_heap_and_rss_stages():
+    peaks = {}
+    with track_peak("heap", peaks):
+        block = np.ones(20 * 1024**2 // 8)
+    with track_peak("rss", peaks, native=True):
+        other = np.ones(20 * 1024**2 // 8)
+    del block, other
+    assert peaks["heap"] >= 19
+    assert peaks["rss"] >= 15
+
+
+def test_track_peak_without_peaks_records_nothing():
+    with track_peak("validate", None, native=True):
+        pass
@@ -0,0 +1,98 @@
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from App import exports, readers
+from App.readers import HEADER_SAMPLE_ROWS, SKIPROWS_APPLIED, read_file
+from App.samples import create_sample_file
+from App.validation import validate_file, validation_rules
+
+pytest.importorskip("pyarrow")
+
+
+@pytest.fixture(autouse=True)
+def export_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(exports, "EXPORT_DIR", tmp_path / "export")
+
+
+@pytest.fixture
+def attrition_csv(tmp_path):
+    # `skiprows: 1`: a title line above the header
+    path = tmp_path / "attrition.csv"
+    path.write_text("title,,,\n" + create_sample_file("attrition").to_csv(index=False), encoding="utf-8")
+    return {"name": path.name, "datapath": str(path)}
+
+
+def test_arrow_read_applies_skiprows(attrition_csv):
+    df = read_file(attrition_csv, rules=validation_rules["attrition"])
+    assert df.attrs[SKIPROWS_APPLIED]
+    assert list(df.columns) == ["week", "job_type", "attrition_count", "hire_date"]
+    # Only numeric columns are inferred; dates keep their uploaded text
+    assert df["week"].tolist() == ["2025-01-06", "2025-01-13", "2025-01-20"]
+    assert df["hire_date"].iloc[0] == "2025/01/13"
+    assert df["attrition_count"].dtype == "float64"
+
+
+def test_arrow_and_pandas_reads_validate_alike(attrition_csv, monkeypatch):
+    rules = validation_rules["attrition"]
+    arrow = validate_file(read_file(attrition_csv, rules=rules), rules, "attrition", "attrition.csv", file_type="attrition")
+    monkeypatch.setattr(readers, "ARROW_CSV", False)
+    df = read_file(attrition_csv, rules=rules)
+    assert SKIPROWS_APPLIED not in df.attrs
+    pandas = validate_file(df, rules, "attrition", "attrition.csv", file_type="attrition")
+    assert arrow["valid"] and pandas["valid"]
+    assert arrow["message"] == pandas["message"]
+
+
+def test_ragged_rows_fall_back_to_pandas(tmp_path, monkeypatch):
+    path = tmp_path / "fte.csv"
+    path.write_text("week,job_type,fte_count\n2025-01-06,A,1\n2025-01-13,B\n", encoding="utf-8")
+    calls = []
+    read_csv = pd.read_csv
+    monkeypatch.setattr(readers.pd, "read_csv", lambda *a, **kw: calls.append(a[0]) or read_csv(*a, **kw))
+    df = read_file({"name": path.name, "datapath": str(path)}, rules=validation_rules["fte"])
+    assert calls == [str(path)]
+    assert df["job_type"].tolist() == ["A", "B"]
+    assert df["fte_count"].isna().tolist() == [False, True]
+
+
+def test_load_upload_reports_failures(tmp_path):
+    path = tmp_path / "notes.txt"
+    path.write_text("hello", encoding="utf-8")
+    res = readers.load_upload({"name": path.name, "datapath": str(path)})
+    assert not res["ok"]
+    assert res["data"] is None
+    assert res["message"] == "notes.txt: Could not be read ❌ (Unsupported file type '.txt')"
+
+
+def test_uploads_are_read_on_the_bounded_pool(tmp_path, monkeypatch):
+    monkeypatch.setattr(readers, "UPLOAD_READ_WORKERS", 2)
+    monkeypatch.setattr(readers, "_read_pool", None)
+    running, peak = [0], [0]
+    lock = threading.Lock()
+    read_file = readers.read_file
+
+    def slow_read(*args, **kwargs):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.05)
+        with lock:
+            running[0] -= 1
+        return read_file(*args, **kwargs)
+
+    monkeypatch.setattr(readers, "read_file", slow_read)
+    infos = []
+    for i in range(6):
+        path = tmp_path / f"fte_{i}.csv"
+        create_sample_file("fte").to_csv(path, index=False)
+        infos.append({"name": path.name, "datapath": str(path)})
+    try:
+        results = [f.result(timeout=10) for f in [readers.submit_upload(info, nrows=HEADER_SAMPLE_ROWS) for info in infos]]
+    finally:
+        readers._read_pool.shutdown()
+    assert [r["name"] for r in results] == [info["name"] for info in infos]
+    assert all(r["ok"] and len(r["fingerprint"]) > 0 for r in results)
+    assert peak[0] == 2
@@ -0,0 +1,53 @@
+import os
+
+import pandas as pd
+import pytest
+
+from App import exports, references
+from App.references import allowed_values, reference_values
+from App.samples import create_sample_file
+from App.validation import validate_file, validation_rules
+
+JOB_TYPE_REF = {"file_type": "patch_mapping", "column": "wmis", "fallback": ["A", "B", "C"]}
+
+
+@pytest.fixture(autouse=True)
+def export_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(exports, "EXPORT_DIR", tmp_path)
+    return tmp_path
+
+
+def _validate(df, file_type):
+    return validate_file(df, validation_rules[file_type], file_type, f"{file_type}.csv", file_type=file_type)
+
+
+def test_fallback_until_the_reference_is_exported():
+    assert allowed_values(JOB_TYPE_REF, validation_rules) == ({"A", "B", "C"}, ["A", "B", "C"])
+    assert allowed_values({**JOB_TYPE_REF, "fallback": None}, validation_rules) == (None, None)
+
+    assert _validate(create_sample_file("patch_mapping").iloc[:2], "patch_mapping")["valid"]
+    assert allowed_values(JOB_TYPE_REF, validation_rules) == (frozenset({"A", "B"}), "patch_mapping.wmis")
+    res = _validate(create_sample_file("fte"), "fte")
+    assert res["message"] == "fte: Column 'job_type' has values not in patch_mapping.wmis. Found 'C' at row 3"
+
+
+def test_index_is_reread_only_when_the_export_changes(export_dir, monkeypatch):
+    path = export_dir / "codes.csv"
+    pd.DataFrame({"code": ["A", "B"]}).to_csv(path, index=False)
+    reads = []
+    read_csv = pd.read_csv
+    monkeypatch.setattr(references.pd, "read_csv", lambda *a, **kw: reads.append(a[0]) or read_csv(*a, **kw))
+
+    assert reference_values(path, "code") == {"A", "B"}
+    assert reference_values(path, "code") == {"A", "B"}
+    assert len(reads) == 1
+
+    # Same size, new mtime: the index is rebuilt
+    pd.DataFrame({"code": ["A", "C"]}).to_csv(path, index=False)
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert reference_values(path, "code") == {"A", "C"}
+    assert len(reads) == 2
+
+    path.unlink()
+    assert reference_values(path, "code") is None
@@ -0,0 +1,69 @@
+import csv
+
+import openpyxl
+import pytest
+
+from App import exports
+from App.reports import ERROR_FILL, build_error_report
+from App.samples import create_sample_file
+from App.validation import validation_rules
+
+
+@pytest.fixture(autouse=True)
+def export_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(exports, "EXPORT_DIR", tmp_path / "export")
+
+
+@pytest.fixture
+def upload():
+    df = create_sample_file("fte").astype(object)
+    df.loc[1, "fte_count"] = "abc"
+    df.loc[2, "job_type"] = "Z"
+    return df
+
+
+def _report(data, file_type, fmt, tmp_path):
+    path, count = build_error_report(data, validation_rules[file_type], fmt, file_type=file_type, dest_dir=tmp_path)
+    assert path.parent == tmp_path
+    return path, count
+
+
+def test_csv_lists_every_violation(upload, tmp_path):
+    path, count = _report(upload, "fte", "csv", tmp_path)
+    with open(path, newline="", encoding="utf-8") as fh:
+        rows = list(csv.reader(fh))
+    assert count == 2
+    assert rows == [
+        ["sheet", "row", "column", "value", "rule"],
+        ["", "2", "fte_count", "abc", "has invalid numeric format"],
+        ["", "3", "job_type", "Z", "has values not in ['A', 'B', 'C']"],
+    ]
+
+
+def test_csv_reports_missing_sheets(tmp_path):
+    demand = create_sample_file("demand")
+    path, count = _report({"Volume": demand["Volume"]}, "demand", "csv", tmp_path)
+    assert count == 1
+    assert path.read_text(encoding="utf-8").splitlines()[1] == "Mix,,,,Missing required sheet 'Mix'"
+
+
+def test_xlsx_highlights_flagged_cells(upload, tmp_path):
+    path, count = _report(upload, "fte", "xlsx", tmp_path)
+    wb = openpyxl.load_workbook(path)
+    assert count == 2
+    assert wb.sheetnames == ["Summary", "Data"]
+    summary = [[c.value for c in row] for row in wb["Summary"].iter_rows(min_row=2)]
+    assert summary == [[None, "fte_count", "has invalid numeric format", 1], [None, "job_type", "has values not in ['A', 'B', 'C']", 1]]
+
+    data = wb["Data"]
+    assert [c.value for c in data[1]] == ["week", "job_type", "fte_count", "Errors"]
+    assert [c.value for c in data[2]][3] is None
+    assert data["D3"].value == "fte_count has invalid numeric format"
+    assert data["C3"].fill.fgColor.rgb.endswith(ERROR_FILL)
+    assert data["B4"].fill.fgColor.rgb.endswith(ERROR_FILL)
+    assert not data["C2"].fill.fgColor.rgb.endswith(ERROR_FILL)
+
+
+def test_unknown_format_is_rejected(upload):
+    with pytest.raises(ValueError, match="Unknown report format"):
+        build_error_report(upload, validation_rules["fte"], "pdf")
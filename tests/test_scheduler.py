@@ -0,0 +1,102 @@
+import threading
+import time
+
+import pytest
+
+from App.scheduler import JobScheduler, QueueFullError
+
+
+def _wait(job, timeout=5):
+    deadline = time.perf_counter() + timeout
+    while not job.done():
+        assert time.perf_counter() < deadline, job.label
+        time.sleep(0.005)
+
+
+def _blocked(scheduler, user="u", file_type="blocker", targets=()):
+    # A running job that holds its worker until the returned event is set
+    release = threading.Event()
+    job = scheduler.submit(lambda job: release.wait(5), user=user, file_type=file_type, label="blocker", targets=targets)
+    while job.status != "running":
+        time.sleep(0.005)
+    return job, release
+
+
+def test_queued_jobs_run_smallest_first():
+    scheduler = JobScheduler(workers=1, max_queue=10, per_user_limit=5, per_type_limit=5)
+    blocker, release = _blocked(scheduler)
+    order = []
+    jobs = [scheduler.submit(lambda job: order.append(job.label), user="u", file_type=ft, size=size, label=ft) for ft, size in [("big", 300), ("small", 100), ("mid", 200)]]
+    assert [scheduler.position(j) for j in jobs] == [3, 1, 2]
+    release.set()
+    for job in jobs:
+        _wait(job)
+    assert order == ["small", "mid", "big"]
+
+
+def test_long_waiting_job_goes_first():
+    scheduler = JobScheduler(workers=1, max_queue=10, per_user_limit=5, per_type_limit=5, max_wait=0.05)
+    blocker, release = _blocked(scheduler)
+    order = []
+    big = scheduler.submit(lambda job: order.append("big"), user="u", file_type="big", size=300)
+    time.sleep(0.1)
+    small = scheduler.submit(lambda job: order.append("small"), user="u", file_type="small", size=100)
+    assert scheduler.position(big) == 1
+    release.set()
+    _wait(big)
+    _wait(small)
+    assert order == ["big", "small"]
+
+
+def test_per_type_limit_holds_jobs_back():
+    scheduler = JobScheduler(workers=3, max_queue=10, per_user_limit=5, per_type_limit=1)
+    blocker, release = _blocked(scheduler, file_type="fte")
+    same = scheduler.submit(lambda job: None, user="u", file_type="fte")
+    other = scheduler.submit(lambda job: None, user="u", file_type="attrition")
+    _wait(other)
+    assert same.status == "queued"
+    release.set()
+    _wait(same)
+    assert same.status == "done"
+
+
+def test_jobs_sharing_an_export_target_do_not_overlap():
+    scheduler = JobScheduler(workers=3, max_queue=10, per_user_limit=5, per_type_limit=5)
+    blocker, release = _blocked(scheduler, user="a", file_type="fte", targets=["fte.csv"])
+    same_target = scheduler.submit(lambda job: None, user="b", file_type="fte", targets=["fte.csv"])
+    time.sleep(0.05)
+    assert same_target.status == "queued"
+    release.set()
+    _wait(same_target)
+    assert same_target.started_at >= blocker.finished_at
+
+
+def test_cancel_drops_queued_jobs_only():
+    scheduler = JobScheduler(workers=1, max_queue=10, per_user_limit=5, per_type_limit=5)
+    blocker, release = _blocked(scheduler)
+    queued = scheduler.submit(lambda job: "ran", user="u", file_type="fte")
+    assert scheduler.cancel(queued)
+    assert queued.status == "failed"
+    assert not scheduler.cancel(blocker)
+    release.set()
+    _wait(blocker)
+    assert blocker.status == "done"
+    assert queued.result is None
+
+
+def test_full_queue_rejects_submissions():
+    scheduler = JobScheduler(workers=1, max_queue=1, per_user_limit=5, per_type_limit=5)
+    blocker, release = _blocked(scheduler)
+    scheduler.submit(lambda job: None, user="u", file_type="fte")
+    with pytest.raises(QueueFullError):
+        scheduler.submit(lambda job: None, user="u", file_type="fte")
+    release.set()
+
+
+def test_finish_time_is_set_once_done():
+    scheduler = JobScheduler(workers=1, max_queue=10, per_user_limit=5, per_type_limit=5)
+    job = scheduler.submit(lambda job: time.sleep(0.01), user="u", file_type="fte")
+    while not job.done():
+        pass
+    assert job.finished_at is not None
+    assert job.finished_at >= job.started_at
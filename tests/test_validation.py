@@ -0,0 +1,202 @@
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from App import exports
+from App.samples import create_sample_file
+from App.validation import infer_date_format, precheck_headers, validate_file, validate_single_file, validation_rules
+
+
+@pytest.fixture(autouse=True)
+def export_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(exports, "EXPORT_DIR", tmp_path)
+    return tmp_path
+
+
+def _check(df, file_type, **rules):
+    return validate_single_file(df, {**validation_rules[file_type], **rules}, file_type)
+
+
+def _validate(df, file_type):
+    # Full validation and export, including the checks on the melted frame
+    return validate_file(df, validation_rules[file_type], file_type, f"{file_type}.csv", file_type=file_type)
+
+
+def test_string_checks_normalise_before_pattern():
+    df = create_sample_file("patch_mapping")
+    df.loc[1, "wmis"] = " b "
+    assert _check(df, "patch_mapping")["valid"]
+    df.loc[1, "wmis"] = "b-1"
+    res = _check(df, "patch_mapping")
+    assert res["message"] == "patch_mapping: Column 'wmis' does not match pattern '[A-Z0-9]+'. Found 'b-1' at row 2"
+
+
+def test_string_checks_lengths():
+    df = create_sample_file("fte")
+    df.loc[0, "job_type"] = "A" * 11
+    res = _check(df, "fte", string_checks={"job_type": {"min_length": 1, "max_length": 10}})
+    assert res["message"] == f"fte: Column 'job_type' is longer than 10 characters. Found '{'A' * 11}' at row 1"
+    res = _check(df, "fte", string_checks={"job_type": {"min_length": 12}})
+    assert res["message"] == f"fte: Column 'job_type' is shorter than 12 characters. Found '{'A' * 11}' at row 1"
+
+
+def test_normalised_values_are_exported(export_dir):
+    df = create_sample_file("patch_mapping")
+    df.loc[1, "wmis"] = " b "
+    df.loc[1, "region"] = "south"
+    res = validate_file(df, validation_rules["patch_mapping"], "pm", "patch_mapping.csv", file_type="patch_mapping")
+    assert res["valid"], res["message"]
+    written = pd.read_csv(export_dir / "patch_mapping.csv", dtype=str)
+    assert written.loc[1, "wmis"] == "B"
+    assert written.loc[1, "region"] == "South"
+
+
+def test_unique_keys_compare_normalised_values():
+    df = create_sample_file("patch_mapping")
+    df = pd.concat([df, df.iloc[[0]].assign(wmis=" a ")], ignore_index=True)
+    res = _check(df, "patch_mapping")
+    assert res["message"] == "patch_mapping: Duplicate rows for unique key ['wmis']: {'wmis': 'A'} at rows 1, 4"
+
+
+@pytest.mark.parametrize(
+    "value, reason",
+    [
+        ("abc", "has invalid numeric format"),
+        ("-1", "is below the minimum 0"),
+        ("10001", "is above the maximum 10000"),
+        ("1.234", "has more than 2 decimal places"),
+    ],
+)
+def test_numeric_checks(value, reason):
+    df = create_sample_file("fte").astype({"fte_count": object})
+    df.loc[1, "fte_count"] = value
+    assert _check(df, "fte")["message"] == f"fte: Column 'fte_count' {reason}. Found '{value}' at row 2"
+
+
+def test_numeric_checks_integer_thousands_and_percent():
+    df = create_sample_file("fte").astype({"fte_count": object})
+    df["fte_count"] = ["1,200", "50%", "3"]
+    assert _check(df, "fte", numeric_checks={"fte_count": {"min": 0, "thousands": ",", "percent": True}})["valid"]
+    res = _check(df, "fte", numeric_checks={"fte_count": {"thousands": ",", "percent": True, "integer": True}})
+    assert res["message"] == "fte: Column 'fte_count' is not a whole number. Found '50%' at row 2"
+    assert _check(df, "fte", numeric_checks={"fte_count": {}})["message"] == "fte: Column 'fte_count' has invalid numeric format. Found '1,200' at row 1"
+
+
+def test_numeric_checks_on_the_melted_values():
+    df = create_sample_file("fte_wide")
+    df.loc[2, "2025-01-13"] = -4
+    res = _validate(df, "fte_wide")
+    assert res["message"] == "fte_wide (after transform): Column 'fte_count' is below the minimum 0. Found '-4.0' at row 6"
+
+
+def test_unique_keys_report_every_duplicate_row():
+    df = create_sample_file("fte")
+    df = pd.concat([df, df.iloc[[0, 0, 2]]], ignore_index=True)
+    res = _check(df, "fte")
+    assert res["message"] == (
+        "fte: Duplicate rows for unique key ['week', 'job_type']: "
+        "{'week': '2025-01-06', 'job_type': 'A'} at rows 1, 4, 5; {'week': '2025-01-20', 'job_type': 'C'} at rows 3, 6"
+    )
+
+
+def test_unique_keys_on_the_melted_frame():
+    df = create_sample_file("fte_wide")
+    df = pd.concat([df, df.iloc[[1]]], ignore_index=True)
+    res = _validate(df, "fte_wide")
+    assert res["message"] == (
+        "fte_wide (after transform): Duplicate rows for unique key ['job_type', 'week']: "
+        "{'job_type': 'B', 'week': '2025-01-06'} at rows 2, 4; {'job_type': 'B', 'week': '2025-01-13'} at rows 6, 8; "
+        "{'job_type': 'B', 'week': '2025-01-20'} at rows 10, 12"
+    )
+
+
+def test_precheck_headers():
+    fte = validation_rules["fte"]
+    assert precheck_headers(create_sample_file("fte").head(0), fte, "fte") is None
+    assert precheck_headers(create_sample_file("fte").drop(columns="week"), fte, "fte") == {
+        "valid": False,
+        "message": "fte: Invalid columns. Expected ['week', 'job_type', 'fte_count'], got ['job_type', 'fte_count']",
+    }
+    # The header of a `skiprows` rule is the row below the title lines
+    titled = pd.DataFrame([create_sample_file("attrition").columns], columns=["title", "", " ", "  "])
+    assert precheck_headers(titled, validation_rules["attrition"], "attrition") is None
+
+
+def test_precheck_headers_sheets():
+    demand = validation_rules["demand"]
+    sheets = create_sample_file("demand")
+    assert precheck_headers(sheets, demand, "demand") is None
+    assert precheck_headers(sheets["Volume"], demand, "demand")["message"] == (
+        "demand: Expected an Excel with sheets ['Volume', 'Mix'], but uploaded data is not multi-sheet."
+    )
+    assert precheck_headers({"Volume": sheets["Volume"]}, demand, "demand")["message"] == "demand: Missing required sheet 'Mix' in uploaded Excel."
+    assert precheck_headers(sheets, validation_rules["fte"], "fte")["message"] == "fte: Expected a single sheet, but uploaded Excel has sheets ['Volume', 'Mix']."
+
+
+@pytest.mark.parametrize(
+    "values, fmt",
+    [
+        (["2025-01-06", "2025-01-13"], "%Y-%m-%d"),
+        (["06/01/2025", "13/01/2025"], "%d/%m/%Y"),
+        (["6 Jan 2025", None], "%d %b %Y"),
+        # Day-first and month-first give different dates: no guess
+        (["03/04/2025"], None),
+        (["soon"], None),
+    ],
+)
+def test_infer_date_format(values, fmt):
+    assert infer_date_format(pd.Series(values)) == fmt
+
+
+def test_inferred_format_checks_the_column():
+    df = create_sample_file("fte")
+    df["week"] = ["06/01/2025", "13/01/2025", "20-01-2025"]
+    res = _check(df, "fte", date_columns={"week": {}})
+    assert res["message"] == "fte: Column 'week' has invalid date format. Expected format '%d/%m/%Y (inferred)'. Found '20-01-2025' at row 3"
+
+
+@pytest.mark.parametrize(
+    "dates, message",
+    [
+        (["2025-01-06", "2025-01-13"], "Missing week columns 2025-01-20."),
+        (["2025-01-06", "2025-01-13", "2025-01-20", "2025-01-27"], "Column headers 2025-01-27 are outside the expected range 2025-01-06 to 2025-01-20."),
+        (["2025-01-06", "2025-01-13", "jan"], "Column headers ['jan'] are not dates in format 'yyyy-mm-dd'."),
+        (["2025-01-06", "2025-01-06", "2025-01-20"], "Column headers repeat the dates 2025-01-06."),
+        (["2025-01-06", "2025-01-14", "2025-01-20"], "Column headers must be Mondays; found 2025-01-14."),
+        ([], "No date columns found next to ['job_type']."),
+    ],
+)
+def test_header_dates(dates, message):
+    header = pd.DataFrame(columns=["job_type", *dates])
+    assert precheck_headers(header, validation_rules["fte_wide"], "fte_wide") == {"valid": False, "message": f"fte_wide: {message}"}
+
+
+def test_header_dates_become_iso_weeks(export_dir):
+    # Excel stores date headers as datetimes; text headers use `column_format`
+    df = create_sample_file("fte_wide").rename(columns={"2025-01-06": datetime(2025, 1, 6)})
+    assert _validate(df, "fte_wide")["valid"]
+    written = pd.read_csv(export_dir / "fte_wide.csv", dtype=str)
+    assert written["week"].unique().tolist() == ["2025-01-06", "2025-01-13", "2025-01-20"]
+
+
+def test_progress_events_per_sheet():
+    events = []
+    res = validate_file(create_sample_file("demand"), validation_rules["demand"], "demand", "demand.xlsx", progress=lambda **e: events.append(e), file_type="demand")
+    assert res["valid"], res["message"]
+    fractions = [e["fraction"] for e in events if "fraction" in e]
+    assert fractions == sorted(fractions) and 0 < fractions[0] and fractions[-1] < 1
+    validated = [(e["sheet"], e["sheet_result"]["message"]) for e in events if e["stage"] == "validated"]
+    assert validated == [("Volume", "demand - Volume: Sheet is valid ✅"), ("Mix", "demand - Mix: Sheet is valid ✅")]
+    assert [e["sheet"] for e in events if e["stage"] == "exporting"] == ["Volume", "Mix"]
+
+
+def test_progress_reports_the_failed_sheet():
+    sheets = create_sample_file("demand")
+    sheets["Volume"].loc[0, "job_type"] = "Z"
+    events = []
+    res = validate_file(sheets, validation_rules["demand"], "demand", "demand.xlsx", progress=lambda **e: events.append(e), file_type="demand")
+    validated = [e for e in events if e["stage"] == "validated"]
+    assert [(e["sheet"], e["violations"]) for e in validated] == [("Volume", 1)]
+    assert validated[0]["sheet_result"]["message"] == res["message"]
+    assert not [e for e in events if e["stage"] == "exporting"]